@@ -0,0 +1,15 @@
+"""
+Custom API exceptions.
+"""
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    """
+    The resource doesn't satisfy the conditions of the request, e.g. it was
+    changed since the client last read the version listed in If-Match.
+    """
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = _('The resource has changed since it was last read.')
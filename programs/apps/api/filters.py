@@ -3,8 +3,21 @@ Reusable queryset filters for the REST API.
 """
 from rest_framework import filters
 
+from programs.apps.api.permissions import is_admin
 from programs.apps.core.constants import Role
-from programs.apps.programs.constants import ProgramStatus
+from programs.apps.programs import search
+from programs.apps.programs.completion import COMPLETABLE_STATUSES
+from programs.apps.programs.documents import VISIBLE_STATUSES
+
+
+def get_request_role(request):
+    """
+    Return the role (ADMINS or LEARNERS) determining which programs are visible
+    to the requesting user.  The result is cached on the request.
+    """
+    if not hasattr(request, '_program_visibility_role'):
+        request._program_visibility_role = Role.ADMINS if is_admin(request) else Role.LEARNERS  # pylint: disable=protected-access
+    return request._program_visibility_role  # pylint: disable=protected-access
 
 
 class ProgramStatusRoleFilterBackend(filters.BaseFilterBackend):
@@ -17,10 +30,7 @@ class ProgramStatusRoleFilterBackend(filters.BaseFilterBackend):
     """
 
     def filter_queryset(self, request, queryset, view):
-        allowed_status = [ProgramStatus.ACTIVE, ProgramStatus.RETIRED]
-        if request.user.groups.filter(name=Role.ADMINS).exists():
-            allowed_status.append(ProgramStatus.UNPUBLISHED)
-        return queryset.filter(status__in=allowed_status)
+        return queryset.filter(status__in=VISIBLE_STATUSES[get_request_role(request)])
 
 
 class ProgramCompletionFilterBackend(filters.BaseFilterBackend):
@@ -30,8 +40,7 @@ class ProgramCompletionFilterBackend(filters.BaseFilterBackend):
     """
 
     def filter_queryset(self, request, queryset, view):
-        allowed_status = [ProgramStatus.ACTIVE, ProgramStatus.RETIRED]
-        return queryset.filter(status__in=allowed_status)
+        return queryset.filter(status__in=COMPLETABLE_STATUSES)
 
 
 class BaseQueryFilterBackend(filters.BaseFilterBackend):
@@ -62,7 +71,7 @@ class ProgramOrgKeyFilterBackend(BaseQueryFilterBackend):
     Allows for filtering program listings by an organization key query string argument.
     """
     query_parameter = 'organization'
-    lookup_filter = 'organizations__key'  # match over m2m, thus 'organizations'
+    lookup_filter = 'organization_key'  # denormalized from the program's organization, avoiding a join.
 
 
 class CourseCodeOrgKeyFilterBackend(BaseQueryFilterBackend):
@@ -71,3 +80,18 @@ class CourseCodeOrgKeyFilterBackend(BaseQueryFilterBackend):
     """
     query_parameter = 'organization'
     lookup_filter = 'organization__key'
+
+
+class SearchFilterBackend(filters.BaseFilterBackend):
+    """
+    Allows for searching listings with a query string argument, using the
+    search index (see `programs.apps.programs.search`).  Results are ordered
+    by relevance, and limited to the SEARCH_MAX_RESULTS most relevant.
+    """
+    query_parameter = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.query_parameter) if request.method == 'GET' else None
+        if not query:
+            return queryset
+        return search.order_by_ids(queryset, search.search(queryset, query))
@@ -0,0 +1,45 @@
+"""
+JSON Merge Patch (https://tools.ietf.org/html/rfc7396).
+
+A merge patch describes changes to a JSON document by example: members of
+the patch replace those of the target document, recursively for objects, and
+null members remove them.  Arrays are replaced as a whole.
+
+Rather than writing all the fields given in a patch, views apply it to the
+current representation of a resource, and use `get_delta` to find the fields
+whose values it actually changes, so that nothing else is validated or written.
+"""
+
+
+def apply_patch(target, patch):
+    """
+    Apply a merge patch to a target document, without modifying either.
+
+    Returns:
+        the patched document.
+    """
+    if not isinstance(patch, dict):
+        return patch
+
+    patched = dict(target) if isinstance(target, dict) else {}
+    for name, value in patch.items():
+        if value is None:
+            patched.pop(name, None)
+        else:
+            patched[name] = apply_patch(patched.get(name), value)
+    return patched
+
+
+def get_delta(current, patched):
+    """
+    Compare the members of a document before and after patching.
+
+    Returns:
+        dict mapping the name of each member which was changed to its new value,
+        or to None if it was removed.
+    """
+    return {
+        name: patched.get(name)
+        for name in set(current) | set(patched)
+        if patched.get(name) != current.get(name)
+    }
@@ -0,0 +1,96 @@
+"""
+Mixins for API views.
+"""
+import time
+
+from django.conf import settings
+from django.utils.translation import ugettext as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+from programs.apps.core import db_routers
+
+
+class ReadReplicaMixin(object):
+    """
+    Serve GET requests from a read replica.
+
+    A successful write pins the client to the primary database for the next
+    READ_REPLICA_PIN_SECONDS, by means of a cookie, so that it reads its own
+    writes even while the replicas catch up.  Actions listed in `read_only_actions`
+    don't write, though they use other methods (e.g. to accept large queries in
+    their body), and don't pin clients.
+    """
+    read_only_actions = ()
+
+    def dispatch(self, request, *args, **kwargs):  # pylint: disable=missing-docstring
+        if request.method == 'GET' and not self.is_pinned_to_primary(request):
+            with db_routers.use_replica():
+                return super(ReadReplicaMixin, self).dispatch(request, *args, **kwargs)
+
+        response = super(ReadReplicaMixin, self).dispatch(request, *args, **kwargs)
+        is_write = request.method not in SAFE_METHODS and getattr(self, 'action', None) not in self.read_only_actions
+        if is_write and response.status_code < 400:
+            pinned_until = int(time.time()) + settings.READ_REPLICA_PIN_SECONDS
+            response.set_cookie(
+                settings.READ_REPLICA_PIN_COOKIE_NAME,
+                str(pinned_until),
+                max_age=settings.READ_REPLICA_PIN_SECONDS,
+                httponly=True,
+            )
+        return response
+
+    def is_pinned_to_primary(self, request):
+        """
+        Whether the client wrote recently enough to need to read from the primary database.
+        """
+        try:
+            pinned_until = int(request.COOKIES.get(settings.READ_REPLICA_PIN_COOKIE_NAME, 0))
+        except ValueError:
+            return False
+        return pinned_until >= time.time()
+
+
+class SparseFieldsetMixin(object):
+    """
+    Let clients of read-only requests select the fields of the representation,
+    either with the `fields` query parameter, listing the fields to include, or
+    with the `exclude` parameter, listing those to leave out.  Both take comma-
+    separated field names.
+
+    The view's serializer must accept the names of the fields to keep as its
+    `fields` argument (see `programs.apps.api.serializers.SparseFieldsMixin`).
+    """
+
+    def get_requested_fields(self):
+        """
+        Return the names of the fields selected by the request, in the order the
+        serializer declares them, or None if the request doesn't select fields.
+
+        Raises:
+            ValidationError: if an unknown field is named.
+        """
+        params = self.request.query_params
+        if self.request.method not in SAFE_METHODS or ('fields' not in params and 'exclude' not in params):
+            return None
+
+        available = self.get_serializer_class().Meta.fields
+        requested = {}
+        errors = {}
+        for param in ('fields', 'exclude'):
+            names = set(name.strip() for name in params.get(param, '').split(',')) - {''}
+            unknown = names - set(available)
+            if unknown:
+                errors[param] = [_('Unknown field: {name}').format(name=name) for name in sorted(unknown)]
+            requested[param] = names
+        if errors:
+            raise ValidationError(errors)
+
+        included = requested['fields'] if 'fields' in params else available
+        return tuple(name for name in available if name in included and name not in requested['exclude'])
+
+    def get_serializer(self, *args, **kwargs):  # pylint: disable=missing-docstring
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super(SparseFieldsetMixin, self).get_serializer(*args, **kwargs)
@@ -1,6 +1,8 @@
 """
 Reusable pagination for REST API views.
 """
+from collections import OrderedDict
+
 from rest_framework.response import Response
 from rest_framework import pagination
 
@@ -13,14 +15,21 @@ class DefaultPagination(pagination.PageNumberPagination):
     """
     page_size_query_param = "page_size"
 
+    def get_pagination_metadata(self):
+        """
+        Return the pagination information included in paginated responses.
+        """
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('count', self.page.paginator.count),
+            ('num_pages', self.page.paginator.num_pages),
+        ])
+
     def get_paginated_response(self, data):
         """
         Annotate the response with pagination information.
         """
-        return Response({
-            'next': self.get_next_link(),
-            'previous': self.get_previous_link(),
-            'count': self.page.paginator.count,
-            'num_pages': self.page.paginator.num_pages,
-            'results': data
-        })
+        response_data = self.get_pagination_metadata()
+        response_data['results'] = data
+        return Response(response_data)
@@ -6,6 +6,18 @@ from rest_framework import permissions
 from programs.apps.core.constants import Role
 
 
+def is_admin(request):
+    """
+    Whether the requesting user is a member of the ADMINS group.  The result is
+    cached on the underlying HttpRequest, which is shared by the clones of the
+    request made by the browsable API.
+    """
+    http_request = getattr(request, '_request', request)
+    if not hasattr(http_request, '_is_admin'):
+        http_request._is_admin = request.user.groups.filter(name=Role.ADMINS).exists()  # pylint: disable=protected-access
+    return http_request._is_admin  # pylint: disable=protected-access
+
+
 class IsAdminGroupOrReadOnly(permissions.IsAuthenticated):
     """
     Allow read-only access for any authenticated user, but require membership
@@ -16,7 +28,7 @@ class IsAdminGroupOrReadOnly(permissions.IsAuthenticated):
         return (
             super(IsAdminGroupOrReadOnly, self).has_permission(request, view) and
             request.method in permissions.SAFE_METHODS or
-            request.user.groups.filter(name=Role.ADMINS).exists()
+            is_admin(request)
         )
 
 
@@ -28,5 +40,5 @@ class IsAdminGroup(permissions.IsAuthenticated):
     def has_permission(self, request, view):
         return (
             super(IsAdminGroup, self).has_permission(request, view) and
-            request.user.groups.filter(name=Role.ADMINS).exists()
+            is_admin(request)
         )
@@ -0,0 +1,118 @@
+"""
+Custom DRF renderers.
+
+`JSONRenderer` renders the same bytes as DRF's, faster.  DRF renders unicode
+JSON (UNICODE_JSON) which, on Python 2, the stdlib encodes one string at a time
+in Python rather than in its C extension.  The encoders below instead use
+either `simplejson`, when installed, whose C extension handles unicode output,
+or the stdlib's C extension to render ASCII JSON, whose escaped non-ASCII
+characters are then restored.  The encoder used can be chosen with the
+API_JSON_ENCODER setting; by default, the first available one in `ENCODERS` is.
+
+Serializers already represent dates, times and UUIDs as strings, so the
+encoders rarely need to fall back to DRF's encoder for other types.
+"""
+from collections import OrderedDict
+import json
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import renderers
+from rest_framework.compat import SHORT_SEPARATORS
+from rest_framework.utils import encoders
+
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+
+
+# Escape sequences of the stdlib's ASCII output, capturing the code units of
+# escaped characters, and surrogate pairs together.
+ESCAPE_RE = re.compile(r'\\u(d[89ab][0-9a-f]{2})\\u(d[c-f][0-9a-f]{2})|\\u([0-9a-f]{4})|\\.')
+
+# Characters which remain escaped in unicode JSON: control characters, and
+# line and paragraph separators, which DRF escapes so that JSON is valid javascript.
+ESCAPED_CODE_POINTS = frozenset(range(0x20)) | frozenset([0x2028, 0x2029])
+
+
+def _unescape(match):
+    """Restore an escaped character, unless it remains escaped in unicode JSON."""
+    high, low, code_unit = match.groups()
+    if high is not None:
+        code_point = 0x10000 + ((int(high, 16) - 0xd800) << 10) + (int(low, 16) - 0xdc00)
+        return (u'\\U%08x' % code_point).decode('unicode_escape')
+    if code_unit is not None:
+        code_point = int(code_unit, 16)
+        if code_point not in ESCAPED_CODE_POINTS:
+            return unichr(code_point)
+    return match.group(0)
+
+
+def encode_with_stdlib(data):
+    """
+    Encode data as compact, unicode JSON, with the stdlib's C extension.
+    """
+    content = json.dumps(data, cls=encoders.JSONEncoder, ensure_ascii=True, separators=SHORT_SEPARATORS)
+    if '\\u' not in content:
+        return content
+    return ESCAPE_RE.sub(_unescape, content.decode('ascii')).encode('utf-8')
+
+
+def encode_with_simplejson(data):
+    """
+    Encode data as compact, unicode JSON, with simplejson, configured to behave as the stdlib does.
+    """
+    content = simplejson.dumps(
+        data,
+        default=encoders.JSONEncoder().default,
+        ensure_ascii=False,
+        separators=SHORT_SEPARATORS,
+        use_decimal=False,
+        namedtuple_as_object=False,
+        tuple_as_array=True,
+    )
+    if isinstance(content, unicode):
+        content = content.replace(u'\u2028', u'\\u2028').replace(u'\u2029', u'\\u2029').encode('utf-8')
+    return content
+
+
+# Available encoders, fastest first.
+ENCODERS = OrderedDict([
+    ('simplejson', encode_with_simplejson if simplejson is not None else None),
+    ('stdlib', encode_with_stdlib),
+])
+
+
+def get_encoder():
+    """
+    Return the encoder named by the API_JSON_ENCODER setting, or the fastest available one when it is None.
+
+    Raises:
+        ImproperlyConfigured: if the named encoder is unknown or unavailable.
+    """
+    name = settings.API_JSON_ENCODER
+    if name is None:
+        return next(encoder for encoder in ENCODERS.values() if encoder is not None)
+
+    encoder = ENCODERS.get(name)
+    if encoder is None:
+        raise ImproperlyConfigured('The JSON encoder [{}] is unknown or unavailable.'.format(name))
+    return encoder
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    Renders compact, unicode JSON with the encoder returned by `get_encoder`.  Other
+    JSON, e.g. indented for the browsable API, is rendered by DRF's renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super(JSONRenderer, self).render(data, accepted_media_type, renderer_context)
+
+        return get_encoder()(data)
@@ -6,11 +6,49 @@ should be created here. As the API evolves, serializers may become more
 specific to a particular version of the API. In this case, the serializers
 in question should be moved to versioned sub-package.
 """
+from collections import OrderedDict
+
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.utils.translation import ugettext as _
+from opaque_keys import InvalidKeyError
 from rest_framework import fields, exceptions, serializers
+from rest_framework.settings import api_settings
 
+from programs.apps.core import metrics
 from programs.apps.programs import models, constants
+from programs.apps.programs.course_keys import parse_course_run_key
+
+
+class TimedRepresentationMixin(object):
+    """
+    Count the time taken to represent instances towards the serializer time
+    recorded in request metrics.  Only the outermost serializer, or each item
+    of an outermost list, is measured, so that nested time isn't counted twice.
+    """
+
+    def to_representation(self, instance):  # pylint: disable=missing-docstring
+        parent = self.parent
+        if parent is not None and not (isinstance(parent, serializers.ListSerializer) and parent.parent is None):
+            return super(TimedRepresentationMixin, self).to_representation(instance)
+
+        with metrics.time_serialization():
+            return super(TimedRepresentationMixin, self).to_representation(instance)
+
+
+class SparseFieldsMixin(object):
+    """
+    Allow a serializer to be restricted to some of its fields, by passing the
+    names of the fields to keep as the `fields` argument.
+    """
+
+    def __init__(self, *args, **kwargs):
+        field_names = kwargs.pop('fields', None)
+        super(SparseFieldsMixin, self).__init__(*args, **kwargs)
+
+        if field_names is not None:
+            for name in set(self.fields) - set(field_names):
+                self.fields.pop(name)
 
 
 class NestedWriteableSerializer(serializers.ListSerializer):
@@ -24,6 +62,10 @@ class NestedWriteableSerializer(serializers.ListSerializer):
          for any child relative to the parent, and it should work with either
          mapping objects (keys) or model instances (attributes).  See the examples
          defined in this file.
+
+    Optionally, the serializer being nested may define `prepare_creations(validated_items)`,
+    which is called with the validated data of all children about to be created,
+    so that work common to them can be done at once.
     """
 
     def update(self, instance, validated_data):
@@ -36,7 +78,11 @@ class NestedWriteableSerializer(serializers.ListSerializer):
             return self.child.unique_attrs(obj)
 
         db_objs = {_key(obj): obj for obj in instance}
-        req_objs = {_key(obj): obj for obj in validated_data}
+        req_objs = OrderedDict((_key(obj), obj) for obj in validated_data)
+
+        to_create = [req_obj for key, req_obj in req_objs.items() if key not in db_objs]
+        if to_create and hasattr(self.child, 'prepare_creations'):
+            self.child.prepare_creations(to_create)
 
         # Perform creations and updates.
         ret = []
@@ -59,7 +105,7 @@ class NestedWriteableSerializer(serializers.ListSerializer):
         return ret
 
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class OrganizationSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Serializer for the organization model."""
 
     class Meta(object):  # pylint: disable=missing-docstring
@@ -78,13 +124,65 @@ class ProgramOrganizationSerializer(serializers.ModelSerializer):
         read_only_fields = ('display_name', )
 
 
+class ProgramCourseRunModeListSerializer(NestedWriteableSerializer):
+    """
+    Nested list of the run modes of a course code, whose uniqueness is checked
+    for the whole list at once rather than by a query for each run mode saved.
+
+    Duplicates within the list are found in memory.  Since run modes are
+    matched with the course code's existing ones by their unique attributes,
+    no other duplicate can be written, save by a concurrent request, in which
+    case the database's unique constraint is violated and reported likewise.
+    """
+
+    def to_internal_value(self, data):
+        """
+        Verify that no run mode is listed twice, reporting the repeated ones.
+        """
+        validated_data = super(ProgramCourseRunModeListSerializer, self).to_internal_value(data)
+
+        seen = set()
+        errors = []
+        for item in validated_data:
+            key = self.child.unique_attrs(item)
+            errors.append({api_settings.NON_FIELD_ERRORS_KEY: [models.ProgramCourseRunMode.DUPLICATE_ERROR]}
+                          if key in seen else {})
+            seen.add(key)
+
+        if any(errors):
+            raise exceptions.ValidationError(errors)
+        return validated_data
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super(ProgramCourseRunModeListSerializer, self).update(instance, validated_data)
+        except IntegrityError:
+            raise ValidationError(models.ProgramCourseRunMode.DUPLICATE_ERROR)
+
+
 class ProgramCourseRunModeSerializer(serializers.ModelSerializer):
-    """Serializer for the program course run mode model."""
+    """
+    Serializer for the program course run mode model.  Run modes are only
+    written as part of a `ProgramCourseRunModeListSerializer`, which checks
+    their uniqueness.
+    """
 
     class Meta(object):  # pylint: disable=missing-docstring
         model = models.ProgramCourseRunMode
         fields = ('course_key', 'mode_slug', 'sku', 'start_date', 'run_key')
-        list_serializer_class = NestedWriteableSerializer
+        list_serializer_class = ProgramCourseRunModeListSerializer
+
+    def create(self, validated_data):
+        run_mode = models.ProgramCourseRunMode(**validated_data)
+        run_mode.save(check_unique=False)
+        return run_mode
+
+    def update(self, instance, validated_data):
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        instance.save(check_unique=False)
+        return instance
 
     @classmethod
     def unique_attrs(cls, obj):
@@ -116,7 +214,7 @@ class DefaultOrganizationFromContext(object):
         return self.organization
 
 
-class CourseCodeSerializer(serializers.ModelSerializer):
+class CourseCodeSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Serializer for the course code model."""
 
     class Meta(object):  # pylint: disable=missing-docstring
@@ -152,6 +250,16 @@ class ProgramCourseCodeSerializer(serializers.ModelSerializer):
         else:
             return obj['course_code'].organization.key, obj['course_code'].key
 
+    def prepare_creations(self, validated_items):
+        """
+        For use with `NestedWriteableSerializer.update`.  Allocate positions for
+        all new course codes at once, in the order they were requested.
+        """
+        program = self.root.instance  # pylint: disable=no-member
+        positions = models.ProgramCourseCode.allocate_positions(program, len(validated_items))
+        for item, position in zip(validated_items, positions):
+            item['position'] = position
+
     def _get_course_code(self, data):
         """
         Determine the correct CourseCode instance to associate based on
@@ -254,7 +362,32 @@ class ProgramCourseCodeSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ProgramSerializer(serializers.ModelSerializer):
+class ProgramSummarySerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    """
+    Lightweight serializer for catalog-wide listings of programs, omitting their nested relations.
+    Expects programs (or dicts of their values) annotated with `course_code_count`.
+    """
+    course_code_count = serializers.IntegerField(read_only=True)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        model = models.Program
+        fields = (
+            'id', 'uuid', 'name', 'subtitle', 'category', 'status', 'marketing_slug', 'organization_key',
+            'course_code_count',
+        )
+        read_only_fields = fields
+
+
+class CatalogChangeSerializer(serializers.ModelSerializer):
+    """Serializer for entries of the catalog change log."""
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        model = models.CatalogChange
+        fields = ('sequence', 'entity_type', 'entity_id', 'operation', 'created')
+        read_only_fields = fields
+
+
+class ProgramSerializer(SparseFieldsMixin, TimedRepresentationMixin, serializers.ModelSerializer):
     """General-purpose serializer for the Program model."""
 
     class Meta(object):  # pylint: disable=missing-docstring
@@ -272,14 +405,20 @@ class ProgramSerializer(serializers.ModelSerializer):
     def _get_default_banner_images(self):
         """Get default banner image URLs.
 
+        The result is memoized in the serializer context, so that it is only
+        looked up once when serializing many programs.
+
         Returns:
             list of tuples if default banner image has been configured. Empty list otherwise.
         """
-        try:
-            program_default = models.ProgramDefault.objects.get()
-            return program_default.banner_image.resized_urls.items()
-        except models.ProgramDefault.DoesNotExist:
-            return []
+        if '_default_banner_images' not in self.context:
+            try:
+                program_default = models.ProgramDefault.objects.get()
+                url_items = program_default.banner_image.resized_urls.items()
+            except models.ProgramDefault.DoesNotExist:
+                url_items = []
+            self.context['_default_banner_images'] = url_items
+        return self.context['_default_banner_images']
 
     def get_banner_image_urls(self, instance):
         """
@@ -352,3 +491,61 @@ class ProgramSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(error_msg.format(org_key=org_data.get('key')))
 
         return organizations
+
+
+class BulkOrganizationSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    """Serializer for references to organizations, by key, in bulk writes."""
+    key = serializers.CharField(max_length=64)
+
+
+class BulkRunModeSerializer(serializers.ModelSerializer):
+    """Serializer for the run modes of course codes in bulk writes."""
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        model = models.ProgramCourseRunMode
+        fields = ('course_key', 'mode_slug', 'sku', 'start_date')
+        # required to create run modes, but not to refer to existing ones.
+        extra_kwargs = {'start_date': {'required': False}}
+
+    def validate_course_key(self, course_key):
+        """
+        Verify that the course key is a valid course run key.
+        """
+        try:
+            parse_course_run_key(course_key)
+        except InvalidKeyError:
+            raise serializers.ValidationError(_('Invalid course key.'))
+        return course_key
+
+
+class BulkCourseCodeSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    """Serializer for the course codes of programs in bulk writes."""
+    key = serializers.CharField(max_length=64)
+    display_name = serializers.CharField(max_length=128, required=False)
+    organization = BulkOrganizationSerializer()
+    run_modes = BulkRunModeSerializer(many=True, required=False)
+
+
+class BulkProgramSerializer(serializers.ModelSerializer):
+    """
+    Validates, without querying the database, each program of a bulk write
+    (see `programs.apps.programs.bulk`).  Programs identified by their id or
+    uuid are updated, and others are created.
+
+    All fields are optional here; those required to create a program, and
+    everything which depends on existing rows, such as the uniqueness of names,
+    are validated for all programs at once by `bulk.write_programs`.
+    """
+    id = serializers.IntegerField(required=False)
+    uuid = serializers.UUIDField(required=False)
+    organizations = BulkOrganizationSerializer(many=True, required=False)
+    course_codes = BulkCourseCodeSerializer(many=True, required=False)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        model = models.Program
+        fields = ('id', 'uuid', 'name', 'subtitle', 'category', 'status', 'marketing_slug', 'organizations',
+                  'course_codes')
+        extra_kwargs = {
+            'name': {'required': False, 'validators': []},
+            'category': {'required': False},
+        }
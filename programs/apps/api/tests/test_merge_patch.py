@@ -0,0 +1,44 @@
+"""
+Tests for the JSON merge patch implementation.
+"""
+import ddt
+from django.test import TestCase
+
+from programs.apps.api import merge_patch
+
+
+@ddt.ddt
+class MergePatchTests(TestCase):
+    """Tests of the application of merge patches, and of the deltas they make."""
+
+    @ddt.data(
+        # the examples of https://tools.ietf.org/html/rfc7396#appendix-A
+        ({'a': 'b'}, {'a': 'c'}, {'a': 'c'}),
+        ({'a': 'b'}, {'b': 'c'}, {'a': 'b', 'b': 'c'}),
+        ({'a': 'b'}, {'a': None}, {}),
+        ({'a': 'b', 'b': 'c'}, {'a': None}, {'b': 'c'}),
+        ({'a': ['b']}, {'a': 'c'}, {'a': 'c'}),
+        ({'a': 'c'}, {'a': ['b']}, {'a': ['b']}),
+        ({'a': {'b': 'c'}}, {'a': {'b': 'd', 'c': None}}, {'a': {'b': 'd'}}),
+        ({'a': [{'b': 'c'}]}, {'a': [1]}, {'a': [1]}),
+        (['a', 'b'], ['c', 'd'], ['c', 'd']),
+        ({'a': 'b'}, ['c'], ['c']),
+        ({'a': 'foo'}, None, None),
+        ({'a': 'foo'}, 'bar', 'bar'),
+        ({'e': None}, {'a': 1}, {'e': None, 'a': 1}),
+        ([1, 2], {'a': 'b', 'c': None}, {'a': 'b'}),
+        ({}, {'a': {'bb': {'ccc': None}}}, {'a': {'bb': {}}}),
+    )
+    @ddt.unpack
+    def test_apply_patch(self, target, patch, expected):
+        """Verify that patches are applied as the RFC specifies, leaving the target alone."""
+        original = repr(target)
+        self.assertEqual(merge_patch.apply_patch(target, patch), expected)
+        self.assertEqual(repr(target), original)
+
+    def test_get_delta(self):
+        """Verify that only the members whose values change are part of the delta."""
+        current = {'name': 'a', 'subtitle': 'b', 'course_codes': [{'key': 'c'}]}
+        patched = merge_patch.apply_patch(current, {'name': 'a', 'subtitle': None, 'course_codes': [{'key': 'c'}]})
+        self.assertEqual(merge_patch.get_delta(current, patched), {'subtitle': None})
+        self.assertEqual(merge_patch.get_delta(current, current), {})
@@ -0,0 +1,93 @@
+"""
+Tests for the custom JSON renderer.
+"""
+from collections import OrderedDict
+import datetime
+import decimal
+import uuid
+
+import ddt
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import override_settings, RequestFactory, TestCase
+from django.utils.translation import ugettext_lazy
+import mock
+from rest_framework import renderers as drf_renderers
+
+from programs.apps.api import renderers, serializers
+from programs.apps.programs import models
+from programs.apps.programs.benchmarks import build_catalog
+
+
+AVAILABLE_ENCODERS = [name for name, encoder in renderers.ENCODERS.items() if encoder is not None]
+
+
+@ddt.ddt
+class JSONRendererTests(TestCase):
+    """Tests verifying that the renderer renders the same bytes as DRF's, with every available encoder."""
+
+    def assert_same_rendering(self, data, encoder_name, **render_kwargs):
+        """Verify that the renderer, using the named encoder, renders data as DRF's renderer does."""
+        expected = drf_renderers.JSONRenderer().render(data, **render_kwargs)
+        with override_settings(API_JSON_ENCODER=encoder_name):
+            self.assertEqual(renderers.JSONRenderer().render(data, **render_kwargs), expected)
+
+    @ddt.data(*AVAILABLE_ENCODERS)
+    def test_values(self, encoder_name):
+        """Verify the rendering of values of every type, and of strings needing escapes."""
+        data = OrderedDict([
+            ('ascii', 'plain'),
+            ('accented', u'Soci\xe9t\xe9 d\u2019\xe9conomie'),
+            ('separators', u'line\u2028paragraph\u2029'),
+            ('astral', u'\U0001f393 graduate'),
+            ('escaped', u'"quoted" \\u00e9 \\\\u00e9 back\\slash'),
+            ('controls', u'\n\t\x01\x1f\x7f'),
+            ('numbers', [0, -1, 2 ** 64, 1.5, 1e-10]),
+            ('constants', [None, True, False]),
+            ('datetime', datetime.datetime(2016, 1, 2, 3, 4, 5, 678901)),
+            ('date', datetime.date(2016, 1, 2)),
+            ('decimal', decimal.Decimal('1.25')),
+            ('uuid', uuid.UUID('8f7d4f79-3b6e-4a9b-9f43-0d7c9c0e6f6a')),
+            ('lazy', ugettext_lazy('Programs')),
+            ('tuple', (1, 'two')),
+            ('nested', OrderedDict([('z', {'key': []}), ('a', {})])),
+        ])
+        self.assert_same_rendering(data, encoder_name)
+        self.assert_same_rendering([], encoder_name)
+        self.assert_same_rendering(u'\xe9', encoder_name)
+
+    @ddt.data(*AVAILABLE_ENCODERS)
+    def test_catalog(self, encoder_name):
+        """Verify the rendering of a realistic catalog."""
+        self.assert_same_rendering(build_catalog(50), encoder_name)
+
+    @ddt.data(*AVAILABLE_ENCODERS)
+    def test_sample_data(self, encoder_name):
+        """Verify the rendering of the representation of the programs in the sample data fixture."""
+        call_command('loaddata', 'sample_data', verbosity=0)
+
+        context = {'request': RequestFactory().get('/')}
+        programs = models.Program.objects.order_by('id')
+        self.assertTrue(programs.exists())
+        data = serializers.ProgramSerializer(programs, many=True, context=context).data
+        self.assert_same_rendering(data, encoder_name)
+
+    def test_indented(self):
+        """Verify that indented JSON is rendered by DRF's renderer."""
+        with mock.patch.object(renderers, 'get_encoder') as mock_get_encoder:
+            self.assert_same_rendering({'a': [1]}, None, accepted_media_type='application/json; indent=4')
+        self.assertFalse(mock_get_encoder.called)
+
+    def test_none(self):
+        """Verify that no data renders no bytes."""
+        self.assertEqual(renderers.JSONRenderer().render(None), b'')
+
+    @override_settings(API_JSON_ENCODER='unknown')
+    def test_unknown_encoder(self):
+        """Verify that naming an unknown encoder is an error."""
+        with self.assertRaises(ImproperlyConfigured):
+            renderers.get_encoder()
+
+    def test_default_encoder(self):
+        """Verify that the fastest available encoder is used by default."""
+        self.assertEqual(renderers.get_encoder(), renderers.ENCODERS[AVAILABLE_ENCODERS[0]])
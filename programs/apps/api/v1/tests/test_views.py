@@ -2,20 +2,33 @@
 Tests for Programs API views (v1).
 """
 from __future__ import unicode_literals
+from collections import OrderedDict
 import datetime
 import json
+import re
+import uuid
 
 import ddt
+from django.conf import settings
+from django.contrib.auth.models import Group
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test import override_settings, TestCase
+from django.test.utils import CaptureQueriesContext
+import mock
 from mock import ANY
 import pytz
+from rest_framework.test import APIClient
 
+from programs.apps.api.serializers import ProgramCourseRunModeSerializer
 from programs.apps.api.v1.tests.mixins import AuthClientMixin, JwtMixin
 from programs.apps.core.constants import Role
 from programs.apps.core.tests.factories import UserFactory
 from programs.apps.programs.constants import ProgramCategory, ProgramStatus
-from programs.apps.programs.models import CourseCode, Program, ProgramCourseCode, ProgramCourseRunMode
+from programs.apps.programs import changes
+from programs.apps.programs.models import (
+    CatalogChange, CourseCode, Organization, Program, ProgramCourseCode, ProgramCourseRunMode,
+)
 from programs.apps.programs.tests.helpers import make_banner_image_file
 from programs.apps.programs.tests.factories import (
     CourseCodeFactory,
@@ -164,6 +177,432 @@ class ProgramsViewTests(JwtMixin, TestCase):
             self.assertEqual(len(results), 1)
             self.assertEqual(results[0]['organizations'][0]['key'], org_key)
 
+    @ddt.data(True, False)
+    def test_search(self, admin):
+        """
+        Verify that list results can be searched with a 'q' query string argument, and are ordered by relevance.
+        """
+        science = ProgramFactory.create(name='Computer Science', subtitle='An introduction',
+                                        status=ProgramStatus.ACTIVE)
+        computing = ProgramFactory.create(name='Introduction to Computing', status=ProgramStatus.ACTIVE)
+        unpublished = ProgramFactory.create(name='Intro', status=ProgramStatus.UNPUBLISHED)
+        ProgramFactory.create(name='History', status=ProgramStatus.ACTIVE)
+
+        expected = [unpublished.id, computing.id, science.id] if admin else [computing.id, science.id]
+        response = self._make_request(admin=admin, data={'q': 'intro'})
+        self.assertEqual([result['id'] for result in response.data['results']], expected)
+
+        response = self._make_request(admin=admin, data={'q': 'intro comp', 'fields': 'id'})
+        self.assertEqual(response.data['results'], [{'id': computing.id}, {'id': science.id}])
+
+    def test_list_from_documents(self):
+        """
+        Verify that listing is served from stored documents, in a number of
+        queries which does not depend on the number of programs.
+        """
+        def _count_list_queries():
+            """Count the queries made while listing programs."""
+            # authenticate up front, so that user creation is not counted.
+            token = self.generate_id_token(UserFactory(), admin=True)
+            self.client.get(reverse('api:v1:programs-list'), HTTP_AUTHORIZATION='JWT {0}'.format(token))
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(reverse('api:v1:programs-list'), HTTP_AUTHORIZATION='JWT {0}'.format(token))
+            self.assertEqual(response.status_code, 200)
+            return len(context.captured_queries)
+
+        org = OrganizationFactory.create()
+        for __ in range(2):
+            program = ProgramFactory.create()
+            ProgramOrganizationFactory.create(program=program, organization=org)
+            ProgramCourseCodeFactory.create(program=program, course_code=CourseCodeFactory.create(organization=org))
+        initial_count = _count_list_queries()
+
+        for __ in range(3):
+            program = ProgramFactory.create()
+            ProgramOrganizationFactory.create(program=program, organization=org)
+            ProgramCourseCodeFactory.create(program=program, course_code=CourseCodeFactory.create(organization=org))
+        self.assertEqual(_count_list_queries(), initial_count)
+
+        response = self._make_request(admin=True)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(len(response.data['results'][0]['course_codes']), 1)
+
+    def test_list_browsable_api(self):
+        """
+        Verify that the browsable API, which is not served from documents, still works.
+        """
+        ProgramFactory.create()
+        token = self.generate_id_token(UserFactory(), admin=True)
+        response = self.client.get(
+            reverse('api:v1:programs-list'), HTTP_AUTHORIZATION='JWT {0}'.format(token), HTTP_ACCEPT='text/html'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)  # pylint: disable=no-member
+
+    def _get_sparse(self, url, **params):
+        """
+        Request programs with the given sparse fieldset parameters, capturing the queries made.
+        """
+        token = self.generate_id_token(UserFactory(), admin=True)
+        # authenticate up front, so that user creation is not captured.
+        self.client.get(url, HTTP_AUTHORIZATION='JWT {0}'.format(token))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params, HTTP_AUTHORIZATION='JWT {0}'.format(token))
+        return response, ' '.join(query['sql'] for query in context.captured_queries)
+
+    def test_sparse_fields(self):
+        """
+        Verify that `fields` restricts the representation of programs, and skips
+        the queries and storage calls needed by the other fields only.
+        """
+        org = OrganizationFactory.create(key='test-org-key')
+        program = ProgramFactory.create()
+        ProgramOrganizationFactory.create(program=program, organization=org)
+        course_code = CourseCodeFactory.create(key='test-course-key', organization=org)
+        program_course_code = ProgramCourseCodeFactory.create(program=program, course_code=course_code)
+        ProgramCourseRunModeFactory.create(
+            course_key='test-org-key/test-course-key/test-run', program_course_code=program_course_code
+        )
+
+        fields = ('id', 'uuid', 'name', 'status', 'marketing_slug')
+        with mock.patch(
+            'programs.apps.programs.fields.ResizingImageFieldFile.resized_urls', new_callable=mock.PropertyMock
+        ) as resized_urls:
+            response, sql = self._get_sparse(reverse('api:v1:programs-list'), fields=','.join(fields))
+
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.content)['results'][0]
+        self.assertEqual(set(result), set(fields))
+        self.assertEqual(result['name'], program.name)
+        for table in ('programorganization', 'programcoursecode', 'programcourserunmode'):
+            self.assertNotIn(table, sql)
+        self.assertFalse(resized_urls.called)
+
+    def test_sparse_exclude(self):
+        """
+        Verify that `exclude` leaves fields out of the representation of a program.
+        """
+        org = OrganizationFactory.create()
+        program = ProgramFactory.create()
+        ProgramOrganizationFactory.create(program=program, organization=org)
+        ProgramCourseCodeFactory.create(program=program, course_code=CourseCodeFactory.create(organization=org))
+
+        response, sql = self._get_sparse(
+            reverse('api:v1:programs-detail', kwargs={'pk': program.id}), exclude='course_codes,banner_image_urls'
+        )
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.content)
+        self.assertIn('organizations', result)
+        self.assertNotIn('course_codes', result)
+        self.assertNotIn('banner_image_urls', result)
+        self.assertNotIn('programcoursecode', sql)
+
+    def test_sparse_unknown_field(self):
+        """
+        Verify that naming an unknown field is rejected.
+        """
+        response, __ = self._get_sparse(reverse('api:v1:programs-list'), fields='id,bogus')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {'fields': ['Unknown field: bogus']})
+
+    def _get_summary(self, admin=False):
+        """
+        Request the program summaries, verifying that they are computed with a single query.
+        """
+        url = reverse('api:v1:programs-summary')
+        auth = 'JWT {0}'.format(self.generate_id_token(UserFactory(), admin=admin))
+        # authenticate up front, so that user creation is not counted.
+        self.client.get(url, HTTP_AUTHORIZATION=auth)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, 200)
+        # other queries authenticate the user.
+        self.assertEqual(len([query for query in context.captured_queries if 'programs_' in query['sql']]), 1)
+        return response
+
+    def test_summary(self):
+        """
+        Verify that summaries of the visible programs are listed, unpaginated, with a cache header.
+        """
+        org = OrganizationFactory.create(key='test-org-key')
+        programs = {}
+        for status in STATUSES:
+            programs[status] = ProgramFactory.create(status=status)
+            ProgramOrganizationFactory.create(program=programs[status], organization=org)
+        for __ in range(2):
+            ProgramCourseCodeFactory.create(
+                program=programs[ProgramStatus.ACTIVE], course_code=CourseCodeFactory.create(organization=org)
+            )
+
+        response = self._get_summary()
+        self.assertEqual(response['Cache-Control'], 'private, max-age=300')
+        summaries = json.loads(response.content)
+        program = programs[ProgramStatus.ACTIVE]
+        self.assertEqual(summaries[0], {
+            'id': program.id,
+            'uuid': str(program.uuid),
+            'name': program.name,
+            'subtitle': program.subtitle,
+            'category': program.category,
+            'status': ProgramStatus.ACTIVE,
+            'marketing_slug': program.marketing_slug,
+            'organization_key': 'test-org-key',
+            'course_code_count': 2,
+        })
+        self.assertEqual(
+            [(summary['status'], summary['course_code_count']) for summary in summaries[1:]],
+            [(ProgramStatus.RETIRED, 0)]
+        )
+
+        summaries = json.loads(self._get_summary(admin=True).content)
+        self.assertEqual(len(summaries), 3)
+
+    def _get_by_uuid(self, uuids, admin=False, **params):
+        """
+        Request programs by uuid, returning the response and the number of queries it took.
+        """
+        url = reverse('api:v1:programs-by-uuid')
+        auth = 'JWT {0}'.format(self.generate_id_token(UserFactory(), admin=admin))
+        params['uuids'] = ','.join(str(program_uuid) for program_uuid in uuids)
+        # authenticate up front, so that user creation is not counted.
+        self.client.get(url, params, HTTP_AUTHORIZATION=auth)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params, HTTP_AUTHORIZATION=auth)
+        return response, len(context.captured_queries)
+
+    def test_by_uuid(self):
+        """
+        Verify that programs are retrieved by uuid, in a constant number of queries, keyed by
+        uuid in the requested order, with null for programs which aren't visible.
+        """
+        org = OrganizationFactory.create()
+        programs = []
+        for status in (ProgramStatus.ACTIVE, ProgramStatus.UNPUBLISHED, ProgramStatus.ACTIVE, ProgramStatus.ACTIVE):
+            program = ProgramFactory.create(status=status)
+            ProgramOrganizationFactory.create(program=program, organization=org)
+            ProgramCourseCodeFactory.create(program=program, course_code=CourseCodeFactory.create(organization=org))
+            programs.append(program)
+        unknown = uuid.uuid4()
+
+        response, initial_count = self._get_by_uuid([programs[0].uuid, unknown])
+        self.assertEqual(response.status_code, 200)
+        response, count = self._get_by_uuid([program.uuid for program in reversed(programs)] + [unknown])
+        self.assertEqual(count, initial_count)
+
+        results = json.loads(response.content, object_pairs_hook=OrderedDict)
+        self.assertEqual(results.keys(), [str(program.uuid) for program in reversed(programs)] + [str(unknown)])
+        self.assertIsNone(results[str(programs[1].uuid)])
+        self.assertIsNone(results[str(unknown)])
+        self.assertEqual(
+            results[str(programs[0].uuid)],
+            self._make_request(program_id=programs[0].id).data,
+        )
+
+    def test_by_uuid_sparse(self):
+        """
+        Verify that sparse fieldsets apply to programs retrieved by uuid.
+        """
+        programs = [ProgramFactory.create(), ProgramFactory.create()]
+        unknown = uuid.uuid4()
+
+        response, __ = self._get_by_uuid([programs[1].uuid, unknown], admin=True, fields='id,uuid')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {
+            str(programs[1].uuid): {'id': programs[1].id, 'uuid': str(programs[1].uuid)},
+            str(unknown): None,
+        })
+
+    @ddt.data('', 'not-a-uuid', '{},{}'.format(uuid.uuid4(), uuid.uuid4()))
+    @override_settings(PROGRAM_BULK_MAX_UUIDS=1)
+    def test_by_uuid_invalid(self, uuids):
+        """
+        Verify that missing, invalid or too many uuids are rejected.
+        """
+        response, __ = self._get_by_uuid([uuids])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('uuids', json.loads(response.content))
+
+    @ddt.data(True, False)
+    def test_export(self, admin):
+        """
+        Verify that the programs visible to the user are exported one per line, in order of id,
+        exactly as they are retrieved individually.
+        """
+        org = OrganizationFactory.create()
+        programs = []
+        for status in (ProgramStatus.ACTIVE, ProgramStatus.UNPUBLISHED, ProgramStatus.RETIRED):
+            program = ProgramFactory.create(status=status, banner_image=make_banner_image_file('test.jpg'))
+            ProgramOrganizationFactory.create(program=program, organization=org)
+            ProgramCourseCodeFactory.create(program=program, course_code=CourseCodeFactory.create(organization=org))
+            programs.append(program)
+
+        auth = 'JWT {0}'.format(self.generate_id_token(UserFactory(), admin=admin))
+        response = self.client.get(reverse('api:v1:programs-export'), HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)  # pylint: disable=no-member
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = b''.join(response.streaming_content).splitlines()  # pylint: disable=no-member
+        expected_programs = programs if admin else [programs[0], programs[2]]
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [self._make_request(program_id=program.id, admin=admin).data for program in expected_programs],
+        )
+
+    def test_by_course(self):
+        """
+        Verify that the programs including the requested courses are found, keyed by course key.
+        """
+        org = OrganizationFactory.create(key='edX')
+        program = ProgramFactory.create(status=ProgramStatus.ACTIVE)
+        ProgramOrganizationFactory.create(program=program, organization=org)
+        program_course_code = ProgramCourseCodeFactory.create(
+            program=program, course_code=CourseCodeFactory.create(key='DemoX', organization=org)
+        )
+        ProgramCourseRunModeFactory.create(
+            program_course_code=program_course_code, course_key='course-v1:edX+DemoX+Demo_2016'
+        )
+
+        auth = 'JWT {0}'.format(self.generate_id_token(UserFactory()))
+        course_keys = ['course-v1:edX+DemoX+Demo_2016', 'edX+Other', 'edX+DemoX']
+        response = self.client.get(
+            reverse('api:v1:programs-by-course'), {'course_keys': ','.join(course_keys)}, HTTP_AUTHORIZATION=auth
+        )
+        self.assertEqual(response.status_code, 200)
+        expected = [{'id': program.id, 'uuid': str(program.uuid)}]
+        results = json.loads(response.content, object_pairs_hook=OrderedDict)
+        self.assertEqual(results.items(), zip(course_keys, [expected, [], expected]))
+
+    @ddt.data('', 'not-a-course-key', 'edX+DemoX,edX+Other')
+    @override_settings(PROGRAM_BULK_MAX_COURSE_KEYS=1)
+    def test_by_course_invalid(self, course_keys):
+        """
+        Verify that missing, invalid or too many course keys are rejected.
+        """
+        auth = 'JWT {0}'.format(self.generate_id_token(UserFactory()))
+        response = self.client.get(
+            reverse('api:v1:programs-by-course'), {'course_keys': course_keys}, HTTP_AUTHORIZATION=auth
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('course_keys', json.loads(response.content))
+
+    def test_complete(self):
+        """
+        Verify that the programs completed by each learner are found, for any authenticated user,
+        without pinning the user to the primary database.
+        """
+        org = OrganizationFactory.create(key='edX')
+        program = ProgramFactory.create(status=ProgramStatus.ACTIVE)
+        ProgramOrganizationFactory.create(program=program, organization=org)
+        program_course_code = ProgramCourseCodeFactory.create(
+            program=program, course_code=CourseCodeFactory.create(key='DemoX', organization=org)
+        )
+        ProgramCourseRunModeFactory.create(
+            program_course_code=program_course_code, course_key='course-v1:edX+DemoX+Demo_2016'
+        )
+
+        completed_course = {'course_id': 'course-v1:edX+DemoX+Demo_2016', 'mode': 'verified'}
+        response = self._make_request(method='post', complete=True, data={'learners': [
+            {'id': 'learner-1', 'completed_courses': [completed_course]},
+            {'id': 'learner-2', 'completed_courses': [dict(completed_course, mode='audit')]},
+            {'id': 'learner-3', 'completed_courses': []},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content, object_pairs_hook=OrderedDict).items(), [
+            ('learner-1', [{'id': program.id, 'uuid': str(program.uuid)}]),
+            ('learner-2', []),
+            ('learner-3', []),
+        ])
+        self.assertNotIn(settings.READ_REPLICA_PIN_COOKIE_NAME, response.cookies)
+
+    @ddt.data(
+        {},
+        {'learners': 'learner-1'},
+        {'learners': [{'completed_courses': []}]},
+        {'learners': [{'id': {}, 'completed_courses': []}]},
+        {'learners': [{'id': 'learner-1', 'completed_courses': [{'course_id': 'invalid'}]}]},
+        {'learners': [{'id': 'learner-1', 'completed_courses': []}, {'id': 'learner-2', 'completed_courses': []}]},
+    )
+    @override_settings(PROGRAM_COMPLETION_MAX_LEARNERS=1)
+    def test_complete_invalid(self, data):
+        """
+        Verify that malformed requests, or requests for too many learners, are rejected.
+        """
+        response = self._make_request(method='post', complete=True, data=data)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('learners', json.loads(response.content))
+
+    def _post_bulk(self, data, admin=True):
+        """Post the given programs to the bulk write endpoint."""
+        token = self.generate_id_token(UserFactory(), admin=admin)
+        return self.client.post(
+            reverse('api:v1:programs-bulk'), data=json.dumps(data), content_type='application/json',
+            HTTP_AUTHORIZATION='JWT {0}'.format(token),
+        )
+
+    def test_bulk_write(self):
+        """
+        Verify that many programs are created and updated at once, with a result for each.
+        """
+        org = OrganizationFactory.create(key='test-org-key')
+        existing = ProgramFactory.create()
+        ProgramOrganizationFactory.create(program=existing, organization=org)
+
+        new_program = self._build_post_data()
+        new_program['organizations'] = [{'key': org.key}]
+        new_program['course_codes'] = [{
+            'key': 'BulkX',
+            'display_name': 'Bulk Course',
+            'organization': {'key': org.key},
+            'run_modes': [{
+                'course_key': 'course-v1:test-org-key+BulkX+1T2016',
+                'mode_slug': 'verified',
+                'start_date': '2016-01-01T00:00:00Z',
+            }],
+        }]
+        response = self._post_bulk([
+            new_program,
+            {'uuid': str(existing.uuid), 'subtitle': 'updated'},
+            {'id': existing.id + 1000, 'subtitle': 'unknown'},
+            {'name': 'invalid', 'category': 'invalid'},
+        ])
+        self.assertEqual(response.status_code, 200)
+
+        created = Program.objects.get(name=new_program['name'])
+        self.assertEqual(json.loads(response.content), [
+            {'status': 201, 'id': created.id, 'uuid': str(created.uuid)},
+            {'status': 200, 'id': existing.id, 'uuid': str(existing.uuid)},
+            {'status': 400, 'errors': {'id': ['No such program.']}},
+            {'status': 400, 'errors': {'category': ANY}},
+        ])
+        self.assertEqual(Program.objects.get(id=existing.id).subtitle, 'updated')
+        self.assertEqual(
+            ProgramCourseRunMode.objects.get(program_course_code__program=created).course_key,
+            'course-v1:test-org-key+BulkX+1T2016',
+        )
+
+        # the documents of the written programs are rebuilt.
+        response = self._make_request(program_id=created.id, admin=True)
+        self.assertEqual(response.data['course_codes'][0]['key'], 'BulkX')
+
+    @ddt.data(
+        {'name': 'not a list'},
+        [{}, {}],
+    )
+    @override_settings(PROGRAM_BULK_MAX_WRITES=1)
+    def test_bulk_write_invalid(self, data):
+        """
+        Verify that requests which aren't lists of programs, or write too many, are rejected.
+        """
+        self.assertEqual(self._post_bulk(data).status_code, 400)
+
+    def test_bulk_write_non_admin(self):
+        """
+        Verify that only admins may write programs in bulk.
+        """
+        self.assertEqual(self._post_bulk([]).status_code, 200)
+        self.assertEqual(self._post_bulk([], admin=False).status_code, 403)
+
     def test_create(self):
         """
         Ensure the API supports creation of Programs with a valid organization.
@@ -537,6 +976,28 @@ class ProgramsViewTests(JwtMixin, TestCase):
             sorted([pcc.course_code.key for pcc in db_course_codes])
         )
 
+    def test_course_code_positions(self):
+        """
+        Ensure that course codes added by a PATCH are positioned after existing
+        ones, in the order in which they were requested.
+        """
+        org = OrganizationFactory.create(key='test-org-key')
+        program = ProgramFactory.create()
+        ProgramOrganizationFactory.create(program=program, organization=org)
+        existing = CourseCodeFactory.create(key='existing', organization=org)
+        ProgramCourseCodeFactory.create(program=program, course_code=existing)
+
+        keys = ['existing'] + ['test-course-key-{}'.format(n) for n in (3, 1, 2, 0)]
+        patch_data = {
+            'course_codes': [{'key': key, 'organization': {'key': 'test-org-key'}} for key in keys],
+        }
+        response = self._make_request(program_id=program.id, admin=True, method='patch', data=patch_data)
+        self.assertEqual(response.status_code, 200)
+
+        db_course_codes = ProgramCourseCode.objects.filter(program__id=program.id)
+        self.assertEqual(keys, [pcc.course_code.key for pcc in db_course_codes])
+        self.assertEqual(range(1, 6), [pcc.position for pcc in db_course_codes])
+
     def test_create_course_codes(self):
         """
         Ensure that course codes can be created on the fly from request data
@@ -669,6 +1130,236 @@ class ProgramsViewTests(JwtMixin, TestCase):
             sorted([rm.course_key for rm in db_run_modes])
         )
 
+    def _get_writes(self, method='patch', **kwargs):
+        """
+        Make a request, returning its response and the (statement, table) of each
+        write to catalog rows that it made, apart from derived ones.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self._make_request(method=method, **kwargs)
+        return response, self._filter_writes(context.captured_queries)
+
+    @staticmethod
+    def _filter_writes(queries):
+        """Return the (statement, table) of each write to catalog rows among queries, apart from derived ones."""
+        return [
+            match.groups() for match in (
+                re.search(r'(INSERT INTO|UPDATE|DELETE FROM) "(\w+)"', query['sql']) for query in queries
+            )
+            if match and match.group(2).startswith('programs_') and
+            match.group(2) not in ('programs_programdocument', 'programs_catalogchange', 'programs_searchterm')
+        ]
+
+    def test_merge_patch_minimal_writes(self):
+        """
+        Ensure that merge patches only write the fields and nested rows whose values they change.
+        """
+        org = OrganizationFactory.create()
+        program = ProgramFactory.create()
+        ProgramOrganizationFactory.create(program=program, organization=org)
+        program_course_code = ProgramCourseCodeFactory.create(
+            program=program, course_code=CourseCodeFactory.create(organization=org)
+        )
+        for n in range(2):
+            ProgramCourseRunModeFactory.create(
+                program_course_code=program_course_code, course_key='course-v1:org+course+run-{}'.format(n)
+            )
+        representation = self._make_request(program_id=program.id, admin=True).data
+        modified = Program.objects.get(id=program.id).modified
+
+        # sending back the current representation changes nothing, and writes nothing.
+        response, writes = self._get_writes(program_id=program.id, admin=True, data=representation)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(writes, [])
+        self.assertEqual(Program.objects.get(id=program.id).modified, modified)
+
+        # only the changed run mode is updated, along with the program's version.
+        representation['course_codes'][0]['run_modes'][1]['start_date'] = '2015-12-09T21:20:26.491639Z'
+        response, writes = self._get_writes(program_id=program.id, admin=True, data=representation)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(writes, [('UPDATE', 'programs_program'), ('UPDATE', 'programs_programcourserunmode')])
+        self.assertEqual(Program.objects.get(id=program.id).modified, modified)
+
+        # changing the subtitle updates the program alone (its version, then its subtitle).
+        response, writes = self._get_writes(program_id=program.id, admin=True, data={'subtitle': 'changed'})
+        self.assertEqual(response.data['subtitle'], 'changed')
+        self.assertEqual(writes, [('UPDATE', 'programs_program')] * 2)
+
+    def test_merge_patch_prefetch(self):
+        """
+        Ensure that the representation of a merge-patched program is serialized without loading its relations row
+        by row.
+        """
+        org = OrganizationFactory.create()
+        program = ProgramFactory.create()
+        ProgramOrganizationFactory.create(program=program, organization=org)
+        for n in range(3):
+            program_course_code = ProgramCourseCodeFactory.create(
+                program=program, course_code=CourseCodeFactory.create(organization=org)
+            )
+            ProgramCourseRunModeFactory.create(
+                program_course_code=program_course_code, course_key='course-v1:org+course{}+run'.format(n)
+            )
+
+        with CaptureQueriesContext(connection) as context:
+            response = self._make_request(program_id=program.id, admin=True, method='patch', data={'subtitle': 'x'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['course_codes']), 3)
+        # one query to serialize the program before applying the patch, one to rebuild its documents,
+        # and one to serialize it once patched.
+        run_mode_queries = [
+            query for query in context.captured_queries if 'FROM "programs_programcourserunmode"' in query['sql']
+        ]
+        self.assertEqual(len(run_mode_queries), 3)
+
+    def test_serializer_minimal_writes(self):
+        """
+        Ensure that updates made through the serializer don't write unchanged nested rows.
+        """
+        org = OrganizationFactory.create()
+        program = ProgramFactory.create()
+        ProgramOrganizationFactory.create(program=program, organization=org)
+        program_course_code = ProgramCourseCodeFactory.create(
+            program=program, course_code=CourseCodeFactory.create(organization=org)
+        )
+        run_mode = ProgramCourseRunModeFactory.create(
+            program_course_code=program_course_code, course_key='course-v1:org+course+run'
+        )
+        course_codes = self._make_request(program_id=program.id, admin=True).data['course_codes']
+        url = reverse('api:v1:programs-detail', kwargs={'pk': program.id})
+        auth = 'JWT {0}'.format(self.generate_id_token(UserFactory(), admin=True))
+
+        def _patch():
+            """Patch the program's course codes as plain JSON, returning the writes made."""
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.patch(
+                    url, data=json.dumps({'course_codes': course_codes}), content_type='application/json',
+                    HTTP_AUTHORIZATION=auth,
+                )
+            self.assertEqual(response.status_code, 200)
+            return self._filter_writes(context.captured_queries)
+
+        # only the program itself is written, along with its version.
+        self.assertEqual(_patch(), [('UPDATE', 'programs_program')] * 2)
+        self.assertEqual(ProgramCourseRunMode.objects.get(id=run_mode.id).modified, run_mode.modified)
+
+        # a changed run mode is updated.
+        course_codes[0]['run_modes'][0]['start_date'] = '2015-12-09T21:20:26.491639Z'
+        self.assertEqual(_patch(), [('UPDATE', 'programs_program')] * 2 + [('UPDATE', 'programs_programcourserunmode')])
+        self.assertEqual(ProgramCourseRunMode.objects.get(id=run_mode.id).start_date.year, 2015)
+
+    def test_run_mode_uniqueness(self):
+        """
+        Ensure that the uniqueness of nested run modes is checked without a query for each of them.
+        """
+        org = OrganizationFactory.create()
+        program = ProgramFactory.create()
+        ProgramOrganizationFactory.create(program=program, organization=org)
+        program_course_code = ProgramCourseCodeFactory.create(
+            program=program, course_code=CourseCodeFactory.create(organization=org)
+        )
+        ProgramCourseRunModeFactory.create(program_course_code=program_course_code, course_key='course-v1:org+course+0')
+        course_codes = self._make_request(program_id=program.id, admin=True).data['course_codes']
+        url = reverse('api:v1:programs-detail', kwargs={'pk': program.id})
+        auth = 'JWT {0}'.format(self.generate_id_token(UserFactory(), admin=True))
+
+        def _patch():
+            """Patch the program's course codes as plain JSON, returning the response and the queries made."""
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.patch(
+                    url, data=json.dumps({'course_codes': course_codes}), content_type='application/json',
+                    HTTP_AUTHORIZATION=auth,
+                )
+            return response, [query['sql'] for query in context.captured_queries]
+
+        run_modes = course_codes[0]['run_modes']
+        for n in range(1, 4):
+            run_modes.append(dict(run_modes[0], course_key='course-v1:org+course+{}'.format(n)))
+        response, queries = _patch()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ProgramCourseRunMode.objects.filter(program_course_code=program_course_code).count(), 4)
+        uniqueness_checks = [sql for sql in queries if re.search(r'SELECT \(1\) AS "a" FROM "\w+courserunmode"', sql)]
+        self.assertEqual(uniqueness_checks, [])
+
+        # duplicates within the request are reported.
+        run_modes.append(run_modes[2])
+        response, __ = _patch()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['course_codes'][0]['run_modes'][4], {
+            'non_field_errors': ['Duplicate course run modes are not allowed for course codes in a program.'],
+        })
+
+        # duplicates written concurrently, after the existing run modes were read, are caught by the constraint.
+        run_modes.pop()
+        unique_attrs = ProgramCourseRunModeSerializer.unique_attrs
+        with mock.patch.object(
+            ProgramCourseRunModeSerializer, 'unique_attrs',
+            side_effect=lambda obj: ('unread', ) if isinstance(obj, ProgramCourseRunMode) else unique_attrs(obj),
+        ):
+            response, __ = _patch()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ProgramCourseRunMode.objects.filter(program_course_code=program_course_code).count(), 4)
+
+    def test_merge_patch_invalid(self):
+        """
+        Ensure that merge patches which aren't objects, or make invalid changes, are rejected.
+        """
+        program = ProgramFactory.create()
+        response = self._make_request(program_id=program.id, admin=True, method='patch', data=['name'])
+        self.assertEqual(response.status_code, 400)
+
+        response = self._make_request(program_id=program.id, admin=True, method='patch', data={'name': None})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.data)
+
+    @ddt.data('application/merge-patch+json', 'application/json')
+    def test_if_match(self, content_type):
+        """
+        Ensure that updates listing the program's current ETag in If-Match succeed,
+        and that those listing stale ones fail without changing anything.
+        """
+        program = ProgramFactory.create()
+        url = reverse('api:v1:programs-detail', kwargs={'pk': program.id})
+        auth = 'JWT {0}'.format(self.generate_id_token(UserFactory(), admin=True))
+
+        def _patch(subtitle, if_match):
+            """Patch the program's subtitle, if it matches the given tags."""
+            return self.client.patch(
+                url, data=json.dumps({'subtitle': subtitle}), content_type=content_type,
+                HTTP_AUTHORIZATION=auth, HTTP_IF_MATCH=if_match,
+            )
+
+        etag = self.client.get(url, HTTP_AUTHORIZATION=auth)['ETag']
+        self.assertEqual(etag, '"1"')
+
+        # the suffix of the tags of compressed responses is tolerated.
+        response = _patch('first', '"0", "1;gzip"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"2"')
+
+        # a concurrent writer, which read the same version, fails.
+        response = _patch('second', etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Program.objects.get(id=program.id).subtitle, 'first')
+
+        self.assertEqual(_patch('third', '*').status_code, 200)
+        self.assertEqual(Program.objects.get(id=program.id).version, 3)
+
+    def test_if_match_conditional_update(self):
+        """
+        Ensure that the version is checked again when it is incremented, in case it changed since it was read.
+        """
+        program = ProgramFactory.create()
+        auth = 'JWT {0}'.format(self.generate_id_token(UserFactory(), admin=True))
+
+        with mock.patch.object(Program, 'bump_version', return_value=False):
+            response = self.client.patch(
+                reverse('api:v1:programs-detail', kwargs={'pk': program.id}), data=json.dumps({'subtitle': 'lost'}),
+                content_type='application/merge-patch+json', HTTP_AUTHORIZATION=auth, HTTP_IF_MATCH='"1"',
+            )
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Program.objects.get(id=program.id).subtitle, program.subtitle)
+
     def test_create_course_code_with_run_modes(self):
         """
         Ensure that nested program course codes and run modes can be correctly
@@ -907,6 +1598,22 @@ class OrganizationViewTests(AuthClientMixin, TestCase):
         response = client.post(reverse("api:v1:organizations-list"), data)
         self.assertEqual(response.status_code, 403)
 
+    def test_create_after_leaving_admins(self):
+        """
+        Ensure that users removed from the ADMINS group can no longer create organizations.
+        """
+        user = UserFactory.create()
+        admins = Group.objects.get(name=Role.ADMINS)  # pylint: disable=no-member
+        user.groups.add(admins)
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(reverse("api:v1:organizations-list"), {'key': 'edX', 'display_name': 'edX'})
+        self.assertEqual(response.status_code, 201)
+
+        user.groups.remove(admins)
+        response = client.post(reverse("api:v1:organizations-list"), {'key': 'MITx', 'display_name': 'MIT'})
+        self.assertEqual(response.status_code, 403)
+
     def test_list(self):
         """
         Ensure the API supports listing of Organizations by admins.
@@ -918,6 +1625,17 @@ class OrganizationViewTests(AuthClientMixin, TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data['results']), 3)  # pylint: disable=no-member
 
+    def test_search(self):
+        """
+        Ensure that organizations can be searched by display name and key.
+        """
+        OrganizationFactory.create(key='edX', display_name='edX')
+        OrganizationFactory.create(key='MITx', display_name='Massachusetts Institute of Technology')
+        client = self.get_authenticated_client(Role.ADMINS)
+        for query, keys in (('mass tech', ['MITx']), ('ed', ['edX']), ('x', [])):
+            response = client.get(reverse('api:v1:organizations-list'), {'q': query})
+            self.assertEqual([result['key'] for result in response.data['results']], keys)  # pylint: disable=no-member
+
     def test_list_unauthorized(self):
         """
         Ensure the API prevents unauthorized users from listing organizations.
@@ -946,6 +1664,22 @@ class CourseCodesViewTests(AuthClientMixin, TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data['results']), 3)  # pylint: disable=no-member
 
+    def test_search(self):
+        """
+        Ensure that course codes can be searched by display name and key, along with other filters.
+        """
+        org = OrganizationFactory.create(key='org1')
+        CourseCodeFactory.create(organization=org, key='CS50x', display_name='Introduction to Computer Science')
+        CourseCodeFactory.create(organization=org, key='DemoX', display_name='Demonstration Course')
+        CourseCodeFactory.create(organization=OrganizationFactory.create(key='org2'), key='DemoX',
+                                 display_name='Demo')
+        client = self.get_authenticated_client(Role.ADMINS)
+        response = client.get(reverse('api:v1:course_codes-list'), {'q': 'demo', 'organization': 'org1'})
+        self.assertEqual([result['display_name'] for result in response.data['results']],  # pylint: disable=no-member
+                         ['Demonstration Course'])
+        response = client.get(reverse('api:v1:course_codes-list'), {'q': 'cs50x'})
+        self.assertEqual([result['key'] for result in response.data['results']], ['CS50x'])  # pylint: disable=no-member
+
     def test_list_unauthorized(self):
         """
         Ensure the API prevents unauthorized users from listing organizations.
@@ -969,3 +1703,120 @@ class CourseCodesViewTests(AuthClientMixin, TestCase):
             results = response.data['results']  # pylint: disable=no-member
             self.assertEqual(len(results), 1)
             self.assertEqual(results[0]['organization']['key'], org_key)
+
+
+@ddt.ddt
+class ChangesViewTests(AuthClientMixin, TestCase):
+    """
+    Tests for the catalog change feed.
+    """
+
+    def _get_changes(self, since):
+        """Request the changes since the given sequence number."""
+        client = self.get_authenticated_client(Role.LEARNERS)
+        return client.get(reverse('api:v1:changes-list'), {'since': since})
+
+    @override_settings(CHANGE_FEED_PAGE_SIZE=2)
+    def test_list(self):
+        """
+        Verify that changes are returned in order, a page at a time.
+        """
+        programs = ProgramFactory.create_batch(3)
+        program = programs[0]
+        program.subtitle = 'changed'
+        program.save()
+
+        response = self._get_changes(0)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(
+            [(change['entity_type'], change['entity_id'], change['operation']) for change in data['changes']],
+            [('program', programs[0].id, 'create'), ('program', programs[1].id, 'create')],
+        )
+        self.assertTrue(data['has_more'])
+
+        data = json.loads(self._get_changes(data['next_since']).content)
+        self.assertEqual(
+            [(change['entity_id'], change['operation']) for change in data['changes']],
+            [(programs[2].id, 'create'), (program.id, 'update')],
+        )
+        self.assertFalse(data['has_more'])
+
+        data = json.loads(self._get_changes(data['next_since']).content)
+        self.assertEqual(data['changes'], [])
+        self.assertFalse(data['has_more'])
+
+    @ddt.data('', 'abc', '-1')
+    def test_invalid_since(self, since):
+        """
+        Verify that a valid sequence number is required.
+        """
+        response = self._get_changes(since)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('since', json.loads(response.content))
+
+    def test_compacted(self):
+        """
+        Verify that clients which may have missed removed changes are told where to resume after a full fetch.
+        """
+        ProgramFactory.create().delete()
+        CatalogChange.objects.update(created=datetime.datetime(2016, 1, 1, tzinfo=pytz.UTC))
+        program = ProgramFactory.create()
+        changes.compact()
+
+        response = self._get_changes(0)
+        self.assertEqual(response.status_code, 410)
+        resume_since = json.loads(response.content)['resume_since']
+        self.assertEqual(resume_since, CatalogChange.objects.get(entity_id=program.id).sequence)
+
+        self.assertEqual(self._get_changes(changes.get_horizon()).status_code, 200)
+
+
+@override_settings(READ_REPLICA_ALIASES=('replica',), READ_REPLICA_LAG_CHECK_INTERVAL=0)
+class ReadReplicaViewTests(AuthClientMixin, TestCase):
+    """
+    Tests for serving GET requests from a read replica.  The test replica is
+    a separate database which is not actually replicated, so rows only
+    created on the primary reveal which database a request read from.
+    """
+    multi_db = True
+
+    def _list_organization_keys(self, client):
+        """
+        DRY helper.
+        """
+        response = client.get(reverse("api:v1:organizations-list"))
+        self.assertEqual(response.status_code, 200)
+        return [org['key'] for org in response.data['results']]  # pylint: disable=no-member
+
+    def test_reads_from_replica(self):
+        """
+        Ensure that GET requests read from the replica.
+        """
+        OrganizationFactory.create(key='primary-org')
+        Organization.objects.using('replica').create(key='replica-org')
+        client = self.get_authenticated_client(Role.ADMINS)
+        self.assertEqual(self._list_organization_keys(client), ['replica-org'])
+
+    def test_read_your_writes(self):
+        """
+        Ensure that clients read from the primary for a while after they write.
+        """
+        client = self.get_authenticated_client(Role.ADMINS)
+        response = client.post(reverse("api:v1:organizations-list"), {'key': 'new-org', 'display_name': 'New Org'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._list_organization_keys(client), ['new-org'])
+
+        # once the pin expires, reads go back to the replica.
+        with override_settings(READ_REPLICA_PIN_SECONDS=-1):
+            client.post(reverse("api:v1:organizations-list"), {'key': 'other-org', 'display_name': 'Other Org'})
+        self.assertEqual(self._list_organization_keys(client), [])
+
+    def test_lagging_replica(self):
+        """
+        Ensure that GET requests read from the primary when the replica lags too far behind.
+        """
+        OrganizationFactory.create(key='primary-org')
+        client = self.get_authenticated_client(Role.ADMINS)
+        with mock.patch('programs.apps.core.db_routers.get_replica_lag', return_value=3600):
+            self.assertEqual(self._list_organization_keys(client), ['primary-org'])
@@ -9,6 +9,7 @@ router = DefaultRouter()
 router.register(r'programs', views.ProgramsViewSet, base_name='programs')
 router.register(r'course_codes', views.CourseCodesViewSet, base_name='course_codes')
 router.register(r'organizations', views.OrganizationsViewSet, base_name='organizations')
+router.register(r'changes', views.ChangesViewSet, base_name='changes')
 
 urlpatterns = [
     url(r'^', include(router.urls)),
@@ -1,28 +1,65 @@
 """
 Programs API views (v1).
 """
+from collections import OrderedDict
+import json
+import uuid
+
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Prefetch
+from django.db.models import Count
 from django.db.models.functions import Lower
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
+from django.utils.translation import ugettext as _
+from opaque_keys import InvalidKeyError
 from rest_framework import (
     mixins,
     parsers as drf_parsers,
+    permissions as drf_permissions,
+    renderers as drf_renderers,
+    status,
     viewsets,
 )
+from rest_framework.decorators import list_route
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 
-from programs.apps.programs import models
+from programs.apps.programs import bulk, changes, completion, course_index, documents, models
 from programs.apps.api import (
+    exceptions as edx_exceptions,
     filters,
+    merge_patch,
+    mixins as edx_mixins,
     parsers as edx_parsers,
     permissions as edx_permissions,
     serializers,
 )
 
 
+class ProgramDocumentResponse(HttpResponse):
+    """
+    JSON response assembled from stored program documents.  Like DRF responses,
+    it carries the `renderer_context` of the view which built it.
+    """
+    renderer_context = None
+
+    def __init__(self, content, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super(ProgramDocumentResponse, self).__init__(content, **kwargs)
+
+    @property
+    def data(self):
+        """
+        The parsed response content, for parity with DRF responses (e.g. in tests).
+        """
+        return json.loads(self.content)
+
+
 class ProgramsViewSet(
-        mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.UpdateModelMixin,
-        viewsets.GenericViewSet):
+        edx_mixins.ReadReplicaMixin, edx_mixins.SparseFieldsetMixin, mixins.CreateModelMixin,
+        mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet):
     """
 
     **Use Cases**
@@ -37,6 +74,68 @@ class ProgramsViewSet(
         If the request is successful, the HTTP status will be 200 and the response body will
         contain a JSON-formatted array of programs.
 
+        # Search programs by name and subtitle.
+        GET /api/v1/programs/?q=intro%20comp
+
+        Programs having every word of the query, whole or as a prefix of one of theirs, are
+        returned, the most relevant first.  At most SEARCH_MAX_RESULTS programs are found.
+
+        # Return only some fields of each program.
+        GET /api/v1/programs/?fields=id,uuid,name,status,marketing_slug
+        GET /api/v1/programs/?exclude=course_codes,banner_image_urls
+
+        Both parameters take comma-separated field names, and also apply to single programs.
+        Naming an unknown field results in status 400.
+
+        # Return a summary of every program, e.g. for navigation menus.
+        GET /api/v1/programs/summary/
+
+        The response body is an unpaginated JSON array of program summaries: id, uuid, name,
+        subtitle, category, status, marketing_slug, organization_key and course_code_count.
+        The same filters as the list apply.  Clients may cache the response for
+        PROGRAM_SUMMARY_MAX_AGE seconds.
+
+        # Return several programs at once, given their (comma-separated) uuids.
+        GET /api/v1/programs/by_uuid/?uuids={uuid},{uuid}
+
+        The response body is a JSON object mapping each uuid, in its canonical form, to the
+        program's representation, or to null if no such program is visible to the user.
+        At most PROGRAM_BULK_MAX_UUIDS uuids may be requested at once; sparse fieldset
+        parameters also apply.
+
+        # Export every program, one per line (NDJSON), e.g. to index the whole catalog.
+        GET /api/v1/programs/export/
+
+        The response body is streamed, with each program's representation on its own line,
+        in order of id.  All programs are read from one consistent snapshot of the catalog,
+        and the same filters as the list apply.  Unlike the list, the export is not paginated.
+
+        # Find the programs which include some courses.
+        GET /api/v1/programs/by_course/?course_keys={course_key},{course_key}
+
+        Each course key may be a course run key (e.g. course-v1:edX+DemoX+Demo_2016, which
+        must be URL-encoded), matching programs offering that run, or a course key (e.g.
+        edX+DemoX), matching programs including that course.  The response body is a JSON
+        object mapping each course key to a list of the matching programs' ids and uuids.
+        At most PROGRAM_BULK_MAX_COURSE_KEYS course keys may be requested at once.
+
+        # Find the programs completed by some learners.
+        POST /api/v1/programs/complete/
+        {
+            "learners": [
+                {
+                    "id": "learner-1",
+                    "completed_courses": [{"course_id": "course-v1:edX+DemoX+Demo_2016", "mode": "verified"}]
+                }
+            ]
+        }
+
+        A learner completes an active or retired program by completing one run of each of its
+        course codes, in one of the modes the program offers for that run; "mode" may be omitted
+        to accept any.  The response body is a JSON object mapping each learner id to a list of
+        the completed programs' ids and uuids.  Any authenticated user may evaluate completion,
+        for at most PROGRAM_COMPLETION_MAX_LEARNERS learners at once.
+
         # Create a new program.
         POST /api/v1/programs/
 
@@ -46,12 +145,37 @@ class ProgramsViewSet(
         Only users with global administrative rights may create programs. POST requests from non-
         admins will result in status 403.
 
+        # Create and update many programs at once.
+        POST /api/v1/programs/bulk/
+        [
+            {"name": "New Program", "category": "xseries", "organizations": [{"key": "edX"}]},
+            {"id": 1, "status": "active", "course_codes": [...]}
+        ]
+
+        The request body is a JSON array of programs, represented as for the requests below.
+        Programs with an "id" or "uuid" are updated, and others are created.  The valid programs
+        are written in a single transaction, and the response body is a JSON array holding, for
+        each requested program, its "status" (201 when it was created, 200 when it was updated,
+        or 400) and either its "id" and "uuid", or its "errors".  At most PROGRAM_BULK_MAX_WRITES
+        programs may be written at once, and only by users with global administrative rights.
+
         # Update existing Program.
         PATCH /api/v1/programs/{program_id}
 
         If the request is successful, the HTTP status will be 200 and the response body will
         contain a JSON-formatted representation of the newly-updated program.
 
+        When the request body is a JSON merge patch (Content-Type: application/merge-patch+json),
+        it is applied to the program's current representation, and only the fields and nested rows
+        whose values it changes are validated and written.  As with other merge patches, a list of
+        course codes replaces the program's course codes, and those of its items which are
+        unchanged are left alone.
+
+        Responses representing a single program carry its version as their ETag.  When an update
+        lists ETags in its If-Match header, the program is only updated if it is still at one of
+        those versions, and otherwise the HTTP status will be 412, so that concurrent updates
+        don't silently overwrite each other.
+
         Only users with global administrative rights may update programs. PATCH requests from non-
         admins will result in status 403.
 
@@ -67,15 +191,31 @@ class ProgramsViewSet(
         * created: The date/time this Program was created.
         * modified: The date/time this Program was last modified.
 
+    **Notes**
+
+        JSON responses to GET requests are assembled from pre-rendered program
+        documents (see `programs.apps.programs.documents`), rather than by
+        serializing programs on each request.
+
+        GET requests are served from a read replica, when one is configured
+        (see `programs.apps.api.mixins.ReadReplicaMixin`).
+
+        GET requests selecting fields are served by serializing only those
+        fields, loading only the related objects they need.
+
     """
     permission_classes = (edx_permissions.IsAdminGroupOrReadOnly, )
+    read_only_actions = ('complete', )
     filter_backends = (
         filters.ProgramStatusRoleFilterBackend,
         filters.ProgramStatusQueryFilterBackend,
         filters.ProgramOrgKeyFilterBackend,
+        filters.SearchFilterBackend,
     )
     serializer_class = serializers.ProgramSerializer
     parser_classes = (edx_parsers.MergePatchParser, drf_parsers.JSONParser)
+    # Fields of the representation which merge patches may change.
+    patchable_fields = ('name', 'subtitle', 'category', 'status', 'marketing_slug', 'organizations', 'course_codes')
 
     @method_decorator(transaction.non_atomic_requests)
     def dispatch(self, request, *args, **kwargs):
@@ -89,23 +229,373 @@ class ProgramsViewSet(
         # by the Django ORM. As a result, updates to prefetched related objects are not
         # reflected in responses.
         # See: https://github.com/tomchristie/django-rest-framework/issues/2442.
-        if self.request.method != 'GET':
+        # Merge patches don't write through the serializer, and load the program again once written.
+        # Responses assembled from documents don't need related objects at all.
+        if (self.request.method != 'GET' and not self.is_merge_patch()) or self.serves_documents():
             return queryset
 
-        return queryset.prefetch_related(
-            Prefetch(
-                'programorganization_set',
-                queryset=models.ProgramOrganization.objects.select_related('organization')
-            ),
-            Prefetch(
-                'programcoursecode_set',
-                queryset=models.ProgramCourseCode.objects.select_related()
-            ),
-            'programcoursecode_set__run_modes',
+        return documents.prefetch_program_relations(queryset, self.get_requested_fields())
+
+    def is_merge_patch(self):
+        """Whether the request is a partial update applying a JSON merge patch."""
+        return self.request.method == 'PATCH' and self.request.content_type.startswith(  # pylint: disable=no-member
+            edx_parsers.MergePatchParser.media_type
         )
 
+    def serves_documents(self):
+        """
+        Whether the response can be assembled from stored program documents,
+        which is the case for GET requests rendered as JSON, and returning all fields.
+        """
+        return (
+            self.request.method == 'GET' and
+            isinstance(getattr(self.request, 'accepted_renderer', None), drf_renderers.JSONRenderer) and
+            self.get_requested_fields() is None
+        )
+
+    def list(self, request, *args, **kwargs):  # pylint: disable=missing-docstring
+        if not self.serves_documents():
+            return super(ProgramsViewSet, self).list(request, *args, **kwargs)
+
+        program_ids = self.filter_queryset(self.get_queryset()).values_list('id', flat=True)
+        page = self.paginate_queryset(program_ids)
+        if page is None:
+            return self._get_document_response(b'[' + self._join_documents(program_ids) + b']')
+
+        metadata = request.accepted_renderer.render(self.paginator.get_pagination_metadata())
+        content = metadata[:-1] + b',"results":[' + self._join_documents(page) + b']}'
+        return self._get_document_response(content)
+
+    def retrieve(self, request, *args, **kwargs):  # pylint: disable=missing-docstring,unused-argument
+        program = self.get_object()
+        if not self.serves_documents():
+            return self._set_etag(Response(self.get_serializer(program).data), program)
+
+        return self._set_etag(self._get_document_response(self._join_documents([program.id])), program)
+
+    @list_route()
+    def summary(self, request):  # pylint: disable=unused-argument
+        """
+        List summaries of all programs visible to the user, computed with a single query.
+        """
+        fields = [name for name in serializers.ProgramSummarySerializer.Meta.fields if name != 'course_code_count']
+        # plain values are enough, and cheaper than model instances.
+        programs = self.filter_queryset(models.Program.objects.all()).values(*fields).annotate(
+            course_code_count=Count('programcoursecode')
+        )
+        response = Response(serializers.ProgramSummarySerializer(programs, many=True).data)
+        # responses vary with the visibility of programs to the user.
+        patch_cache_control(response, private=True, max_age=settings.PROGRAM_SUMMARY_MAX_AGE)
+        return response
+
+    @list_route(url_path='by_uuid')
+    def by_uuid(self, request):
+        """
+        Retrieve the programs with the requested uuids, in a constant number of queries.
+        """
+        uuids = self._get_requested_values(
+            'uuids', lambda value: unicode(uuid.UUID(value)), settings.PROGRAM_BULK_MAX_UUIDS
+        )
+        queryset = self.filter_queryset(self.get_queryset()).filter(uuid__in=uuids)
+
+        if self.serves_documents():
+            program_ids = {unicode(program_uuid): program_id for program_uuid, program_id in
+                           queryset.values_list('uuid', 'id')}
+            program_documents = documents.get_documents(program_ids.values(), filters.get_request_role(request))
+            members = []
+            for program_uuid in uuids:
+                document = program_documents.get(program_ids.get(program_uuid))
+                members.append(json.dumps(program_uuid) + b':' + (document.encode('utf-8') if document else b'null'))
+            return self._get_document_response(b'{' + b','.join(members) + b'}')
+
+        programs = list(queryset)
+        serialized = self.get_serializer(programs, many=True).data
+        found = dict(zip((unicode(program.uuid) for program in programs), serialized))
+        return Response(OrderedDict((program_uuid, found.get(program_uuid)) for program_uuid in uuids))
+
+    @list_route()
+    def export(self, request):
+        """
+        Stream the documents of all programs visible to the user as NDJSON, with constant memory use.
+        """
+        program_documents = documents.export_documents(
+            self.filter_queryset(models.Program.objects.all()), filters.get_request_role(request)
+        )
+        absolute_uri = self._get_absolute_uri()
+        lines = (self._make_absolute(document.encode('utf-8'), absolute_uri) + b'\n' for document in program_documents)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+    @list_route(url_path='by_course')
+    def by_course(self, request):
+        """
+        Find the programs including the requested courses, in a constant number of queries.
+        """
+        course_keys = self._get_requested_values(
+            'course_keys', self._check_course_key, settings.PROGRAM_BULK_MAX_COURSE_KEYS
+        )
+        found = course_index.find_programs(course_keys, filters.get_request_role(request))
+        return Response(OrderedDict(
+            (course_key, [{'id': program_id, 'uuid': program_uuid} for program_id, program_uuid in found[course_key]])
+            for course_key in course_keys
+        ))
+
+    @list_route(methods=['post'], permission_classes=[drf_permissions.IsAuthenticated])
+    def complete(self, request):
+        """
+        Evaluate the programs completed by each of the given learners, against the completion index.
+        """
+        index = completion.get_index()
+        return Response(OrderedDict(
+            (learner_id, [
+                {'id': program_id, 'uuid': program_uuid}
+                for program_id, program_uuid in index.get_completed_programs(completed_runs)
+            ])
+            for learner_id, completed_runs in self._get_completed_runs(request.data)
+        ))
+
+    @list_route(methods=['post'], url_path='bulk')
+    def bulk_write(self, request):
+        """
+        Create and update many programs, validated set-wise and written in a single transaction.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError([_('A list of programs is required.')])
+        if len(items) > settings.PROGRAM_BULK_MAX_WRITES:
+            error_msg = _('At most {count} programs may be written at once.')
+            raise ValidationError([error_msg.format(count=settings.PROGRAM_BULK_MAX_WRITES)])
+
+        results = [None] * len(items)
+        validated = []
+        serializer = serializers.BulkProgramSerializer()
+        for index, item in enumerate(items):
+            try:
+                validated.append((index, serializer.run_validation(item)))
+            except ValidationError as exc:
+                results[index] = {'status': status.HTTP_400_BAD_REQUEST, 'errors': exc.detail}
+
+        written = bulk.write_programs([data for __, data in validated])
+        for (index, __), result in zip(validated, written):
+            if result.errors:
+                results[index] = {'status': status.HTTP_400_BAD_REQUEST, 'errors': result.errors}
+            else:
+                results[index] = OrderedDict([
+                    ('status', status.HTTP_201_CREATED if result.created else status.HTTP_200_OK),
+                    ('id', result.program.id),
+                    ('uuid', unicode(result.program.uuid)),
+                ])
+        return Response(results)
+
+    @staticmethod
+    def _get_completed_runs(data):
+        """
+        Parse the learners and completed courses of a completion request.
+
+        Returns:
+            list of (learner id, completed runs) tuples, where completed runs map the CourseRef of
+            each completed run to the set of modes in which it was completed.
+
+        Raises:
+            ValidationError: if the request is malformed or lists too many learners.
+        """
+        learners = data.get('learners') if isinstance(data, dict) else None
+        if not isinstance(learners, list):
+            raise ValidationError({'learners': [_('A list of learners is required.')]})
+        if len(learners) > settings.PROGRAM_COMPLETION_MAX_LEARNERS:
+            error_msg = _('At most {count} learners may be evaluated at once.')
+            raise ValidationError({'learners': [error_msg.format(count=settings.PROGRAM_COMPLETION_MAX_LEARNERS)]})
+
+        parsed = []
+        for learner in learners:
+            try:
+                learner_id = learner['id']
+                if not isinstance(learner_id, (basestring, int)):
+                    raise TypeError(learner_id)
+                completed_runs = {}
+                for course in learner['completed_courses']:
+                    modes = completed_runs.setdefault(course_index.parse_course_key(course['course_id']), set())
+                    modes.add(course.get('mode', completion.ANY_MODE))
+            except (KeyError, TypeError, AttributeError, InvalidKeyError):
+                error_msg = _('Each learner must have an id, and a list of completed courses with valid course ids.')
+                raise ValidationError({'learners': [error_msg]})
+            parsed.append((learner_id, completed_runs))
+        return parsed
+
+    def _get_requested_values(self, param, normalize, max_count):
+        """
+        Parse a query parameter listing comma-separated values.
+
+        Arguments:
+            param (str): the name of the query parameter.
+            normalize (callable): returns the canonical form of a value, or raises ValueError or
+                InvalidKeyError if it is invalid.
+            max_count (int): the maximum number of values which may be requested.
+
+        Returns:
+            list of distinct values, in their canonical form, in the order they were requested.
+
+        Raises:
+            ValidationError: if the parameter is missing, lists too many values, or invalid ones.
+        """
+        values = [value.strip() for value in self.request.query_params.get(param, '').split(',') if value.strip()]
+        if not values:
+            raise ValidationError({param: [_('This parameter is required.')]})
+
+        try:
+            values = list(OrderedDict.fromkeys(normalize(value) for value in values))
+        except (ValueError, InvalidKeyError):
+            raise ValidationError({param: [_('Invalid value.')]})
+
+        if len(values) > max_count:
+            error_msg = _('At most {count} values may be requested at once.')
+            raise ValidationError({param: [error_msg.format(count=max_count)]})
+
+        return values
+
+    @staticmethod
+    def _check_course_key(value):
+        """Verify that the value is a course run key or course key."""
+        course_index.parse_course_key(value)
+        return value
+
+    def partial_update(self, request, *args, **kwargs):
+        """
+        Apply a JSON merge patch to a program, writing only what it changes.  Other
+        partial updates write all the given fields, as updates do.
+        """
+        if not self.is_merge_patch():
+            return super(ProgramsViewSet, self).partial_update(request, *args, **kwargs)
+
+        patch = request.data
+        if not isinstance(patch, dict):
+            raise ValidationError([_('A merge patch must be a JSON object.')])
+
+        program = self.get_object()
+        self._check_version(program)
+        current = serializers.ProgramSerializer(
+            program, fields=self.patchable_fields, context=self.get_serializer_context()
+        ).data
+        # other (read-only) fields are ignored, as serializers ignore them.
+        patch = {name: value for name, value in patch.items() if name in self.patchable_fields}
+        delta = merge_patch.get_delta(current, merge_patch.apply_patch(current, patch))
+        if delta:
+            delta['id'] = program.id
+            validated = serializers.BulkProgramSerializer().run_validation(delta)
+            with documents.deferred_rebuild(), transaction.atomic():
+                self._bump_version(program)
+                result = bulk.write_programs([validated], bump_versions=False)[0]
+                if result.errors:
+                    raise ValidationError(result.errors)
+            # not `get_object`, which may no longer find a program whose status changed.
+            program = self.get_queryset().get(pk=program.id)
+
+        return self._set_etag(Response(self.get_serializer(program).data), program)
+
+    def update(self, request, *args, **kwargs):  # pylint: disable=unused-argument
+        """
+        Update a program, provided that it is still at a version listed by the If-Match header, if any.
+        """
+        partial = kwargs.pop('partial', False)
+        program = self.get_object()
+        self._check_version(program)
+        serializer = self.get_serializer(program, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return self._set_etag(Response(serializer.data), program)
+
+    def perform_create(self, serializer):
+        """Rebuild the new program's documents once, after all nested writes."""
+        with documents.deferred_rebuild():
+            super(ProgramsViewSet, self).perform_create(serializer)
+
+    def perform_update(self, serializer):
+        """
+        Rebuild the program's documents once, after all nested writes, which are made
+        in the same transaction as the increment of its version.
+        """
+        with documents.deferred_rebuild(), transaction.atomic():
+            self._bump_version(serializer.instance)
+            super(ProgramsViewSet, self).perform_update(serializer)
+
+    def _get_expected_versions(self):
+        """
+        Parse the If-Match header of the request.
+
+        Returns:
+            set of the program versions it lists, or None if any version is acceptable.
+        """
+        header = self.request.META.get('HTTP_IF_MATCH', '').strip()
+        if not header or header == '*':
+            return None
+
+        versions = set()
+        for tag in header.split(','):
+            # the compression middleware appends the coding of compressed responses to their tags.
+            tag = tag.strip().strip('"').split(';')[0]
+            if tag.isdigit():
+                versions.add(int(tag))
+        return versions
+
+    def _check_version(self, program):
+        """
+        Fail fast, before validating anything, if the program is not at a version listed by the If-Match header.
+        """
+        versions = self._get_expected_versions()
+        if versions is not None and program.version not in versions:
+            raise edx_exceptions.PreconditionFailed()
+
+    def _bump_version(self, program):
+        """
+        Increment the program's version, provided that it is still one listed by the If-Match header.
+        """
+        if not models.Program.bump_version(program, self._get_expected_versions()):
+            raise edx_exceptions.PreconditionFailed()
+        # rebuilding the program's documents must not increment its version again.
+        documents.skip_version_bumps([program.id])
+
+    @staticmethod
+    def _set_etag(response, program):
+        """Tag a response representing the program with its version."""
+        response['ETag'] = '"{}"'.format(program.version)
+        return response
+
+    def _join_documents(self, program_ids):
+        """
+        Concatenate the stored documents of the given programs, in order, separated by commas.
+        """
+        program_ids = list(program_ids)
+        program_documents = documents.get_documents(program_ids, filters.get_request_role(self.request))
+        return b','.join(
+            program_documents[program_id].encode('utf-8')
+            for program_id in program_ids
+            if program_id in program_documents
+        )
 
-class CourseCodesViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    def _get_absolute_uri(self):
+        """
+        Return the scheme and host of the requesting URL, which replace the placeholder of stored documents.
+        """
+        return self.request.build_absolute_uri('/')[:-1].encode('utf-8')
+
+    @staticmethod
+    def _make_absolute(content, absolute_uri):
+        """
+        Make the URLs of stored documents absolute, by replacing their placeholder with `absolute_uri`.
+        """
+        placeholder = documents.ABSOLUTE_URI_PLACEHOLDER.encode('utf-8')
+        return content.replace(b'"' + placeholder, b'"' + absolute_uri)
+
+    def _get_document_response(self, content):
+        """
+        Build a response from concatenated documents, making their URLs absolute.
+        """
+        content = self._make_absolute(content, self._get_absolute_uri())
+        response = ProgramDocumentResponse(content)
+        response.renderer_context = self.get_renderer_context()
+        return response
+
+
+class CourseCodesViewSet(edx_mixins.ReadReplicaMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     """
 
     **Use Cases**
@@ -121,6 +611,9 @@ class CourseCodesViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
         If the request is successful, the HTTP status will be 200 and the response body will
         contain a JSON-formatted array of course codes.
 
+        # Search course codes by display name and key, as programs are searched.
+        GET /api/v1/course_codes/?q=demo
+
     **Response Values**
 
         * key: the prefix from the edX CourseKey, consisting of the "org" and "course" parts.
@@ -132,7 +625,7 @@ class CourseCodesViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     """
     permission_classes = (edx_permissions.IsAdminGroup, )
     serializer_class = serializers.CourseCodeSerializer
-    filter_backends = (filters.CourseCodeOrgKeyFilterBackend, )
+    filter_backends = (filters.CourseCodeOrgKeyFilterBackend, filters.SearchFilterBackend)
 
     def get_queryset(self):
         """Perform eager loading of data to prevent a cascade of performance-degrading queries."""
@@ -141,7 +634,8 @@ class CourseCodesViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
         return queryset.select_related('organization')
 
 
-class OrganizationsViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+class OrganizationsViewSet(
+        edx_mixins.ReadReplicaMixin, mixins.CreateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     """
 
     **Use Cases**
@@ -157,6 +651,9 @@ class OrganizationsViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, views
         If the request is successful, the HTTP status will be 200 and the response body will
         contain a JSON-formatted array of organizations.
 
+        # Search organizations by display name and key, as programs are searched.
+        GET /api/v1/organizations/?q=edx
+
     **Response Values**
 
         * key: the prefix from the edX CourseKey, consisting of the "org" part.
@@ -166,3 +663,80 @@ class OrganizationsViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, views
     permission_classes = (edx_permissions.IsAdminGroup, )
     queryset = models.Organization.objects.all().order_by(Lower('key'))
     serializer_class = serializers.OrganizationSerializer
+    filter_backends = (filters.SearchFilterBackend, )
+
+
+class ChangesViewSet(edx_mixins.ReadReplicaMixin, viewsets.GenericViewSet):
+    """
+
+    **Use Cases**
+
+        Replicate the catalog incrementally, by applying the changes made to it since the last
+        change seen, rather than fetching the whole catalog again.
+
+    **Example Requests**
+
+        # Return the changes following the change with the given sequence number.
+        GET /api/v1/changes/?since={sequence}
+
+        If the request is successful, the HTTP status will be 200 and the response body will
+        contain a JSON object listing at most CHANGE_FEED_PAGE_SIZE changes, in order:
+
+        {
+            "changes": [
+                {"sequence": 42, "entity_type": "program", "entity_id": 7, "operation": "update", ...}
+            ],
+            "next_since": 42,
+            "has_more": false
+        }
+
+        Clients should request changes again with `since` set to `next_since`, immediately when
+        `has_more` is true, and periodically otherwise.  Start with `since` set to 0.
+
+        Changes which have been superseded by later changes to the same row are removed from
+        the log, so a row's first listed change may be an update.  Clients should fetch the
+        current state of each created or updated row, and forget each deleted row.
+
+        Deletions are eventually removed from the log as well.  If changes since the requested
+        sequence number may have been removed, the HTTP status will be 410, and the response
+        body will contain "resume_since": clients should then fetch the whole catalog (e.g. from
+        /api/v1/programs/export/) and resume requesting changes since that sequence number.
+
+    **Response Values**
+
+        * sequence: The sequence number of the change.
+        * entity_type: The kind of changed row: program, organization, programorganization,
+          coursecode, programcoursecode or programcourserunmode.
+        * entity_id: The id of the changed row.
+        * operation: Whether the row was created, updated or deleted.
+        * created: The date/time of the change.
+
+    """
+    serializer_class = serializers.CatalogChangeSerializer
+
+    def list(self, request):  # pylint: disable=missing-docstring
+        try:
+            since = int(request.query_params.get('since', ''))
+            if since < 0:
+                raise ValueError(since)
+        except ValueError:
+            raise ValidationError({'since': [_('A sequence number is required.')]})
+
+        # changes are only listed once numbered, which the first reader after their commit does.
+        changes.assign_sequences()
+        if since < changes.get_horizon():
+            return Response(
+                {
+                    'detail': _('Some changes since this sequence number are no longer available.'),
+                    'resume_since': changes.get_latest_sequence(),
+                },
+                status=status.HTTP_410_GONE,
+            )
+
+        limit = settings.CHANGE_FEED_PAGE_SIZE
+        entries = changes.get_changes(since, limit + 1)
+        return Response(OrderedDict([
+            ('changes', self.get_serializer(entries[:limit], many=True).data),
+            ('next_since', entries[:limit][-1].sequence if entries else since),
+            ('has_more', len(entries) > limit),
+        ]))
@@ -0,0 +1,2 @@
+"""Core app."""
+default_app_config = 'programs.apps.core.apps.CoreConfig'
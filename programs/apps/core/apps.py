@@ -0,0 +1,21 @@
+"""App configuration for the core app."""
+from django.apps import AppConfig
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.db.backends.signals import connection_created
+
+
+class CoreConfig(AppConfig):
+    """Connects the receivers managing persistent database connections."""
+    name = 'programs.apps.core'
+
+    def ready(self):
+        from programs.apps.core import db_connections
+
+        connection_created.connect(db_connections.count_connection, dispatch_uid='core.count_connection')
+        request_started.connect(db_connections.prepare_connections, dispatch_uid='core.prepare_connections')
+        # Django's own receiver may close connections too, so it must only run once prepare_connections
+        # has marked them as in use, and thus safe from the reaper: connect it again, after the latter.
+        request_started.disconnect(close_old_connections)
+        request_started.connect(close_old_connections)
+        request_finished.connect(db_connections.release_connections, dispatch_uid='core.release_connections')
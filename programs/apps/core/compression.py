@@ -0,0 +1,141 @@
+"""
+Compression of API responses.
+
+`CompressionMiddleware` compresses the bodies of responses to API requests with
+the best encoding the client accepts (see `choose_encoding`): Brotli, when the
+optional `brotli` package is installed, or gzip.  Bodies shorter than
+COMPRESSION_MIN_SIZE bytes are sent as they are, since compressing them saves
+too little to be worth the CPU, or even makes them larger.
+
+Many API responses are identical from one request to the next (e.g. program
+lists, which are assembled from the materialized program documents), so the
+compressed bodies of large responses are kept in the cache, keyed by encoding
+and by a digest of the uncompressed body, and reused instead of being
+compressed again.  Hashing a body is much cheaper than compressing it.
+"""
+from gzip import GzipFile
+import hashlib
+from io import BytesIO
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+API_PATH_PREFIX = '/api/'
+
+BROTLI = 'br'
+GZIP = 'gzip'
+
+# Compression levels, chosen for speed over size since responses are compressed on the fly.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSED_CACHE_KEY = 'programs.compressed.{encoding}.{digest}'
+
+ACCEPT_ENCODING_RE = re.compile(r'^\s*([^\s;]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def get_encodings():
+    """
+    Return the supported content codings, most preferred first.
+    """
+    return (BROTLI, GZIP) if brotli is not None else (GZIP, )
+
+
+def choose_encoding(accept_encoding):
+    """
+    Choose the supported content coding with the highest quality value in an
+    Accept-Encoding header, preferring Brotli over gzip when their quality is the same.
+
+    Returns:
+        str, or None if the client accepts none of the supported codings.
+    """
+    qualities = {}
+    for item in accept_encoding.split(','):
+        match = ACCEPT_ENCODING_RE.match(item)
+        if match is None:
+            continue
+        coding, quality = match.groups()
+        try:
+            qualities[coding.lower()] = float(quality) if quality is not None else 1.0
+        except ValueError:
+            continue
+
+    candidates = []
+    for preference, encoding in enumerate(get_encodings()):
+        quality = qualities.get(encoding, qualities.get('*', 0))
+        if quality > 0:
+            candidates.append((quality, -preference, encoding))
+    return max(candidates)[2] if candidates else None
+
+
+def compress(content, encoding):
+    """
+    Compress bytes with the given content coding.
+    """
+    if encoding == BROTLI:
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+
+    buf = BytesIO()
+    # without a fixed modification time, compressing the same content twice would give different bytes.
+    with GzipFile(mode='wb', compresslevel=GZIP_LEVEL, fileobj=buf, mtime=0) as gzip_file:
+        gzip_file.write(content)
+    return buf.getvalue()
+
+
+def get_compressed(content, encoding):
+    """
+    Return the compressed bytes of a body, reusing those cached for identical
+    bodies when the body is large enough to be worth caching.
+    """
+    min_size = settings.COMPRESSION_CACHE_MIN_SIZE
+    if min_size is None or len(content) < min_size:
+        return compress(content, encoding)
+
+    key = COMPRESSED_CACHE_KEY.format(encoding=encoding, digest=hashlib.sha1(content).hexdigest())
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress(content, encoding)
+        cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+    return compressed
+
+
+class CompressionMiddleware(object):
+    """
+    Compresses the bodies of API responses.  Should come after the middleware
+    recording response sizes, so that the sizes recorded are those sent.
+    """
+
+    def process_response(self, request, response):  # pylint: disable=missing-docstring
+        if not request.path.startswith(API_PATH_PREFIX):
+            return response
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding', ))
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressed = get_compressed(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        if response.has_header('ETag'):
+            # the compressed body is a different representation, which must not share the original's tag.
+            response['ETag'] = re.sub('"$', ';{}"'.format(encoding), response['ETag'])
+
+        return response
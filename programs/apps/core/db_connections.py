@@ -0,0 +1,202 @@
+"""
+Management of persistent database connections.
+
+Django keeps database connections open across requests for CONN_MAX_AGE
+seconds, but only notices that one has gone bad after a query fails on it,
+and never closes connections held by threads which stop serving requests.
+The receivers below make up for both: a persistent connection which has been
+idle for a while is checked before a request reuses it, and a background
+reaper closes connections left idle for too long.
+
+The reaper only closes a connection while holding the lock of its tracking
+record, and only if it isn't in use.  The thread owning the connection marks
+it as in use, under the same lock, at the start of each request, before
+Django's `close_old_connections` receiver (which the core app reconnects after
+`prepare_connections`) or anything else may touch it, and marks it as idle
+once the request is over.  The two threads therefore never close, nor use, a
+connection at the same time.  Counters of connection
+churn are kept for monitoring, and exposed at /metrics/ by the
+`programs_db_connection_events_total` metric, labeled with the event.
+"""
+from collections import Counter
+import logging
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.db import connections
+
+from programs.apps.core.metrics import DB_CONNECTION_EVENTS
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_stats = Counter()
+
+# Maps ids of database wrappers (one per alias and thread) to their _TrackedConnection.
+_tracked = {}
+_reaper = None
+
+
+class _TrackedConnection(object):
+    """
+    Usage of a database wrapper by the thread owning it, as seen by the reaper.
+    """
+
+    def __init__(self, wrapper):
+        self.wrapper = weakref.ref(wrapper)
+        self.lock = threading.Lock()
+        self.in_use = False
+        self.last_used = time.time()
+
+
+def get_connection_stats():
+    """
+    Counters of connection churn in this process.
+
+    Returns:
+        dict with the number of connections `opened`, of requests which `reused` an open connection,
+        and of connections closed because they were found `unusable` or `reaped` after idling.
+    """
+    with _lock:
+        stats = dict.fromkeys(('opened', 'reused', 'unusable', 'reaped'), 0)
+        stats.update(_stats)
+    return stats
+
+
+def _increment(name):
+    """Increment one of the churn counters, along with the metric exposing it."""
+    with _lock:
+        _stats[name] += 1
+    DB_CONNECTION_EVENTS.labels(name).inc()
+
+
+def _is_persistent(wrapper):
+    """Whether the wrapper keeps its connection open across requests."""
+    return wrapper.settings_dict.get('CONN_MAX_AGE', 0) != 0
+
+
+def _track(wrapper):
+    """Return the tracking record of the given wrapper, creating it if necessary."""
+    key = id(wrapper)
+    with _lock:
+        tracked = _tracked.get(key)
+        if tracked is None or tracked.wrapper() is not wrapper:
+            tracked = _tracked[key] = _TrackedConnection(wrapper)
+    return tracked
+
+
+def count_connection(**kwargs):  # pylint: disable=unused-argument
+    """
+    Receiver for the `connection_created` signal, counting new connections.
+    """
+    _increment('opened')
+
+
+def prepare_connections(wrappers=None, **kwargs):  # pylint: disable=unused-argument
+    """
+    Receiver for the `request_started` signal, which must run before any other
+    receiver using connections.  Marks the current thread's persistent
+    connections as in use, and closes those which have been idle
+    for DATABASE_CONN_HEALTH_CHECK_AFTER seconds or more and fail a health
+    check, so that the request opens a fresh one instead of failing.
+    """
+    _start_reaper()
+
+    now = time.time()
+    for wrapper in wrappers if wrappers is not None else connections.all():
+        if not _is_persistent(wrapper):
+            continue
+
+        tracked = _track(wrapper)
+        with tracked.lock:
+            tracked.in_use = True
+            idle = now - tracked.last_used
+
+        if wrapper.connection is None:
+            continue
+
+        _increment('reused')
+        if idle >= settings.DATABASE_CONN_HEALTH_CHECK_AFTER and not wrapper.is_usable():
+            logger.info('Discarding unusable connection to database [%s].', wrapper.alias)
+            _increment('unusable')
+            wrapper.close()
+
+
+def release_connections(wrappers=None, **kwargs):  # pylint: disable=unused-argument
+    """
+    Receiver for the `request_finished` signal.  Marks the current thread's
+    persistent connections as idle, and thus subject to reaping.
+    """
+    now = time.time()
+    for wrapper in wrappers if wrappers is not None else connections.all():
+        if not _is_persistent(wrapper):
+            continue
+
+        tracked = _track(wrapper)
+        with tracked.lock:
+            tracked.in_use = False
+            tracked.last_used = now
+
+
+def reap_idle_connections(max_idle=None):
+    """
+    Close the persistent connections of all threads which have not served a
+    request for `max_idle` seconds (DATABASE_CONN_MAX_IDLE by default).
+    """
+    if max_idle is None:
+        max_idle = settings.DATABASE_CONN_MAX_IDLE
+
+    with _lock:
+        tracked_items = _tracked.items()
+
+    now = time.time()
+    for key, tracked in tracked_items:
+        wrapper = tracked.wrapper()
+        if wrapper is None:
+            with _lock:
+                _tracked.pop(key, None)
+            continue
+
+        # the owning thread cannot start using the connection while the lock is held.
+        with tracked.lock:
+            if tracked.in_use or wrapper.connection is None or wrapper.in_atomic_block or not _is_persistent(wrapper):
+                continue
+            if now - tracked.last_used < max_idle:
+                continue
+
+            logger.debug('Reaping idle connection to database [%s].', wrapper.alias)
+            allow_thread_sharing = wrapper.allow_thread_sharing
+            wrapper.allow_thread_sharing = True
+            try:
+                wrapper.close()
+            finally:
+                wrapper.allow_thread_sharing = allow_thread_sharing
+            _increment('reaped')
+
+
+def _start_reaper():
+    """
+    Start the reaper thread, unless it is already running or disabled by
+    setting DATABASE_CONN_REAP_INTERVAL to None.
+    """
+    global _reaper  # pylint: disable=global-statement
+    interval = settings.DATABASE_CONN_REAP_INTERVAL
+    if interval is None or _reaper is not None:
+        return
+
+    def _reap():
+        """Periodically reap idle connections, for the life of the process."""
+        while True:
+            time.sleep(interval)
+            try:
+                reap_idle_connections()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Failed to reap idle database connections.')
+
+    with _lock:
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap, name='db-connection-reaper')
+            _reaper.daemon = True
+            _reaper.start()
@@ -0,0 +1,146 @@
+"""
+Routing of database reads to read replicas.
+
+Reads are only sent to a replica within a `use_replica` block, which the API
+enters for GET requests (see `programs.apps.api.mixins.ReadReplicaMixin`).
+Everything else, including all writes, uses the primary (`default`) database.
+"""
+from contextlib import contextmanager
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, DatabaseError, DEFAULT_DB_ALIAS
+
+
+logger = logging.getLogger(__name__)
+
+# Only models from these apps are read from replicas.  Users, groups and
+# sessions are left on the primary, since they are written during reads
+# (e.g. when authenticating) and must not be read back stale.
+REPLICATED_APP_LABELS = ('programs',)
+
+_state = threading.local()
+
+# Maps replica aliases to tuples of (time of the last lag check, whether the replica was usable).
+_replica_checks = {}
+
+
+@contextmanager
+def use_replica():
+    """
+    Route reads made within the block to a read replica, when one is configured and usable.
+    """
+    previous = getattr(_state, 'use_replica', False)
+    _state.use_replica = True
+    try:
+        yield
+    finally:
+        _state.use_replica = previous
+
+
+@contextmanager
+def use_primary():
+    """
+    Route reads made within the block to the primary database, even within a `use_replica` block.
+    """
+    previous = getattr(_state, 'use_replica', False)
+    _state.use_replica = False
+    try:
+        yield
+    finally:
+        _state.use_replica = previous
+
+
+def get_replica_lag(alias):
+    """
+    Measure how far behind the primary the given replica is.
+
+    Returns:
+        int: the replication lag in seconds, or None if replication is not running.
+        Backends without a way to measure lag are reported as not lagging.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute('SHOW SLAVE STATUS')
+        row = cursor.fetchone()
+        if row is None:
+            # not a replica at all, e.g. a mirror of the primary in development.
+            return 0
+        columns = [column[0] for column in cursor.description]
+
+    return dict(zip(columns, row)).get('Seconds_Behind_Master')
+
+
+def is_replica_usable(alias):
+    """
+    Whether the given replica's lag is within READ_REPLICA_MAX_LAG_SECONDS.  The
+    result is cached for READ_REPLICA_LAG_CHECK_INTERVAL seconds.
+    """
+    now = time.time()
+    checked_at, usable = _replica_checks.get(alias, (None, False))
+    if checked_at is not None and now - checked_at < settings.READ_REPLICA_LAG_CHECK_INTERVAL:
+        return usable
+
+    try:
+        lag = get_replica_lag(alias)
+    except DatabaseError:
+        logger.exception('Failed to measure the replication lag of database [%s].', alias)
+        lag = None
+
+    usable = lag is not None and lag <= settings.READ_REPLICA_MAX_LAG_SECONDS
+    if not usable:
+        logger.warning('Database [%s] is lagging (%s seconds); reading from the primary instead.', alias, lag)
+
+    _replica_checks[alias] = (now, usable)
+    return usable
+
+
+def get_read_replica():
+    """
+    Choose one of the usable read replicas at random.
+
+    Returns:
+        str: the alias of the replica, or None if none is usable.
+    """
+    replicas = [alias for alias in settings.READ_REPLICA_ALIASES if is_replica_usable(alias)]
+    return random.choice(replicas) if replicas else None
+
+
+class ReadReplicaRouter(object):
+    """
+    Database router sending reads made within `use_replica` blocks to the
+    replicas listed in READ_REPLICA_ALIASES, and everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):  # pylint: disable=missing-docstring
+        app_label = model._meta.app_label  # pylint: disable=protected-access
+        if not getattr(_state, 'use_replica', False) or app_label not in REPLICATED_APP_LABELS:
+            return None
+
+        # keep related lookups on the database their instance was loaded from.
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:  # pylint: disable=protected-access
+            return instance._state.db  # pylint: disable=protected-access
+
+        return get_read_replica()
+
+    def db_for_write(self, model, **hints):  # pylint: disable=missing-docstring,unused-argument
+        # never write through an instance which happens to have been read from a replica.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):  # pylint: disable=missing-docstring,unused-argument
+        # replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):  # pylint: disable=missing-docstring,unused-argument
+        # data migrations write through default managers, i.e. to the primary, whichever
+        # database is being migrated.  Only run them when migrating the primary.
+        if db != DEFAULT_DB_ALIAS and 'model' not in hints:
+            return False
+        return None
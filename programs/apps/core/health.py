@@ -0,0 +1,131 @@
+"""
+Health checks of the services this service depends on.
+
+Probes of the database, media storage and cache run on a background thread
+every HEALTH_CHECK_INTERVAL seconds, and the health endpoint serves the
+latest result from memory, so that the cost of frequent load balancer probes
+doesn't depend on their rate.
+"""
+from collections import namedtuple, OrderedDict
+import datetime
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.utils import timezone
+
+from programs.apps.core.constants import Status
+
+
+logger = logging.getLogger(__name__)
+
+# Results older than this many intervals are reported as unavailable, in case the
+# probing thread has died or is stuck.
+STALE_RESULT_INTERVALS = 3
+
+HealthResult = namedtuple('HealthResult', ['statuses', 'checked_at'])
+
+
+def check_database():
+    """Verify that the database accepts queries."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        # let a broken connection be replaced on the next probe, as Django does between requests.
+        connection.close_if_unusable_or_obsolete()
+
+
+def check_storage():
+    """Verify that media storage can be reached.  Whether the probed file exists doesn't matter."""
+    default_storage.exists('health-check')
+
+
+def check_cache():
+    """Verify that the cache stores and returns values."""
+    key = 'health-check-{}'.format(uuid.uuid4().hex)
+    cache.set(key, key, 60)
+    if cache.get(key) != key:
+        raise ValueError('The cache did not return the value just stored.')
+    cache.delete(key)
+
+
+class HealthMonitor(object):
+    """
+    Runs the probes, named by the status each one determines, and keeps the latest result.
+    """
+
+    def __init__(self, probes):
+        self.probes = probes
+        self.result = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def check(self):
+        """
+        Run all probes now, and store and return the result.  Probes fail by raising any exception.
+        """
+        statuses = OrderedDict()
+        for name, probe in self.probes.items():
+            try:
+                probe()
+                statuses[name] = Status.OK
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Health check [%s] failed.', name)
+                statuses[name] = Status.UNAVAILABLE
+
+        self.result = HealthResult(statuses, timezone.now())
+        return self.result
+
+    def get_result(self):
+        """
+        Return the latest result, starting the background probes if necessary.  If
+        HEALTH_CHECK_INTERVAL is None, the probes are run on every call instead.
+        """
+        interval = settings.HEALTH_CHECK_INTERVAL
+        if interval is None:
+            return self.check()
+
+        self._start(interval)
+        result = self.result
+        if result is None:
+            # the background thread hasn't completed its first run yet.
+            result = self.check()
+
+        max_age = datetime.timedelta(seconds=interval * STALE_RESULT_INTERVALS)
+        if timezone.now() - result.checked_at > max_age:
+            logger.error('The latest health check result, from %s, is stale.', result.checked_at)
+            statuses = OrderedDict((name, Status.UNAVAILABLE) for name in result.statuses)
+            result = HealthResult(statuses, result.checked_at)
+
+        return result
+
+    def _start(self, interval):
+        """Start the background thread, unless it is already running."""
+        if self._thread is not None:
+            return
+
+        def _run():
+            """Run the probes periodically, for the life of the process."""
+            while True:
+                self.check()
+                time.sleep(interval)
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=_run, name='health-monitor')
+                self._thread.daemon = True
+                self._thread.start()
+
+
+monitor = HealthMonitor(OrderedDict([
+    ('database_status', check_database),
+    ('storage_status', check_storage),
+    ('cache_status', check_cache),
+]))
@@ -0,0 +1,37 @@
+# pylint: disable=missing-docstring
+import json
+
+from django.core.management import BaseCommand, CommandError
+
+from programs.apps.core import profiling
+
+
+class Command(BaseCommand):
+    help = 'List the captured request profiles, or dump one of them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'profile_id',
+            nargs='?',
+            default=None,
+            help='Id of the profile to dump. When omitted, all profiles are listed, most recent first.'
+        )
+
+    def handle(self, *args, **options):
+        profile_id = options['profile_id']
+        if profile_id is None:
+            for profile_id in profiling.list_profile_ids():
+                profile = profiling.load_profile(profile_id)
+                self.stdout.write('{id}  {trigger:7}  {duration:8.3f}s  {status}  {method} {path}'.format(**profile))
+            return
+
+        profile = profiling.load_profile(profile_id)
+        if profile is None:
+            raise CommandError('There is no profile [{}].'.format(profile_id))
+
+        self.stdout.write(json.dumps(profiling.summarize_profile(profile), indent=4, sort_keys=True))
+        self.stdout.write('\nSQL statements ({}):'.format(len(profile['queries'])))
+        for query in profile['queries']:
+            self.stdout.write('{duration:8.4f}s  {sql}'.format(**query))
+        self.stdout.write('\nProfile:')
+        self.stdout.write(profile['report'])
@@ -0,0 +1,232 @@
+"""
+Request metrics, exposed in the Prometheus text format at /metrics/.
+
+`MetricsMiddleware` records, for every request, its latency, the number and
+duration of the database queries it made, the time spent serializing API
+data, and the size of its response.  All are labeled with the view which
+handled the request (e.g. `ProgramsViewSet.list`) and the response status.
+Hits and misses of the per-process cache of parsed course keys are counted too,
+as is the churn of persistent database connections.
+
+When the `prometheus_multiproc_dir` environment variable names a directory,
+each WSGI worker process writes its metrics there, and /metrics/ aggregates
+those of all workers.  The directory must be emptied when the server starts.
+
+Only staff users may read /metrics/, unless the METRICS_TOKEN setting is set, in
+which case Prometheus may send it as a bearer token (its `bearer_token` scrape
+option).
+"""
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+from django.db import connections
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY
+from prometheus_client.multiprocess import MultiProcessCollector
+
+
+LABELS = ('view', 'status')
+UNRESOLVED_VIEW = '<unresolved>'
+
+REQUEST_LATENCY = Histogram(
+    'programs_request_latency_seconds', 'Time taken to process requests.', LABELS,
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+)
+REQUEST_DB_QUERIES = Histogram(
+    'programs_request_db_queries', 'Number of database queries made per request.', LABELS,
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+REQUEST_DB_TIME = Histogram(
+    'programs_request_db_seconds', 'Time spent in database queries per request.', LABELS,
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5),
+)
+REQUEST_SERIALIZER_TIME = Histogram(
+    'programs_request_serializer_seconds', 'Time spent serializing API data per request.', LABELS,
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5),
+)
+RESPONSE_SIZE = Histogram(
+    'programs_response_size_bytes', 'Size of response bodies.', LABELS,
+    buckets=(100, 1000, 10000, 100000, 1000000, 10000000),
+)
+
+# Lookups of parsed course keys, labeled with their result (see `programs.apps.programs.course_keys`).
+COURSE_KEY_CACHE_LOOKUPS = Counter(
+    'programs_course_key_cache_lookups', 'Lookups of parsed course keys in the per-process cache.', ('result',),
+)
+
+# Persistent database connections opened, reused, found unusable by a health check, or reaped after
+# idling, labeled with the event (see `programs.apps.core.db_connections`).
+DB_CONNECTION_EVENTS = Counter(
+    'programs_db_connection_events', 'Churn of persistent database connections.', ('event',),
+)
+
+# Measurements of the request being processed by the current thread.
+_request_state = threading.local()
+
+
+def get_registry():
+    """
+    Return the registry from which to expose metrics: the default one, or one
+    aggregating the metrics of all worker processes in multiprocess mode.
+    """
+    if 'prometheus_multiproc_dir' not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return registry
+
+
+@contextmanager
+def time_serialization():
+    """
+    Add the time spent within the block to the current request's serializer time.
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        if getattr(_request_state, 'active', False):
+            _request_state.serializer_time += time.time() - start
+
+
+def record_queries(recording=None):
+    """
+    Start recording the SQL statements executed by the current thread.
+    Several recordings may be in progress at once.
+
+    Arguments:
+        recording: the list to record into; a new one by default.
+
+    Returns:
+        list, to which tuples of (SQL statement, duration in seconds) are appended
+        until `stop_recording_queries` is called with it.
+    """
+    if recording is None:
+        recording = []
+    if not hasattr(_request_state, 'recordings'):
+        _request_state.recordings = []
+    _request_state.recordings.append(recording)
+    return recording
+
+
+def stop_recording_queries(recording):
+    """
+    Stop the recording started by `record_queries`.
+    """
+    recordings = getattr(_request_state, 'recordings', [])
+    if any(r is recording for r in recordings):
+        _request_state.recordings = [r for r in recordings if r is not recording]
+
+
+class _TimedCursor(object):
+    """
+    Cursor wrapper adding the number and duration of queries to the current request's measurements.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _timed(self, method, *args):
+        """Call the given method of the wrapped cursor, measuring it."""
+        start = time.time()
+        try:
+            return method(*args)
+        finally:
+            duration = time.time() - start
+            if getattr(_request_state, 'active', False):
+                _request_state.queries += 1
+                _request_state.query_time += duration
+            for recording in getattr(_request_state, 'recordings', ()):
+                recording.append((args[0], duration))
+
+    def execute(self, sql, params=None):  # pylint: disable=missing-docstring
+        return self._timed(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):  # pylint: disable=missing-docstring
+        return self._timed(self.cursor.executemany, sql, param_list)
+
+
+def instrument_connection(wrapper):
+    """
+    Make the cursors of the given database wrapper measure their queries.
+    Django 1.8 has no hook for wrapping query execution, so the wrapper's
+    cursor factories are replaced, once, with measuring versions.
+    """
+    if getattr(wrapper, '_metrics_instrumented', False):
+        return
+
+    def _instrument(make_cursor):
+        """Wrap a cursor factory so that it returns measuring cursors."""
+        return lambda cursor: _TimedCursor(make_cursor(cursor))
+
+    wrapper.make_cursor = _instrument(wrapper.make_cursor)
+    wrapper.make_debug_cursor = _instrument(wrapper.make_debug_cursor)
+    wrapper._metrics_instrumented = True  # pylint: disable=protected-access
+
+
+def get_view_name(view_func, response):
+    """
+    Name the view which produced the response, e.g. `ProgramsViewSet.retrieve` or `health`.
+    """
+    view = (getattr(response, 'renderer_context', None) or {}).get('view')
+    if view is not None:
+        action = getattr(view, 'action', None)
+        return '{}.{}'.format(view.__class__.__name__, action) if action else view.__class__.__name__
+
+    if view_func is None:
+        return UNRESOLVED_VIEW
+    view_class = getattr(view_func, 'cls', getattr(view_func, 'view_class', None))
+    return view_class.__name__ if view_class else view_func.__name__
+
+
+class MetricsMiddleware(object):
+    """
+    Records the metrics of each request.  Should be the first middleware, so
+    that the latency it records includes the processing by other middleware.
+    """
+
+    def process_request(self, request):  # pylint: disable=missing-docstring
+        for wrapper in connections.all():
+            instrument_connection(wrapper)
+
+        _request_state.active = True
+        _request_state.queries = 0
+        _request_state.query_time = 0.0
+        _request_state.serializer_time = 0.0
+        request._metrics_start = time.time()  # pylint: disable=protected-access
+        request._metrics_view_func = None  # pylint: disable=protected-access
+
+    def process_view(self, request, view_func, view_args, view_kwargs):  # pylint: disable=unused-argument
+        """Remember the view handling the request."""
+        request._metrics_view_func = view_func  # pylint: disable=protected-access
+
+    def process_response(self, request, response):  # pylint: disable=missing-docstring
+        start = getattr(request, '_metrics_start', None)
+        if start is None:
+            # an earlier middleware responded before this one saw the request.
+            return response
+
+        _request_state.active = False
+        labels = (get_view_name(request._metrics_view_func, response), response.status_code)  # pylint: disable=protected-access
+        REQUEST_LATENCY.labels(*labels).observe(time.time() - start)
+        REQUEST_DB_QUERIES.labels(*labels).observe(_request_state.queries)
+        REQUEST_DB_TIME.labels(*labels).observe(_request_state.query_time)
+        REQUEST_SERIALIZER_TIME.labels(*labels).observe(_request_state.serializer_time)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(*labels).observe(len(response.content))
+
+        return response
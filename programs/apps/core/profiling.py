@@ -0,0 +1,243 @@
+"""
+Opt-in profiling of requests.
+
+`ProfilingMiddleware` captures a profile of:
+
+* a random PROFILING_SAMPLE_RATE fraction of requests, using cProfile, and
+* any other request taking PROFILING_SLOW_REQUEST_SECONDS or longer, using a
+  sampler which periodically records the request thread's stack.  Sampling is
+  cheap enough to watch every request, unlike cProfile.
+
+Each profile includes the SQL statements executed by the request, with their
+durations, and is stored as a JSON file in PROFILING_DIRECTORY, which keeps
+the latest PROFILING_MAX_PROFILES only.  Profiles can be read through the
+/profiles/ endpoint, by staff, or with the `request_profiles` management command.
+
+Slow requests are not profiled when gevent has monkey-patched the `thread`
+module, as the gevent gunicorn workers do.  Requests then run in greenlets,
+which all share a single OS thread, so `sys._current_frames` only shows the
+stack of whichever greenlet happens to be running, and not that of a given
+request.  Sampled requests are still profiled, since cProfile follows the
+greenlet switches of the request being profiled.
+"""
+import cProfile
+from collections import Counter
+import datetime
+import json
+import logging
+import os
+import pstats
+import random
+import StringIO
+import sys
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connections
+
+from programs.apps.core import metrics
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = '.json'
+
+# Number of functions listed in reports of cProfile profiles.
+REPORTED_FUNCTIONS = 50
+
+
+class StackSampler(object):
+    """
+    Periodically records the stacks of registered threads, on a background thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._thread = None
+
+    def start(self, thread_ident):
+        """Start recording the stacks of the given thread."""
+        with self._lock:
+            self._samples[thread_ident] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def stop(self, thread_ident):
+        """
+        Stop recording the stacks of the given thread.
+
+        Returns:
+            Counter of stacks, each a semicolon-separated list of `file:line(function)` frames, outermost first.
+        """
+        with self._lock:
+            return self._samples.pop(thread_ident, Counter())
+
+    def _run(self):
+        """Record stacks every PROFILING_STACK_INTERVAL seconds, for the life of the process."""
+        interval = settings.PROFILING_STACK_INTERVAL
+        while True:
+            time.sleep(interval)
+            try:
+                frames = sys._current_frames()  # pylint: disable=protected-access
+            except AttributeError:
+                # the interpreter is shutting down, and has torn down the sys module.
+                return
+            with self._lock:
+                for thread_ident, samples in self._samples.items():
+                    frame = frames.get(thread_ident)
+                    if frame is not None:
+                        samples[self._format_stack(frame)] += 1
+
+    @staticmethod
+    def _format_stack(frame):
+        """Describe the stack ending at the given frame."""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append('{}:{}({})'.format(code.co_filename, frame.f_lineno, code.co_name))
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+
+sampler = StackSampler()
+
+
+def _threads_are_greenlets():
+    """Whether gevent has monkey-patched threads into greenlets, whose stacks cannot be sampled."""
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and 'thread' in getattr(monkey, 'saved', {})
+
+
+def _get_directory():
+    """Return the directory storing profiles, creating it if necessary."""
+    directory = settings.PROFILING_DIRECTORY
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    return directory
+
+
+def save_profile(profile):
+    """
+    Store the given profile, discarding the oldest ones beyond PROFILING_MAX_PROFILES.
+
+    Returns:
+        str: the id of the stored profile.
+    """
+    directory = _get_directory()
+    profile_id = '{}-{}'.format(datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S%f'), uuid.uuid4().hex[:8])
+    profile = dict(profile, id=profile_id)
+    with open(os.path.join(directory, profile_id + PROFILE_SUFFIX), 'w') as f:
+        json.dump(profile, f)
+
+    for stale_id in list_profile_ids()[settings.PROFILING_MAX_PROFILES:]:
+        try:
+            os.remove(os.path.join(directory, stale_id + PROFILE_SUFFIX))
+        except OSError:
+            # already removed by another process.
+            pass
+
+    return profile_id
+
+
+def list_profile_ids():
+    """
+    Return the ids of the stored profiles, most recent first.
+    """
+    directory = settings.PROFILING_DIRECTORY
+    if not os.path.isdir(directory):
+        return []
+    names = [name for name in os.listdir(directory) if name.endswith(PROFILE_SUFFIX)]
+    return sorted((name[:-len(PROFILE_SUFFIX)] for name in names), reverse=True)
+
+
+def load_profile(profile_id):
+    """
+    Load a stored profile.
+
+    Returns:
+        dict, or None if there is no such profile.
+    """
+    if profile_id not in list_profile_ids():
+        return None
+    with open(os.path.join(settings.PROFILING_DIRECTORY, profile_id + PROFILE_SUFFIX)) as f:
+        return json.load(f)
+
+
+def summarize_profile(profile):
+    """
+    Return the fields of a profile which describe its request, omitting its (lengthy) measurements.
+    """
+    return {key: value for key, value in profile.items() if key not in ('report', 'queries')}
+
+
+class ProfilingMiddleware(object):
+    """
+    Profiles sampled and slow requests.  Inactive unless PROFILING_SAMPLE_RATE
+    or PROFILING_SLOW_REQUEST_SECONDS is set.
+    """
+
+    def process_request(self, request):  # pylint: disable=missing-docstring
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            request._profiler = cProfile.Profile()  # pylint: disable=protected-access
+            request._profiler.enable()  # pylint: disable=protected-access
+        elif settings.PROFILING_SLOW_REQUEST_SECONDS is not None and not _threads_are_greenlets():
+            sampler.start(threading.current_thread().ident)
+        else:
+            return
+
+        for wrapper in connections.all():
+            metrics.instrument_connection(wrapper)
+        request._profiling_start = time.time()  # pylint: disable=protected-access
+        request._profiling_queries = metrics.record_queries()  # pylint: disable=protected-access
+
+    def process_response(self, request, response):  # pylint: disable=missing-docstring
+        start = getattr(request, '_profiling_start', None)
+        if start is None:
+            return response
+
+        duration = time.time() - start
+        queries = request._profiling_queries  # pylint: disable=protected-access
+        metrics.stop_recording_queries(queries)
+        profiler = getattr(request, '_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            trigger, report = 'sampled', self._report_cprofile(profiler)
+        else:
+            samples = sampler.stop(threading.current_thread().ident)
+            if duration < settings.PROFILING_SLOW_REQUEST_SECONDS:
+                return response
+            trigger, report = 'slow', self._report_samples(samples)
+
+        try:
+            profile_id = save_profile({
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'duration': duration,
+                'trigger': trigger,
+                'queries': [{'sql': sql, 'duration': query_duration} for sql, query_duration in queries],
+                'report': report,
+            })
+            logger.info('Profiled %s request to [%s] as [%s].', trigger, request.path, profile_id)
+        except (IOError, OSError):
+            logger.exception('Failed to store the profile of a request to [%s].', request.path)
+
+        return response
+
+    @staticmethod
+    def _report_cprofile(profiler):
+        """Describe the functions taking the most time in a cProfile profile."""
+        stream = StringIO.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(REPORTED_FUNCTIONS)
+        return stream.getvalue()
+
+    @staticmethod
+    def _report_samples(samples):
+        """Describe the sampled stacks, most frequent first, in the "collapsed stack" format of flame graph tools."""
+        return '\n'.join('{} {}'.format(stack, count) for stack, count in samples.most_common())
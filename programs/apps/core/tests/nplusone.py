@@ -0,0 +1,143 @@
+"""
+Detection of N+1 query patterns in API views, for use in tests.
+
+`NPlusOneMiddleware` records the SELECT statements made while handling each
+GET request to an API view.  When statements of the same shape (i.e. differing
+only in their parameters) are made NPLUSONE_THRESHOLD times or more, which
+typically means related rows are being loaded one object at a time, it fails
+the request with a report of the statements and where they were made.
+
+Deliberate cases are listed in ALLOWED_CALL_SITES, by the innermost function
+of project code making the statements.
+"""
+from collections import OrderedDict
+import os
+import re
+import traceback
+
+from django.conf import settings
+from django.db import connections
+
+from programs.apps.core import metrics
+
+
+# Functions (path relative to the project root, function name) allowed to repeat the statements they
+# make themselves, i.e. when they are the innermost frame of project code.  Their callers are not.
+ALLOWED_CALL_SITES = (
+    # refetches documents get_documents had to build on demand, after the initial fetch found them missing.
+    ('programs/apps/programs/documents.py', '_refetch'),
+)
+
+# Only requests to views defined in these packages, using these methods, are checked.  Writes
+# are not, since nested writes validate and save their items one at a time.
+CHECKED_VIEW_MODULES = ('programs.apps.api',)
+CHECKED_METHODS = ('GET',)
+
+# Number of frames reported for each call site.
+CALL_SITE_DEPTH = 4
+
+IN_LIST_RE = re.compile(r'IN \((%s, )*%s\)')
+PROJECT_ROOT = os.path.dirname(os.path.abspath(settings.PROJECT_ROOT))
+
+
+class NPlusOneError(AssertionError):
+    """Raised when a request made an N+1 query pattern."""
+    pass
+
+
+class _Recording(list):
+    """
+    Recording of the statements made during a request, which also notes where each statement was made.
+    """
+
+    def __init__(self):
+        super(_Recording, self).__init__()
+        self.call_sites = []
+
+    def append(self, item):
+        super(_Recording, self).append(item)
+        self.call_sites.append(_get_call_site())
+
+
+def _get_call_site():
+    """
+    Return the innermost frames of the current stack which belong to project code, excluding tests,
+    as tuples of (path relative to the project root, line number, function name).
+    """
+    frames = []
+    for path, line, function, _ in reversed(traceback.extract_stack()):
+        path = os.path.relpath(path, PROJECT_ROOT)
+        if not path.startswith('programs/') or '/tests/' in path or path.startswith('programs/apps/core/metrics'):
+            continue
+        frames.append((path, line, function))
+        if len(frames) == CALL_SITE_DEPTH:
+            break
+    return frames
+
+
+def get_statement_shape(sql):
+    """
+    Normalize a statement so that statements differing only in their parameters have the same shape.
+    The ORM passes parameters separately, except for the length of IN lists.
+    """
+    return IN_LIST_RE.sub('IN (...)', sql)
+
+
+def find_repeated_statements(recording, threshold):
+    """
+    Group the recorded SELECT statements by shape, and return the groups of `threshold` or more
+    statements which were not made by allowed call sites.
+
+    Returns:
+        OrderedDict mapping statement shapes to lists of call sites.
+    """
+    groups = OrderedDict()
+    for (sql, _), call_site in zip(recording, recording.call_sites):
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        if call_site and (call_site[0][0], call_site[0][2]) in ALLOWED_CALL_SITES:
+            continue
+        groups.setdefault(get_statement_shape(sql), []).append(call_site)
+
+    return OrderedDict((shape, sites) for shape, sites in groups.items() if len(sites) >= threshold)
+
+
+def format_report(view_name, repeated):
+    """Describe the repeated statements of a request."""
+    lines = ['N+1 query pattern detected in {}:'.format(view_name)]
+    for shape, call_sites in repeated.items():
+        lines.append('')
+        lines.append('{} similar statements: {}'.format(len(call_sites), shape))
+        for call_site in OrderedDict.fromkeys(tuple(site) for site in call_sites):
+            lines.append('  made from:')
+            lines.extend('    {}:{} in {}'.format(*frame) for frame in call_site)
+    return '\n'.join(lines)
+
+
+class NPlusOneMiddleware(object):
+    """
+    Fails requests to API views which make N+1 query patterns.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):  # pylint: disable=unused-argument
+        """Start recording statements, if the view is to be checked."""
+        view_module = getattr(view_func, '__module__', '') or ''
+        if request.method not in CHECKED_METHODS or not view_module.startswith(CHECKED_VIEW_MODULES):
+            return
+
+        for wrapper in connections.all():
+            metrics.instrument_connection(wrapper)
+        request._nplusone_recording = metrics.record_queries(_Recording())  # pylint: disable=protected-access
+
+    def process_response(self, request, response):  # pylint: disable=missing-docstring
+        recording = getattr(request, '_nplusone_recording', None)
+        if recording is None:
+            return response
+
+        metrics.stop_recording_queries(recording)
+        repeated = find_repeated_statements(recording, settings.NPLUSONE_THRESHOLD)
+        if repeated:
+            view_name = metrics.get_view_name(None, response)
+            raise NPlusOneError(format_report(view_name, repeated))
+
+        return response
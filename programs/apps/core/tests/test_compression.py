@@ -0,0 +1,150 @@
+"""Test core.compression."""
+import gzip
+from io import BytesIO
+
+import ddt
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
+import mock
+
+from programs.apps.api.v1.tests.mixins import JwtMixin
+from programs.apps.core import compression
+from programs.apps.core.tests.factories import UserFactory
+from programs.apps.programs.tests.factories import OrganizationFactory
+
+
+CONTENT = b'{"results": [' + b', '.join([b'{"name": "Test Program"}'] * 100) + b']}'
+
+
+def decompress(content):
+    """Decompress gzipped bytes."""
+    return gzip.GzipFile(fileobj=BytesIO(content)).read()
+
+
+@ddt.ddt
+@override_settings(COMPRESSION_MIN_SIZE=100, COMPRESSION_CACHE_MIN_SIZE=1000)
+class CompressionMiddlewareTests(TestCase):
+    """Tests of the compression of API responses."""
+
+    def setUp(self):
+        super(CompressionMiddlewareTests, self).setUp()
+        cache.clear()
+        self.middleware = compression.CompressionMiddleware()
+
+    def _process(self, response, path='/api/v1/programs/', accept_encoding='gzip, deflate'):
+        """Pass a response to a request with the given path and Accept-Encoding through the middleware."""
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+        return self.middleware.process_response(request, response)
+
+    @ddt.data(
+        ('gzip', ('gzip', ), 'gzip'),
+        ('gzip;q=0.5, br', ('br', 'gzip'), 'br'),
+        ('gzip, br;q=0.5', ('br', 'gzip'), 'gzip'),
+        ('gzip, br', ('br', 'gzip'), 'br'),
+        ('br', ('gzip', ), None),
+        ('*', ('gzip', ), 'gzip'),
+        ('*, gzip;q=0', ('gzip', ), None),
+        ('GZIP ; q=1.0', ('gzip', ), 'gzip'),
+        ('deflate, gzip;q=invalid', ('gzip', ), None),
+        ('', ('gzip', ), None),
+    )
+    @ddt.unpack
+    def test_choose_encoding(self, accept_encoding, supported, expected):
+        """Verify that the accepted coding with the highest quality is chosen, Brotli being preferred."""
+        with mock.patch.object(compression, 'get_encodings', return_value=supported):
+            self.assertEqual(compression.choose_encoding(accept_encoding), expected)
+
+    def test_compressed(self):
+        """Verify that API responses are compressed with the accepted coding."""
+        response = self._process(HttpResponse(CONTENT))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(decompress(response.content), CONTENT)
+
+    def test_etag(self):
+        """Verify that compressed responses don't share the tag of uncompressed ones."""
+        response = HttpResponse(CONTENT)
+        response['ETag'] = '"abc"'
+        self.assertEqual(self._process(response)['ETag'], '"abc;gzip"')
+
+    def test_not_accepted(self):
+        """Verify that responses aren't compressed when the client doesn't accept any supported coding."""
+        response = self._process(HttpResponse(CONTENT), accept_encoding='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, CONTENT)
+
+    def test_small(self):
+        """Verify that responses below the minimum size aren't compressed."""
+        response = self._process(HttpResponse(CONTENT[:99]))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_incompressible(self):
+        """Verify that responses aren't replaced by compressed bodies which are no smaller."""
+        with mock.patch.object(compression, 'compress', return_value=CONTENT):
+            response = self._process(HttpResponse(CONTENT))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_not_api(self):
+        """Verify that only API responses are compressed."""
+        response = self._process(HttpResponse(CONTENT), path='/admin/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_already_encoded(self):
+        """Verify that responses which already have a coding are left alone."""
+        response = HttpResponse(CONTENT)
+        response['Content-Encoding'] = 'br'
+        self.assertEqual(self._process(response).content, CONTENT)
+
+    def test_streaming(self):
+        """Verify that streaming responses are left alone."""
+        response = self._process(StreamingHttpResponse(iter([CONTENT])))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_cached(self):
+        """Verify that the compressed bodies of large responses are reused for identical bodies."""
+        with mock.patch.object(compression, 'compress', wraps=compression.compress) as mock_compress:
+            for __ in range(3):
+                response = self._process(HttpResponse(CONTENT))
+                self.assertEqual(decompress(response.content), CONTENT)
+            self.assertEqual(mock_compress.call_count, 1)
+
+            self._process(HttpResponse(CONTENT + b' '))
+            self.assertEqual(mock_compress.call_count, 2)
+
+    def test_not_cached(self):
+        """Verify that the compressed bodies of responses below the caching size are not cached."""
+        with mock.patch.object(compression, 'compress', wraps=compression.compress) as mock_compress:
+            for __ in range(2):
+                self._process(HttpResponse(CONTENT[:999]))
+            self.assertEqual(mock_compress.call_count, 2)
+
+    def test_brotli(self):
+        """Verify that Brotli is used when it is installed and accepted."""
+        fake_brotli = mock.Mock(**{'compress.return_value': b'compressed'})
+        with mock.patch.object(compression, 'brotli', fake_brotli):
+            response = self._process(HttpResponse(CONTENT), accept_encoding='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response.content, b'compressed')
+        fake_brotli.compress.assert_called_once_with(CONTENT, quality=compression.BROTLI_QUALITY)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=0)
+class CompressedApiTests(JwtMixin, TestCase):
+    """Tests of the compression of actual API responses."""
+
+    def test_list(self):
+        """Verify that API responses are compressed on their way out."""
+        OrganizationFactory.create_batch(20)
+        token = self.generate_id_token(UserFactory(), admin=True)
+        url = reverse('api:v1:organizations-list')
+
+        plain = self.client.get(url, HTTP_AUTHORIZATION='JWT {0}'.format(token))
+        compressed = self.client.get(url, HTTP_AUTHORIZATION='JWT {0}'.format(token), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(decompress(compressed.content), plain.content)
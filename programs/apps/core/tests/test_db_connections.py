@@ -0,0 +1,119 @@
+"""Test core.db_connections."""
+import time
+
+from django.core.signals import request_started
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import TestCase
+from django.test.utils import override_settings
+import mock
+from prometheus_client import REGISTRY
+
+from programs.apps.core import db_connections
+
+
+def make_wrapper(conn_max_age=60, usable=True):
+    """Build a stand-in for a database wrapper holding an open connection."""
+    wrapper = mock.Mock(
+        alias='test-alias',
+        settings_dict={'CONN_MAX_AGE': conn_max_age},
+        connection=object(),
+        in_atomic_block=False,
+        allow_thread_sharing=False,
+    )
+    wrapper.is_usable.return_value = usable
+    return wrapper
+
+
+@override_settings(DATABASE_CONN_HEALTH_CHECK_AFTER=10, DATABASE_CONN_MAX_IDLE=300)
+class ConnectionManagementTests(TestCase):
+    """Tests of the management of persistent database connections."""
+
+    def setUp(self):
+        super(ConnectionManagementTests, self).setUp()
+        patcher = mock.patch.dict(db_connections._tracked, clear=True)  # pylint: disable=protected-access
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_stats_change(self, expected_changes, func, *args, **kwargs):
+        """Verify that calling `func` changes the churn counters, and the metrics exposing them, as expected."""
+        before = db_connections.get_connection_stats(), self._get_metrics()
+        func(*args, **kwargs)
+        after = db_connections.get_connection_stats(), self._get_metrics()
+        for old, new in zip(before, after):
+            self.assertEqual({name: new[name] - old[name] for name in new}, expected_changes)
+
+    @staticmethod
+    def _get_metrics():
+        """Read the churn counters exposed as metrics."""
+        return {
+            name: REGISTRY.get_sample_value('programs_db_connection_events_total', {'event': name}) or 0
+            for name in ('opened', 'reused', 'unusable', 'reaped')
+        }
+
+    def _idle_since(self, wrapper, seconds):
+        """Pretend the wrapper has been idle for the given number of seconds."""
+        db_connections.release_connections([wrapper])
+        db_connections._track(wrapper).last_used = time.time() - seconds  # pylint: disable=protected-access
+
+    def test_health_check_before_reuse(self):
+        """Verify that connections idle for a while are checked before reuse, and discarded if unusable."""
+        wrapper = make_wrapper(usable=False)
+
+        self._idle_since(wrapper, 5)
+        self.assert_stats_change(
+            {'opened': 0, 'reused': 1, 'unusable': 0, 'reaped': 0},
+            db_connections.prepare_connections, [wrapper]
+        )
+        self.assertFalse(wrapper.is_usable.called)
+
+        self._idle_since(wrapper, 10)
+        self.assert_stats_change(
+            {'opened': 0, 'reused': 1, 'unusable': 1, 'reaped': 0},
+            db_connections.prepare_connections, [wrapper]
+        )
+        wrapper.close.assert_called_once_with()
+
+    def test_non_persistent_connections(self):
+        """Verify that connections closed after each request are left alone."""
+        wrapper = make_wrapper(conn_max_age=0, usable=False)
+        self._idle_since(wrapper, 3600)
+        db_connections.prepare_connections([wrapper])
+        db_connections.release_connections([wrapper])
+        db_connections.reap_idle_connections()
+        self.assertFalse(wrapper.is_usable.called)
+        self.assertFalse(wrapper.close.called)
+
+    def test_reaping(self):
+        """Verify that only connections idle for too long, outside of requests and transactions, are reaped."""
+        idle, recent, busy, atomic = [make_wrapper() for _ in range(4)]
+        self._idle_since(idle, 300)
+        self._idle_since(recent, 10)
+        self._idle_since(busy, 300)
+        db_connections.prepare_connections([busy])
+        self._idle_since(atomic, 300)
+        atomic.in_atomic_block = True
+
+        self.assert_stats_change(
+            {'opened': 0, 'reused': 0, 'unusable': 0, 'reaped': 1},
+            db_connections.reap_idle_connections
+        )
+        idle.close.assert_called_once_with()
+        self.assertFalse(idle.allow_thread_sharing)
+        for wrapper in (recent, busy, atomic):
+            self.assertFalse(wrapper.close.called)
+
+    def test_count_opened(self):
+        """Verify that new connections are counted."""
+        connection = connections['default']
+        self.assert_stats_change(
+            {'opened': 1, 'reused': 0, 'unusable': 0, 'reaped': 0},
+            connection_created.send, sender=connection.__class__, connection=connection
+        )
+
+    def test_receiver_order(self):
+        """Verify that connections are marked as in use before Django's receiver may close them."""
+        receivers = request_started._live_receivers(None)  # pylint: disable=protected-access
+        self.assertLess(
+            receivers.index(db_connections.prepare_connections), receivers.index(close_old_connections)
+        )
@@ -0,0 +1,69 @@
+"""Test core.db_routers."""
+from django.db import DatabaseError, DEFAULT_DB_ALIAS
+from django.test import TestCase
+from django.test.utils import override_settings
+import mock
+
+from programs.apps.core import db_routers
+from programs.apps.core.models import User
+from programs.apps.programs.models import Program
+from programs.apps.programs.tests.factories import ProgramFactory
+
+
+REPLICA = 'replica'
+
+
+@override_settings(READ_REPLICA_ALIASES=(REPLICA,), READ_REPLICA_LAG_CHECK_INTERVAL=0)
+class ReadReplicaRouterTests(TestCase):
+    """Tests of the read replica router."""
+    multi_db = True
+
+    def setUp(self):
+        super(ReadReplicaRouterTests, self).setUp()
+        self.router = db_routers.ReadReplicaRouter()
+
+    def test_reads_outside_replica_block(self):
+        """Verify that reads use the primary unless a replica was requested."""
+        self.assertIsNone(self.router.db_for_read(Program))
+
+    def test_reads_in_replica_block(self):
+        """Verify that reads of program data use a replica within a replica block, except within a primary block."""
+        with db_routers.use_replica():
+            self.assertEqual(self.router.db_for_read(Program), REPLICA)
+            self.assertIsNone(self.router.db_for_read(User))
+            with db_routers.use_primary():
+                self.assertIsNone(self.router.db_for_read(Program))
+            self.assertEqual(self.router.db_for_read(Program), REPLICA)
+
+    def test_instance_hint(self):
+        """Verify that related lookups stay on the database their instance was loaded from."""
+        program = ProgramFactory.create()
+        with db_routers.use_replica():
+            self.assertEqual(self.router.db_for_read(Program, instance=program), DEFAULT_DB_ALIAS)
+
+    def test_writes(self):
+        """Verify that writes always use the primary."""
+        program = ProgramFactory.build()
+        program._state.db = REPLICA  # pylint: disable=protected-access
+        with db_routers.use_replica():
+            self.assertEqual(self.router.db_for_write(Program, instance=program), DEFAULT_DB_ALIAS)
+
+    def test_lagging_replica(self):
+        """Verify that replicas lagging beyond the threshold, or not replicating at all, are not used."""
+        with db_routers.use_replica(), override_settings(READ_REPLICA_MAX_LAG_SECONDS=10):
+            for lag, expected in ((10, REPLICA), (11, None), (None, None)):
+                with mock.patch.object(db_routers, 'get_replica_lag', return_value=lag):
+                    self.assertEqual(self.router.db_for_read(Program), expected)
+
+    def test_unreachable_replica(self):
+        """Verify that replicas whose lag cannot be measured are not used."""
+        with db_routers.use_replica(), mock.patch.object(db_routers, 'get_replica_lag', side_effect=DatabaseError):
+            self.assertIsNone(self.router.db_for_read(Program))
+
+    @override_settings(READ_REPLICA_LAG_CHECK_INTERVAL=60)
+    def test_lag_check_interval(self):
+        """Verify that lag measurements are reused for the configured interval."""
+        with db_routers.use_replica(), mock.patch.object(db_routers, 'get_replica_lag', return_value=0) as mock_lag:
+            db_routers.is_replica_usable('interval-test-replica')
+            db_routers.is_replica_usable('interval-test-replica')
+        self.assertEqual(mock_lag.call_count, 1)
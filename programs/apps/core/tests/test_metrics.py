@@ -0,0 +1,93 @@
+"""Test core.metrics."""
+from django.contrib.auth.models import Group
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from programs.apps.core.constants import Role
+from programs.apps.core.tests.factories import UserFactory
+from programs.apps.programs.tests.factories import OrganizationFactory, ProgramFactory
+
+
+class MetricsTests(TestCase):
+    """Tests of the request metrics."""
+
+    def setUp(self):
+        super(MetricsTests, self).setUp()
+        user = UserFactory.create()
+        user.groups.add(Group.objects.get(name=Role.ADMINS))  # pylint: disable=no-member
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def _get_sample(self, metric, view, status, suffix='_count'):
+        """Read a sample of the given metric, as recorded so far."""
+        return REGISTRY.get_sample_value(metric + suffix, {'view': view, 'status': str(status)}) or 0
+
+    def _assert_recorded(self, url, view, status=200):
+        """Request the URL, verifying that its metrics are recorded with the given labels, and return the response."""
+        metric_names = (
+            'programs_request_latency_seconds',
+            'programs_request_db_queries',
+            'programs_request_db_seconds',
+            'programs_request_serializer_seconds',
+            'programs_response_size_bytes',
+        )
+        before = [self._get_sample(name, view, status) for name in metric_names]
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status)
+        after = [self._get_sample(name, view, status) for name in metric_names]
+        self.assertEqual([count + 1 for count in before], after)
+        return response
+
+    def test_view_labels(self):
+        """Verify that requests are labeled with the view and action handling them."""
+        program = ProgramFactory.create()
+        self._assert_recorded(reverse('api:v1:programs-list'), 'ProgramsViewSet.list')
+        self._assert_recorded(reverse('api:v1:programs-detail', kwargs={'pk': program.id}), 'ProgramsViewSet.retrieve')
+        self._assert_recorded(reverse('api:v1:programs-detail', kwargs={'pk': 0}), 'ProgramsViewSet.retrieve', 404)
+        self._assert_recorded(reverse('api:v1:organizations-list'), 'OrganizationsViewSet.list')
+        self._assert_recorded(reverse('health'), 'health')
+        self._assert_recorded('/no/such/path/', '<unresolved>', 404)
+
+    def test_queries_and_serialization(self):
+        """Verify that database queries and serializer time are measured."""
+        for _ in range(3):
+            OrganizationFactory.create()
+
+        view = 'OrganizationsViewSet.list'
+        queries = self._get_sample('programs_request_db_queries', view, 200, '_sum')
+        serializer_time = self._get_sample('programs_request_serializer_seconds', view, 200, '_sum')
+        size = self._get_sample('programs_response_size_bytes', view, 200, '_sum')
+
+        response = self._assert_recorded(reverse('api:v1:organizations-list'), view)
+        self.assertGreaterEqual(self._get_sample('programs_request_db_queries', view, 200, '_sum') - queries, 2)
+        self.assertGreater(self._get_sample('programs_request_serializer_seconds', view, 200, '_sum'), serializer_time)
+        self.assertEqual(
+            self._get_sample('programs_response_size_bytes', view, 200, '_sum') - size,
+            len(response.content)
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint(self):
+        """Verify that the metrics are exposed in the Prometheus text format."""
+        self.client.get(reverse('health'))
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['content-type'].startswith('text/plain'))
+        self.assertIn('programs_request_latency_seconds_bucket{', response.content)
+        self.assertIn('view="health"', response.content)
+
+    def test_metrics_access(self):
+        """Verify that only staff users and requests bearing the metrics token may read the metrics."""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+        staff = UserFactory.create(is_staff=True)
+        staff.set_password('password')
+        staff.save()
+        client = APIClient()
+        client.login(username=staff.username, password='password')
+        self.assertEqual(client.get(reverse('metrics')).status_code, 200)
@@ -0,0 +1,101 @@
+"""Test the N+1 query detector in core.tests.nplusone."""
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from programs.apps.core import metrics
+from programs.apps.core.tests import nplusone
+from programs.apps.programs.models import Organization
+from programs.apps.programs.tests.factories import OrganizationFactory
+
+
+def api_view(request):  # pylint: disable=unused-argument
+    """Stand-in for a view of the API."""
+    pass
+
+api_view.__module__ = 'programs.apps.api.v1.views'
+
+
+def other_view(request):  # pylint: disable=unused-argument
+    """Stand-in for a view outside of the API."""
+    pass
+
+
+class FindRepeatedStatementsTests(TestCase):
+    """Tests of the grouping of recorded statements."""
+
+    def _record(self, statements, call_site=None):
+        """Return a recording of the given statements, all made from the given call site."""
+        recording = nplusone._Recording()  # pylint: disable=protected-access
+        for sql in statements:
+            recording.append((sql, 0.0))
+        recording.call_sites = [call_site or [] for _ in statements]
+        return recording
+
+    def test_statement_shape(self):
+        """Verify that statements differing only in the length of IN lists have the same shape."""
+        self.assertEqual(
+            nplusone.get_statement_shape('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            nplusone.get_statement_shape('SELECT * FROM t WHERE id IN (%s)'),
+        )
+
+    def test_threshold(self):
+        """Verify that only SELECT statements repeated at least `threshold` times are reported."""
+        repeated_sql = 'SELECT * FROM t WHERE id = %s'
+        recording = self._record([
+            repeated_sql,
+            'SELECT * FROM u WHERE id = %s',
+            repeated_sql,
+            'UPDATE t SET x = %s',
+            'UPDATE t SET x = %s',
+        ])
+
+        self.assertEqual(nplusone.find_repeated_statements(recording, 2).keys(), [repeated_sql])
+        self.assertEqual(nplusone.find_repeated_statements(recording, 3), {})
+
+    def test_allowed_call_sites(self):
+        """Verify that statements made from allowed call sites are ignored."""
+        path, function = nplusone.ALLOWED_CALL_SITES[0]
+        recording = self._record(['SELECT * FROM t WHERE id = %s'] * 3, [(path, 1, function)])
+        self.assertEqual(nplusone.find_repeated_statements(recording, 2), {})
+
+    def test_allowed_call_site_callers(self):
+        """Verify that statements made by functions called from allowed call sites are still checked."""
+        path, function = nplusone.ALLOWED_CALL_SITES[0]
+        call_site = [('programs/apps/programs/serializers.py', 1, 'to_representation'), (path, 1, function)]
+        recording = self._record(['SELECT * FROM t WHERE id = %s'] * 3, call_site)
+        self.assertEqual(len(nplusone.find_repeated_statements(recording, 2)), 1)
+
+
+@override_settings(NPLUSONE_THRESHOLD=2)
+class NPlusOneMiddlewareTests(TestCase):
+    """Tests of the middleware checking requests."""
+
+    def setUp(self):
+        super(NPlusOneMiddlewareTests, self).setUp()
+        self.middleware = nplusone.NPlusOneMiddleware()
+        self.organization_ids = [OrganizationFactory.create().id for _ in range(3)]
+
+    def _process(self, method='GET', view=api_view):
+        """Run a request through the middleware, loading each organization with a separate query."""
+        request = getattr(RequestFactory(), method.lower())('/')
+        self.middleware.process_view(request, view, (), {})
+        for organization_id in self.organization_ids:
+            Organization.objects.get(id=organization_id)
+        return self.middleware.process_response(request, HttpResponse())
+
+    def test_repeated_queries(self):
+        """Verify that the request fails, with a report of the repeated statements."""
+        with self.assertRaises(nplusone.NPlusOneError) as context:
+            self._process()
+        self.assertIn('3 similar statements: SELECT', str(context.exception))
+
+    def test_unchecked_requests(self):
+        """Verify that writes, and requests to views outside of the API, are not checked."""
+        self._process(method='POST')
+        self._process(view=other_view)
+
+    def test_recording_stopped(self):
+        """Verify that the recording stops once the response is processed."""
+        with self.assertRaises(nplusone.NPlusOneError):
+            self._process()
+        self.assertEqual(getattr(metrics._request_state, 'recordings', []), [])  # pylint: disable=protected-access
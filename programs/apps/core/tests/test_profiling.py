@@ -0,0 +1,133 @@
+"""Test core.profiling."""
+import json
+import shutil
+import sys
+import tempfile
+from StringIO import StringIO
+
+import mock
+from django.contrib.auth.models import Group
+from django.core.management import call_command, CommandError
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from programs.apps.core import profiling
+from programs.apps.core.constants import Role
+from programs.apps.core.tests.factories import UserFactory
+from programs.apps.programs.tests.factories import OrganizationFactory
+
+
+class ProfilingTests(TestCase):
+    """Tests of the profiling of requests."""
+
+    def setUp(self):
+        super(ProfilingTests, self).setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = override_settings(PROFILING_DIRECTORY=directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        OrganizationFactory.create()
+        admin = UserFactory.create(is_staff=True, is_superuser=True)
+        admin.set_password('test-password')
+        admin.save()
+        admin.groups.add(Group.objects.get(name=Role.ADMINS))  # pylint: disable=no-member
+        self.client.login(username=admin.username, password='test-password')
+
+    def _get_profiles(self):
+        """Load all stored profiles, most recent first."""
+        return [profiling.load_profile(profile_id) for profile_id in profiling.list_profile_ids()]
+
+    def test_disabled(self):
+        """Verify that nothing is profiled by default."""
+        self.client.get(reverse('api:v1:organizations-list'))
+        self.assertEqual(self._get_profiles(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled(self):
+        """Verify that sampled requests are profiled with cProfile, along with their SQL statements."""
+        self.client.get(reverse('api:v1:organizations-list'))
+        profile, = self._get_profiles()
+        self.assertEqual(profile['trigger'], 'sampled')
+        self.assertEqual(profile['status'], 200)
+        self.assertEqual(profile['path'], reverse('api:v1:organizations-list'))
+        self.assertIn('cumulative', profile['report'])
+        self.assertTrue(any('programs_organization' in query['sql'] for query in profile['queries']))
+
+    @override_settings(PROFILING_SLOW_REQUEST_SECONDS=0)
+    def test_slow(self):
+        """Verify that slow requests are profiled by stack sampling."""
+        self.client.get(reverse('api:v1:organizations-list'))
+        profile, = self._get_profiles()
+        self.assertEqual(profile['trigger'], 'slow')
+
+    @override_settings(PROFILING_SLOW_REQUEST_SECONDS=0)
+    @mock.patch.object(profiling, '_threads_are_greenlets', return_value=True)
+    def test_slow_under_gevent(self, _):
+        """Verify that stacks are not sampled once gevent has turned threads into greenlets."""
+        self.client.get(reverse('api:v1:organizations-list'))
+        self.assertEqual(self._get_profiles(), [])
+        self.assertEqual(profiling.sampler._samples, {})  # pylint: disable=protected-access
+
+    def test_threads_are_greenlets(self):
+        """Verify that gevent's monkey-patching of the thread module is detected."""
+        self.assertFalse(profiling._threads_are_greenlets())  # pylint: disable=protected-access
+        monkey = mock.Mock(saved={'thread': {'get_ident': None}})
+        with mock.patch.dict(sys.modules, {'gevent.monkey': monkey}):
+            self.assertTrue(profiling._threads_are_greenlets())  # pylint: disable=protected-access
+
+    @override_settings(PROFILING_SLOW_REQUEST_SECONDS=3600)
+    def test_fast(self):
+        """Verify that requests faster than the threshold are not profiled."""
+        self.client.get(reverse('api:v1:organizations-list'))
+        self.assertEqual(self._get_profiles(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_MAX_PROFILES=2)
+    def test_ring_buffer(self):
+        """Verify that only the latest profiles are kept."""
+        for _ in range(3):
+            self.client.get(reverse('health'))
+        self.assertEqual(len(self._get_profiles()), 2)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_endpoints(self):
+        """Verify that profiles can be listed and fetched by staff only."""
+        self.client.get(reverse('health'))
+        profile_id = profiling.list_profile_ids()[0]
+
+        with override_settings(PROFILING_SAMPLE_RATE=0):
+            response = self.client.get(reverse('profiles'))
+            self.assertEqual(response.status_code, 200)
+            results = json.loads(response.content)['results']
+            self.assertEqual([summary['id'] for summary in results], [profile_id])
+            self.assertNotIn('report', results[0])
+
+            response = self.client.get(reverse('profile_detail', kwargs={'profile_id': profile_id}))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('report', json.loads(response.content))
+
+            response = self.client.get(reverse('profile_detail', kwargs={'profile_id': 'unknown'}))
+            self.assertEqual(response.status_code, 404)
+
+            self.client.logout()
+            response = self.client.get(reverse('profiles'))
+            self.assertEqual(response.status_code, 302)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_command(self):
+        """Verify that the management command lists and dumps profiles."""
+        self.client.get(reverse('health'))
+        profile_id = profiling.list_profile_ids()[0]
+
+        stdout = StringIO()
+        call_command('request_profiles', stdout=stdout)
+        self.assertIn(profile_id, stdout.getvalue())
+
+        stdout = StringIO()
+        call_command('request_profiles', profile_id, stdout=stdout)
+        self.assertIn('SQL statements', stdout.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('request_profiles', 'unknown')
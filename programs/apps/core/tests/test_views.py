@@ -1,4 +1,7 @@
 """Test core.views."""
+from collections import OrderedDict
+import datetime
+import json
 
 from django.db import DatabaseError
 from django.conf import settings
@@ -6,8 +9,10 @@ from django.contrib.auth import get_user_model
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from django.test.utils import override_settings
+from django.utils import timezone
 import mock
 
+from programs.apps.core import health
 from programs.apps.core.constants import Status
 
 
@@ -19,14 +24,48 @@ class HealthTests(TestCase):
 
     def test_all_services_available(self):
         """Test that the endpoint reports when all services are healthy."""
-        self._assert_health(200, Status.OK, Status.OK)
+        self._assert_health(200, Status.OK, Status.OK, Status.OK, Status.OK)
 
     def test_database_outage(self):
         """Test that the endpoint reports when the database is unavailable."""
         with mock.patch('django.db.backends.base.base.BaseDatabaseWrapper.cursor', side_effect=DatabaseError):
-            self._assert_health(503, Status.UNAVAILABLE, Status.UNAVAILABLE)
+            self._assert_health(503, Status.UNAVAILABLE, Status.UNAVAILABLE, Status.OK, Status.OK)
+
+    def test_storage_outage(self):
+        """Test that the endpoint reports when media storage is unavailable."""
+        with mock.patch('programs.apps.core.health.default_storage.exists', side_effect=IOError):
+            self._assert_health(503, Status.UNAVAILABLE, Status.OK, Status.UNAVAILABLE, Status.OK)
+
+    def test_cache_outage(self):
+        """Test that the endpoint reports when the cache is unavailable."""
+        with mock.patch('programs.apps.core.health.cache.get', return_value=None):
+            self._assert_health(503, Status.UNAVAILABLE, Status.OK, Status.OK, Status.UNAVAILABLE)
+
+    @override_settings(HEALTH_CHECK_INTERVAL=60)
+    def test_cached_result(self):
+        """Test that, with background probes enabled, the endpoint serves the latest result without probing."""
+        monitor = health.HealthMonitor(OrderedDict([('database_status', mock.Mock())]))
+        monitor.result = health.HealthResult(OrderedDict([('database_status', Status.OK)]), timezone.now())
+        monitor._thread = mock.Mock()  # pylint: disable=protected-access
+
+        with mock.patch('programs.apps.core.views.health_monitor', monitor):
+            response = self.client.get(reverse('health'))
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(monitor.probes['database_status'].called)
+
+            # results which are too old are not trusted.
+            monitor.result = monitor.result._replace(checked_at=timezone.now() - datetime.timedelta(minutes=5))
+            response = self.client.get(reverse('health'))
+            self.assertEqual(response.status_code, 503)
+
+    def test_liveness(self):
+        """Test that the liveness endpoint reports the service as running, without probing other services."""
+        with mock.patch('django.db.backends.base.base.BaseDatabaseWrapper.cursor', side_effect=DatabaseError):
+            response = self.client.get(reverse('liveness'))
+        self.assertEqual(response.status_code, 200)
+        self.assertJSONEqual(response.content, {'status': Status.OK})
 
-    def _assert_health(self, status_code, overall_status, database_status):
+    def _assert_health(self, status_code, overall_status, database_status, storage_status, cache_status):
         """Verify that the response matches expectations."""
         response = self.client.get(reverse('health'))
         self.assertEqual(response.status_code, status_code)
@@ -34,12 +73,15 @@ class HealthTests(TestCase):
 
         expected_data = {
             'overall_status': overall_status,
+            'checked_at': mock.ANY,
             'detailed_status': {
-                'database_status': database_status
+                'database_status': database_status,
+                'storage_status': storage_status,
+                'cache_status': cache_status,
             }
         }
 
-        self.assertJSONEqual(response.content, expected_data)
+        self.assertEqual(json.loads(response.content), expected_data)
 
 
 class AutoAuthTests(TestCase):
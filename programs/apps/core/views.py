@@ -2,15 +2,20 @@
 import logging
 import uuid
 
-from django.db import transaction, connection, DatabaseError
-from django.http import JsonResponse
+from django.db import transaction
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.conf import settings
 from django.contrib.auth import get_user_model, login, authenticate
 from django.http import Http404
 from django.shortcuts import redirect
+from django.utils.crypto import constant_time_compare
 from django.views.generic import View
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from programs.apps.core.constants import Status
+from programs.apps.core import metrics as core_metrics, profiling
+from programs.apps.core.health import monitor as health_monitor
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -20,7 +25,8 @@ User = get_user_model()
 def health(_):
     """Allows a load balancer to verify this service is up.
 
-    Checks the status of the database connection on which this service relies.
+    Reports the latest status of the services on which this service relies (database, media storage and cache),
+    as determined by background probes, along with the time of the probes.  See `programs.apps.core.health`.
 
     Returns:
         HttpResponse: 200 if the service is available, with JSON data indicating the health of each required service
@@ -31,25 +37,17 @@ def health(_):
         >>> response.status_code
         200
         >>> response.content
-        '{"overall_status": "OK", "detailed_status": {"database_status": "OK", "lms_status": "OK"}}'
+        '{"overall_status": "OK", "checked_at": "2016-01-01T00:00:00Z", "detailed_status": {"database_status": "OK",
+        "storage_status": "OK", "cache_status": "OK"}}'
     """
-
-    try:
-        cursor = connection.cursor()
-        cursor.execute("SELECT 1")
-        cursor.fetchone()
-        cursor.close()
-        database_status = Status.OK
-    except DatabaseError:
-        database_status = Status.UNAVAILABLE
-
-    overall_status = Status.OK if (database_status == Status.OK) else Status.UNAVAILABLE
+    result = health_monitor.get_result()
+    available = all(status == Status.OK for status in result.statuses.values())
+    overall_status = Status.OK if available else Status.UNAVAILABLE
 
     data = {
         'overall_status': overall_status,
-        'detailed_status': {
-            'database_status': database_status,
-        },
+        'checked_at': result.checked_at,
+        'detailed_status': result.statuses,
     }
 
     if overall_status == Status.OK:
@@ -58,6 +56,69 @@ def health(_):
         return JsonResponse(data, status=503)
 
 
+@transaction.non_atomic_requests
+def liveness(_):
+    """Allows a process supervisor to verify this service is running.
+
+    Unlike the health endpoint, this doesn't depend on any other service.
+
+    Returns:
+        HttpResponse: 200, with JSON data indicating that the service is running.
+    """
+    return JsonResponse({'status': Status.OK})
+
+
+@transaction.non_atomic_requests
+def metrics(request):
+    """Exposes request metrics to Prometheus.
+
+    See `programs.apps.core.metrics` for the metrics recorded.  Only staff users, and
+    requests sending the METRICS_TOKEN setting as a bearer token, may read them.
+
+    Returns:
+        HttpResponse: 200, with the metrics in the Prometheus text exposition format.
+        HttpResponse: 403 if the request may not read the metrics.
+    """
+    if not (request.user.is_staff or _has_metrics_token(request)):
+        return HttpResponseForbidden()
+
+    registry = core_metrics.get_registry()
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def _has_metrics_token(request):
+    """Whether the request's Authorization header holds the METRICS_TOKEN bearer token."""
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and constant_time_compare(header, 'Bearer {}'.format(token))
+
+
+@staff_member_required
+def profiles(_):
+    """Lists the request profiles captured by `programs.apps.core.profiling`, most recent first.
+
+    Returns:
+        HttpResponse: 200, with JSON data describing the profiled requests.
+    """
+    summaries = [profiling.summarize_profile(profiling.load_profile(profile_id))
+                 for profile_id in profiling.list_profile_ids()]
+    return JsonResponse({'results': summaries})
+
+
+@staff_member_required
+def profile_detail(_, profile_id):
+    """Returns a request profile captured by `programs.apps.core.profiling`.
+
+    Returns:
+        HttpResponse: 200, with JSON data containing the profile's report and SQL statements.
+        HttpResponse: 404 if there is no such profile.
+    """
+    profile = profiling.load_profile(profile_id)
+    if profile is None:
+        raise Http404
+    return JsonResponse(profile)
+
+
 class AutoAuth(View):
     """Creates and authenticates a new User with superuser permissions.
 
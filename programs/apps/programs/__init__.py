@@ -0,0 +1 @@
+default_app_config = 'programs.apps.programs.apps.ProgramsConfig'
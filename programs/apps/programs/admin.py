@@ -1,14 +1,30 @@
 """Admin for programs models."""
 from django import forms
 from django.contrib import admin
+from django.db.models import Q
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
 from solo.admin import SingletonModelAdmin
 
-from programs.apps.programs import models
+from programs.apps.programs import models, search
+from programs.apps.programs.course_keys import parse_course_run_key
 from programs.apps.programs.image_helpers import validate_image_type, validate_image_size
 
 
+class IndexedSearchMixin(object):
+    """
+    Searches the admin's change list using the search index, rather than
+    scanning the `search_fields`, which must be indexed fields of the model
+    (or of the related rows indexed along with it).
+    See `programs.apps.programs.search`.
+    """
+
+    def get_search_results(self, request, queryset, search_term):  # pylint: disable=unused-argument
+        """Find all the rows having every word of the search term, whole or as a prefix."""
+        if not search_term:
+            return queryset, False
+        return search.filter_queryset(queryset, search_term), False
+
+
 class ProgramOrganizationInline(admin.TabularInline):
     """Tabular inline for the ProgramOrganization model."""
     model = models.ProgramOrganization
@@ -39,17 +55,17 @@ class ProgramForm(forms.ModelForm):
         return self.cleaned_data['banner_image']
 
 
-class ProgramAdmin(admin.ModelAdmin):
+class ProgramAdmin(IndexedSearchMixin, admin.ModelAdmin):
     """Admin for the Program model."""
     form = ProgramForm
-    list_display = ('name', 'status', 'category')
+    list_display = ('name', 'status', 'category', 'organization_key')
     list_filter = ('status', 'category')
-    search_fields = ('name',)
+    search_fields = ('name', 'subtitle')
     fields = ('name', 'category', 'status', 'subtitle', 'marketing_slug', 'banner_image')
     inlines = (ProgramOrganizationInline,)
 
 
-class OrganizationAdmin(admin.ModelAdmin):
+class OrganizationAdmin(IndexedSearchMixin, admin.ModelAdmin):
     """Admin for the Organization model."""
     list_display = ('display_name', 'key')
     search_fields = ('display_name', 'key')
@@ -63,10 +79,10 @@ class ProgramOrganizationAdmin(admin.ModelAdmin):
     raw_id_fields = ('program', 'organization')
 
 
-class CourseCodeAdmin(admin.ModelAdmin):
+class CourseCodeAdmin(IndexedSearchMixin, admin.ModelAdmin):
     """Admin for the CourseCode model."""
     list_display = ('display_name', 'key', 'organization')
-    search_fields = ('display_name', 'key', 'organization__display_name')
+    search_fields = ('display_name', 'key', 'organization__display_name', 'organization__key')
     fields = ('key', 'organization', 'display_name')
     raw_id_fields = ('organization',)
     inlines = (ProgramCourseCodeInline,)
@@ -79,6 +95,15 @@ class ProgramCourseCodeAdmin(admin.ModelAdmin):
     fields = ('program', 'course_code', 'position')
     raw_id_fields = ('program', 'course_code')
 
+    def get_search_results(self, request, queryset, search_term):
+        """Find the associations of the programs or course codes matching the search term in the search index."""
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            Q(program_id__in=search.filter_queryset(models.Program.objects.all(), search_term).values('pk')) |
+            Q(course_code_id__in=search.filter_queryset(models.CourseCode.objects.all(), search_term).values('pk'))
+        ), False
+
 
 class ProgramCourseRunModeForm(forms.ModelForm):
     """Model form for ProgramCourseCode model. Adding custom validation for
@@ -89,7 +114,7 @@ class ProgramCourseRunModeForm(forms.ModelForm):
         """Clean the course key to make sure format is valid."""
         course_key = self.cleaned_data['course_key']
         try:
-            CourseKey.from_string(course_key)
+            parse_course_run_key(course_key)
         except InvalidKeyError:
             raise forms.ValidationError('Invalid CourseKey {course_key}!'.format(
                 course_key=course_key
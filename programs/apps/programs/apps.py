@@ -0,0 +1,10 @@
+"""App configuration for the programs app."""
+from django.apps import AppConfig
+
+
+class ProgramsConfig(AppConfig):
+    """Connects the app's signal receivers once the app registry is ready."""
+    name = 'programs.apps.programs'
+
+    def ready(self):
+        from programs.apps.programs import signals  # pylint: disable=unused-variable
@@ -0,0 +1,97 @@
+"""
+Synthetic program catalogs for benchmarks.
+
+`build_catalog` produces the API representation of a catalog shaped like a
+production one: a few organizations, each offering programs of several course
+codes, each with runs in a couple of modes.  Generation is seeded, so that
+benchmarks are comparable from one run to the next.
+"""
+from collections import OrderedDict
+import datetime
+import random
+import uuid
+
+from programs.apps.programs.constants import ProgramCategory, ProgramStatus
+
+
+WORDS = (
+    'introduction', 'advanced', 'data', 'science', 'analysis', 'design', 'systems', 'principles', 'history',
+    'modern', 'applied', 'foundations', 'computing', 'business', 'management', 'engineering', 'statistics',
+    'learning', 'health', 'policy', 'economics', 'architecture', 'writing', 'biology', 'chemistry',
+)
+# French titles, since many catalogs aren't only in English.
+ACCENTED_WORDS = (u'soci\xe9t\xe9', u'\xe9conomie', u'donn\xe9es', u'sant\xe9', u'g\xe9ographie', u'fran\xe7ais')
+MODES = ('verified', 'professional', 'honor', 'audit')
+BANNER_SIZES = ((1440, 480), (726, 242), (435, 145), (348, 116))
+
+
+def _title(rand, word_count):
+    """Return a random title of the given number of words."""
+    return u' '.join(rand.choice(WORDS + ACCENTED_WORDS) for __ in range(word_count)).title()
+
+
+def _timestamp(rand):
+    """Return a random timestamp, formatted as the API formats them."""
+    moment = datetime.datetime(2015, 1, 1) + datetime.timedelta(seconds=rand.randint(0, 2 * 365 * 24 * 3600))
+    return moment.isoformat() + 'Z'
+
+
+def build_catalog(program_count, organization_count=20, course_codes_per_program=5, seed=0):
+    """
+    Build the API representation of a synthetic catalog.
+
+    Returns:
+        list of program representations, as OrderedDicts.
+    """
+    rand = random.Random(seed)
+    organizations = [
+        OrderedDict([('display_name', u'{} University'.format(_title(rand, 2))), ('key', 'Org{}X'.format(i))])
+        for i in range(organization_count)
+    ]
+
+    catalog = []
+    for program_id in range(1, program_count + 1):
+        organization = rand.choice(organizations)
+        program_uuid = uuid.UUID(int=rand.getrandbits(128), version=4)
+        course_codes = []
+        for position in range(course_codes_per_program):
+            key = '{}{}x'.format(rand.choice(WORDS)[:4].upper(), 100 * program_id + position)
+            run_modes = []
+            for run in ('1T2016', '3T2016', '1T2017')[:rand.randint(1, 3)]:
+                for mode in rand.sample(MODES, 2):
+                    run_modes.append(OrderedDict([
+                        ('course_key', 'course-v1:{}+{}+{}'.format(organization['key'], key, run)),
+                        ('mode_slug', mode),
+                        ('sku', '{:07X}'.format(rand.getrandbits(28)) if mode != 'audit' else ''),
+                        ('start_date', _timestamp(rand)),
+                        ('run_key', run),
+                    ]))
+            course_codes.append(OrderedDict([
+                ('display_name', _title(rand, 3)),
+                ('key', key),
+                ('organization', organization),
+                ('run_modes', run_modes),
+            ]))
+
+        created = _timestamp(rand)
+        catalog.append(OrderedDict([
+            ('id', program_id),
+            ('name', _title(rand, 4)),
+            ('subtitle', _title(rand, 8)),
+            ('category', rand.choice((ProgramCategory.XSERIES, ProgramCategory.MICROMASTERS))),
+            ('status', rand.choice((ProgramStatus.ACTIVE, ProgramStatus.ACTIVE, ProgramStatus.RETIRED))),
+            ('marketing_slug', 'program-{}'.format(program_id)),
+            ('organizations', [organization]),
+            ('course_codes', course_codes),
+            ('created', created),
+            ('modified', max(created, _timestamp(rand))),
+            ('banner_image_urls', {
+                'w{}h{}'.format(*size): 'https://programs.example.com/media/program/banner/{}__{}x{}.jpg'.format(
+                    program_uuid, *size
+                )
+                for size in BANNER_SIZES
+            }),
+            ('uuid', str(program_uuid)),
+        ]))
+
+    return catalog
@@ -0,0 +1,476 @@
+"""
+Creation and update of many programs at once.
+
+`write_programs` takes the validated data of many programs (see
+`programs.apps.api.serializers.BulkProgramSerializer`), each of which either
+creates a new program or, given the id or uuid of an existing one, updates it.
+The rows they reference are validated set-wise, with one query for each table
+rather than queries for each program, and the valid programs are then written
+in a single transaction, inserting new rows in bulk.
+
+Bulk inserts send no signals, so the change log entries, search index entries
+and document rebuilds which the receivers in `programs.apps.programs.signals` otherwise take care of
+are made here.  Rows which are updated or deleted one at a time, which should
+be the exception, still send them.
+"""
+from collections import defaultdict, namedtuple, OrderedDict
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils.translation import ugettext as _
+
+from programs.apps.programs import changes, documents, models, search
+from programs.apps.programs.constants import ChangeOperation, ProgramCategory, ProgramStatus
+from programs.apps.programs.course_keys import parse_course_run_key
+
+
+# The outcome of writing one program: the program written, and whether it was
+# created, or the errors which prevented it from being written.
+WriteResult = namedtuple('WriteResult', ['program', 'created', 'errors'])
+
+# What is written for a valid item: the program it creates or updates.
+_Plan = namedtuple('_Plan', ['index', 'item', 'program', 'created'])
+
+# Fields which must be given to create a program.
+CREATE_REQUIRED_FIELDS = ('name', 'category', 'organizations')
+
+# Fields of programs which may be written.
+PROGRAM_FIELDS = ('name', 'subtitle', 'category', 'status', 'marketing_slug')
+
+# Fields of run modes which may be updated, given the fields identifying them.
+RUN_MODE_FIELDS = ('start_date', )
+
+
+def _course_code_key(course_code):
+    """Return the (organization key, key) identifying a course code's data."""
+    return course_code['organization']['key'], course_code['key']
+
+
+def _run_mode_key(run_mode):
+    """Return the (course key, mode slug, sku) identifying a run mode, given its data or instance."""
+    if isinstance(run_mode, models.ProgramCourseRunMode):
+        return run_mode.course_key, run_mode.mode_slug, run_mode.sku
+    return run_mode['course_key'], run_mode['mode_slug'], run_mode.get('sku', '')
+
+
+def write_programs(items, bump_versions=True):
+    """
+    Validate and write the given programs, in a single transaction.
+
+    Arguments:
+        items (list): the validated data of each program.  Items with an `id` or
+            `uuid` update the identified program, and others create new ones.
+            Nested `course_codes`, when given, replace those of the program.
+        bump_versions (bool): whether to increment the versions of the updated
+            programs, which callers may already have done (see `Program.bump_version`).
+
+    Returns:
+        list of WriteResult, in the order of `items`.  Invalid items are not written,
+        but don't prevent the valid ones from being written.
+    """
+    with documents.deferred_rebuild():
+        with transaction.atomic():
+            batch = _Batch(items)
+            batch.validate()
+            batch.apply(bump_versions)
+    return batch.results
+
+
+class _Batch(object):
+    """
+    The state of writing a batch of programs: the rows they reference, loaded
+    up front, and what is written for each valid item.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.results = [None] * len(items)
+        self.plans = []
+
+        ids = {item['id'] for item in items if 'id' in item}
+        uuids = {item['uuid'] for item in items if 'uuid' in item}
+        self.programs_by_id, self.programs_by_uuid = {}, {}
+        if ids or uuids:
+            # locked, so that nothing changes the programs (or their position counters) concurrently.
+            for program in models.Program.objects.select_for_update().filter(Q(id__in=ids) | Q(uuid__in=uuids)):
+                self.programs_by_id[program.id] = program
+                self.programs_by_uuid[program.uuid] = program
+
+        # keyed by lowercased name, which matches as the database's collation does when it is case-insensitive.
+        names = {item['name'] for item in items if 'name' in item}
+        self.name_owners = {
+            name.lower(): program_id
+            for name, program_id in models.Program.objects.filter(name__in=names).values_list('name', 'id')
+        }
+
+        course_code_keys = {
+            _course_code_key(course_code) for item in items for course_code in item.get('course_codes', [])
+        }
+        organization_keys = {key for key, __ in course_code_keys} | {
+            organization['key'] for item in items for organization in item.get('organizations', [])
+        }
+        self.organizations = {
+            organization.key: organization
+            for organization in models.Organization.objects.filter(key__in=organization_keys)
+        }
+        self.course_codes = self._get_course_codes(course_code_keys)
+
+        # the current course codes and run modes of the programs whose course codes are replaced.
+        replaced_ids = set()
+        for item in items:
+            program = self.programs_by_id.get(item.get('id')) or self.programs_by_uuid.get(item.get('uuid'))
+            if program is not None and 'course_codes' in item:
+                replaced_ids.add(program.id)
+        self.program_course_codes = defaultdict(OrderedDict)
+        for program_course_code in models.ProgramCourseCode.objects.filter(
+                program_id__in=replaced_ids).select_related('course_code__organization'):
+            course_code = program_course_code.course_code
+            self.program_course_codes[program_course_code.program_id][
+                (course_code.organization.key, course_code.key)] = program_course_code
+        self.run_modes = defaultdict(list)
+        for run_mode in models.ProgramCourseRunMode.objects.filter(program_course_code__program_id__in=replaced_ids):
+            self.run_modes[run_mode.program_course_code_id].append(run_mode)
+
+    @staticmethod
+    def _get_course_codes(keys):
+        """
+        Look up the existing course codes among those with the given (organization key, key), with one query.
+        """
+        queryset = models.CourseCode.objects.filter(
+            organization__key__in={organization_key for organization_key, __ in keys},
+            key__in={key for __, key in keys},
+        ).select_related('organization')
+        course_codes = {(course_code.organization.key, course_code.key): course_code for course_code in queryset}
+        return {key: course_code for key, course_code in course_codes.items() if key in keys}
+
+    def validate(self):
+        """
+        Validate each item against the loaded rows, and against the items preceding it.
+        """
+        claimed_names, written_ids = set(), set()
+        for index, item in enumerate(self.items):
+            program, errors = self._get_program(item)
+            if program is not None and program.id in written_ids:
+                errors = {'id': [_('A program may only be written once per request.')]}
+            if not errors:
+                errors = self._validate_item(item, program, claimed_names)
+
+            if errors:
+                self.results[index] = WriteResult(None, False, errors)
+                continue
+
+            created = program is None
+            if created:
+                program = self._build_program(item)
+            else:
+                written_ids.add(program.id)
+            if 'name' in item:
+                claimed_names.add(item['name'].lower())
+            self.plans.append(_Plan(index, item, program, created))
+
+    def _get_program(self, item):
+        """
+        Return the program updated by an item, or None if it creates one, and any error finding it.
+        """
+        if 'id' in item:
+            program = self.programs_by_id.get(item['id'])
+            if program is None or ('uuid' in item and program.uuid != item['uuid']):
+                return None, {'id': [_('No such program.')]}
+            return program, {}
+        if 'uuid' in item:
+            program = self.programs_by_uuid.get(item['uuid'])
+            if program is None:
+                return None, {'uuid': [_('No such program.')]}
+            return program, {}
+        return None, {}
+
+    def _validate_item(self, item, program, claimed_names):
+        """
+        Validate an item, which updates `program`, or creates a program if it is None.
+
+        Returns:
+            dict of the errors of each field, which is empty if the item is valid.
+        """
+        errors = {}
+        if program is None:
+            for name in CREATE_REQUIRED_FIELDS:
+                if name not in item:
+                    errors[name] = [_('This field is required.')]
+            if item.get('status', ProgramStatus.UNPUBLISHED) != ProgramStatus.UNPUBLISHED:
+                error_msg = _("When creating a Program, '{status}' is not a valid choice.")
+                errors['status'] = [error_msg.format(status=item['status'])]
+
+        if 'name' in item:
+            owner_id = self.name_owners.get(item['name'].lower())
+            if item['name'].lower() in claimed_names or owner_id not in (None, getattr(program, 'id', None)):
+                errors['name'] = [_('Program with this name already exists.')]
+
+        organization_error = self._validate_organizations(item, program)
+        if organization_error:
+            errors['organizations'] = [organization_error]
+
+        # the rule enforced by `Program.save`, which programs created in bulk don't go through.
+        values = {name: item.get(name, getattr(program, name, '')) for name in PROGRAM_FIELDS}
+        if values['category'] == ProgramCategory.XSERIES and values['status'] == ProgramStatus.ACTIVE:
+            if not values['marketing_slug']:
+                errors['marketing_slug'] = [_('Active XSeries Programs must have a valid marketing slug.')]
+
+        if 'course_codes' in item and not errors:
+            organization_key = item['organizations'][0]['key'] if program is None else program.organization_key
+            course_code_error = self._validate_course_codes(item['course_codes'], organization_key, program)
+            if course_code_error:
+                errors['course_codes'] = [course_code_error]
+
+        return errors
+
+    def _validate_organizations(self, item, program):
+        """Return the error of an item's organizations, if any."""
+        keys = [organization['key'] for organization in item.get('organizations', [])]
+        if program is not None:
+            if 'organizations' in item and keys != [program.organization_key]:
+                return _('The organizations of an existing Program cannot be changed.')
+        elif 'organizations' in item:
+            if len(keys) != 1:
+                return _('Provide exactly one valid/existing Organization while creating a Program.')
+            if keys[0] not in self.organizations:
+                return _("Provided Organization with key '{org_key}' doesn't exist.").format(org_key=keys[0])
+        return None
+
+    def _validate_course_codes(self, course_codes, organization_key, program):
+        """Return the first error of an item's course codes, if any."""
+        current = self.program_course_codes[program.id] if program is not None else {}
+        seen = set()
+        for course_code in course_codes:
+            key = _course_code_key(course_code)
+            if key in seen:
+                return _('Duplicate course codes are not allowed in a program.')
+            seen.add(key)
+
+            if key[0] not in self.organizations:
+                return _('Invalid organization key.')
+            if key[0] != organization_key:
+                return _('Course code must be offered by the same organization offering the program.')
+
+            run_mode_keys = [_run_mode_key(run_mode) for run_mode in course_code.get('run_modes', [])]
+            if len(set(run_mode_keys)) != len(run_mode_keys):
+                return _('Duplicate course run modes are not allowed for course codes in a program.')
+
+            # existing run modes may be given by the fields identifying them alone.
+            program_course_code = current.get(key)
+            existing = {_run_mode_key(run_mode) for run_mode in self.run_modes[program_course_code.id]} \
+                if program_course_code is not None else set()
+            for run_mode in course_code.get('run_modes', []):
+                if 'start_date' not in run_mode and _run_mode_key(run_mode) not in existing:
+                    return _('A start date is required to create a run mode.')
+        return None
+
+    def _build_program(self, item):
+        """Build the (unsaved) program created by a valid item."""
+        organization = self.organizations[item['organizations'][0]['key']]
+        program = models.Program(**{name: item[name] for name in PROGRAM_FIELDS if name in item})
+        # maintained by signal receivers when saving one program at a time.
+        program.organization_id, program.organization_key = organization.id, organization.key
+        program.last_course_code_position = len(item.get('course_codes', []))
+        return program
+
+    def apply(self, bump_versions):
+        """
+        Write the valid items, and record what was written.
+        """
+        self._write_course_codes()
+        self._create_programs([plan.program for plan in self.plans if plan.created])
+        updated = [plan for plan in self.plans if not plan.created]
+        for plan in updated:
+            self._update_program(plan.program, plan.item)
+        if updated and bump_versions:
+            # the programs are locked, so that their versions are known to be incremented by one.
+            models.Program.objects.filter(id__in=[plan.program.id for plan in updated]).update(
+                version=F('version') + 1
+            )
+            for plan in updated:
+                plan.program.version += 1
+        self._write_program_course_codes([plan for plan in self.plans if 'course_codes' in plan.item])
+
+        for plan in self.plans:
+            self.results[plan.index] = WriteResult(plan.program, plan.created, None)
+        # the versions of the programs were set or incremented above, or by the caller.
+        documents.skip_version_bumps([plan.program.id for plan in self.plans])
+        documents.schedule_rebuild([plan.program.id for plan in self.plans])
+
+    def _write_course_codes(self):
+        """
+        Create the course codes which don't exist yet, in bulk, and rename existing ones.
+        """
+        new, renamed = OrderedDict(), OrderedDict()
+        for plan in self.plans:
+            for data in plan.item.get('course_codes', []):
+                key = _course_code_key(data)
+                course_code = self.course_codes.get(key) or new.get(key)
+                if course_code is None:
+                    new[key] = models.CourseCode(
+                        organization=self.organizations[key[0]], key=key[1], display_name=data.get('display_name', '')
+                    )
+                elif data.get('display_name', course_code.display_name) != course_code.display_name:
+                    course_code.display_name = data['display_name']
+                    if course_code.pk is not None:
+                        renamed[key] = course_code
+
+        for course_code in renamed.values():
+            course_code.save(update_fields=['display_name', 'modified'])
+
+        if new:
+            models.CourseCode.objects.bulk_create(new.values())
+            self.course_codes.update(self._get_course_codes(set(new)))
+            changes.record_changes(
+                models.CourseCode, [self.course_codes[key].id for key in new], ChangeOperation.CREATE
+            )
+            search.index(models.CourseCode, [self.course_codes[key] for key in new], created=True)
+
+    @staticmethod
+    def _create_programs(programs):
+        """
+        Create new programs and their associations with organizations, in bulk.
+        """
+        if not programs:
+            return
+
+        models.Program.objects.bulk_create(programs)
+        # the ids of rows inserted in bulk aren't returned by every database, but uuids are known up front.
+        program_ids = dict(
+            models.Program.objects.filter(uuid__in=[program.uuid for program in programs]).values_list('uuid', 'id')
+        )
+        for program in programs:
+            program.id = program_ids[program.uuid]
+
+        models.ProgramOrganization.objects.bulk_create([
+            models.ProgramOrganization(program_id=program.id, organization_id=program.organization_id)
+            for program in programs
+        ])
+        changes.record_changes(models.Program, sorted(program_ids.values()), ChangeOperation.CREATE)
+        search.index(models.Program, programs, created=True)
+        changes.record_changes(
+            models.ProgramOrganization,
+            models.ProgramOrganization.objects.filter(program_id__in=program_ids.values()).values_list('id', flat=True),
+            ChangeOperation.CREATE,
+        )
+
+    @staticmethod
+    def _update_program(program, item):
+        """Save the fields of an existing program which an item changes, if any."""
+        changed = [name for name in PROGRAM_FIELDS if name in item and item[name] != getattr(program, name)]
+        if changed:
+            for name in changed:
+                setattr(program, name, item[name])
+            program.save(update_fields=changed + ['modified'])
+
+    def _write_program_course_codes(self, plans):
+        """
+        Replace the course codes of the programs of the given plans with those they request,
+        creating new associations and run modes in bulk.
+        """
+        deleted_ids, deleted_run_mode_ids, created, created_run_modes = [], [], [], []
+        for plan in plans:
+            current = self.program_course_codes[plan.program.id]
+            requested = OrderedDict((_course_code_key(data), data) for data in plan.item['course_codes'])
+            deleted_ids.extend(
+                program_course_code.id for key, program_course_code in current.items() if key not in requested
+            )
+
+            position = 0 if plan.created else plan.program.last_course_code_position
+            for key, data in requested.items():
+                program_course_code = current.get(key)
+                if program_course_code is None:
+                    position += 1
+                    program_course_code = models.ProgramCourseCode(
+                        program_id=plan.program.id, course_code=self.course_codes[key], position=position
+                    )
+                    created.append((program_course_code, data.get('run_modes', [])))
+                elif 'run_modes' in data:
+                    run_mode_ids, run_modes = self._diff_run_modes(
+                        program_course_code, self.run_modes[program_course_code.id], data['run_modes']
+                    )
+                    deleted_run_mode_ids.extend(run_mode_ids)
+                    created_run_modes.extend(run_modes)
+
+            if position != plan.program.last_course_code_position:
+                # the program is locked, so that its counter can simply be set.
+                models.Program.objects.filter(pk=plan.program.pk).update(last_course_code_position=position)
+                plan.program.last_course_code_position = position
+
+        if deleted_run_mode_ids:
+            models.ProgramCourseRunMode.objects.filter(id__in=deleted_run_mode_ids).delete()
+        if deleted_ids:
+            models.ProgramCourseCode.objects.filter(id__in=deleted_ids).delete()
+
+        if created:
+            self._create_program_course_codes([program_course_code for program_course_code, __ in created])
+            created_run_modes.extend(
+                self._build_run_mode(program_course_code.id, data)
+                for program_course_code, run_modes in created for data in run_modes
+            )
+        if created_run_modes:
+            self._create_run_modes(created_run_modes)
+
+    def _diff_run_modes(self, program_course_code, current, requested):
+        """
+        Save the existing run modes of a course code whose requested fields changed.
+
+        Returns:
+            tuple of the ids of the existing run modes which weren't requested,
+            and the (unsaved) run modes which don't exist yet.
+        """
+        current = {_run_mode_key(run_mode): run_mode for run_mode in current}
+        created = []
+        for data in requested:
+            run_mode = current.pop(_run_mode_key(data), None)
+            if run_mode is None:
+                created.append(self._build_run_mode(program_course_code.id, data))
+                continue
+            changed = [name for name in RUN_MODE_FIELDS if name in data and data[name] != getattr(run_mode, name)]
+            if changed:
+                for name in changed:
+                    setattr(run_mode, name, data[name])
+                run_mode.save()
+        return [run_mode.id for run_mode in current.values()], created
+
+    @staticmethod
+    def _build_run_mode(program_course_code_id, data):
+        """Build an (unsaved) run mode of a course code from its data."""
+        return models.ProgramCourseRunMode(
+            program_course_code_id=program_course_code_id,
+            course_key=data['course_key'],
+            mode_slug=data['mode_slug'],
+            sku=data.get('sku', ''),
+            start_date=data['start_date'],
+            run_key=parse_course_run_key(data['course_key']).run,
+        )
+
+    @staticmethod
+    def _create_program_course_codes(program_course_codes):
+        """Insert new associations of programs with course codes in bulk, setting their ids."""
+        models.ProgramCourseCode.objects.bulk_create(program_course_codes)
+        ids = {
+            (program_id, position): program_course_code_id
+            for program_course_code_id, program_id, position in models.ProgramCourseCode.objects.filter(
+                program_id__in={program_course_code.program_id for program_course_code in program_course_codes}
+            ).values_list('id', 'program_id', 'position')
+        }
+        for program_course_code in program_course_codes:
+            program_course_code.id = ids[(program_course_code.program_id, program_course_code.position)]
+        changes.record_changes(
+            models.ProgramCourseCode, [program_course_code.id for program_course_code in program_course_codes],
+            ChangeOperation.CREATE,
+        )
+
+    @staticmethod
+    def _create_run_modes(run_modes):
+        """Insert new run modes in bulk."""
+        models.ProgramCourseRunMode.objects.bulk_create(run_modes)
+        keys = {(run_mode.program_course_code_id, ) + _run_mode_key(run_mode) for run_mode in run_modes}
+        created_ids = [
+            values[0] for values in models.ProgramCourseRunMode.objects.filter(
+                program_course_code_id__in={run_mode.program_course_code_id for run_mode in run_modes}
+            ).values_list('id', 'program_course_code_id', 'course_key', 'mode_slug', 'sku')
+            if values[1:] in keys
+        ]
+        changes.record_changes(models.ProgramCourseRunMode, created_ids, ChangeOperation.CREATE)
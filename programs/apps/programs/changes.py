@@ -0,0 +1,190 @@
+"""
+Maintenance of the catalog change log.
+
+Every save and deletion of a catalog row is recorded as a `CatalogChange`, by
+the receivers in `programs.apps.programs.signals`, so that clients can
+replicate the catalog by applying the changes made since the last one they saw,
+rather than fetching the whole catalog again.
+
+Clients resume from the sequence number of the last change they saw, so no
+change may ever become visible with a lower sequence number than one already
+seen.  Entries are therefore numbered once they are committed, rather than
+when they are logged (their ids are allocated in the order in which
+transactions start, not that in which they commit): `assign_sequences` numbers
+the committed entries which aren't numbered yet, after all the others, while
+holding a lock on the `ChangeLogCompaction` row, and only numbered entries are
+listed.  The change feed numbers entries before each read.
+
+Without compaction, the log would grow forever.  `compact` removes the entries
+superseded by later changes to the same rows, which no client needs since it
+fetches the current state of changed rows, so that at most one entry remains
+for each row.  It also removes deletions older than CHANGE_LOG_RETENTION_DAYS,
+and records the highest sequence number removed this way as the log's horizon:
+clients which last saw an earlier change must fetch the whole catalog again.
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.utils import timezone
+
+from programs.apps.core import db_routers
+from programs.apps.programs import models
+from programs.apps.programs.constants import ChangeOperation
+
+
+logger = logging.getLogger(__name__)
+
+# Models whose rows are logged.
+LOGGED_MODELS = (
+    models.Program,
+    models.Organization,
+    models.ProgramOrganization,
+    models.CourseCode,
+    models.ProgramCourseCode,
+    models.ProgramCourseRunMode,
+)
+
+# Maximum number of rows whose superseded entries are removed with a single query.
+COMPACTION_CHUNK_SIZE = 100
+
+
+def get_entity_type(model):
+    """Return the name under which changes to rows of the given model are logged."""
+    return model._meta.model_name  # pylint: disable=protected-access
+
+
+def record_change(instance, operation):
+    """
+    Append a change to the given model instance to the log.
+    """
+    models.CatalogChange.objects.create(
+        entity_type=get_entity_type(type(instance)),
+        entity_id=instance.pk,
+        operation=operation,
+    )
+
+
+def record_changes(model, entity_ids, operation):
+    """
+    Append the same change to many rows of the given model to the log, with a
+    single insert.  For rows written in bulk, which send no signals.
+    """
+    entity_type = get_entity_type(model)
+    models.CatalogChange.objects.bulk_create([
+        models.CatalogChange(entity_type=entity_type, entity_id=entity_id, operation=operation)
+        for entity_id in entity_ids
+    ])
+
+
+def get_horizon():
+    """
+    Return the highest sequence number of the changes removed from the log by compaction.
+    """
+    # not `get_solo`, which would write the initial row while reading.
+    return models.ChangeLogCompaction.objects.values_list('horizon', flat=True).first() or 0
+
+
+def assign_sequences():
+    """
+    Number the committed changes which aren't numbered yet, in order of id, after
+    all the changes already numbered, including those removed by compaction.
+    Numbers are unique and increasing, but not necessarily consecutive.
+
+    Returns:
+        int: the number of changes numbered.
+    """
+    with db_routers.use_primary():
+        if not models.CatalogChange.objects.filter(sequence__isnull=True).exists():
+            return 0
+        with transaction.atomic():
+            return _number_pending_changes(_lock_log().horizon)
+
+
+def _number_pending_changes(horizon):
+    """
+    Number the changes which aren't numbered yet, once the log is locked.
+    """
+    pending = models.CatalogChange.objects.filter(sequence__isnull=True)
+    bounds = pending.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return 0
+
+    latest = models.CatalogChange.objects.aggregate(latest=Max('sequence'))['latest'] or 0
+    # changes committed meanwhile with lower ids are numbered next time.
+    offset = max(latest, horizon) + 1 - bounds['first']
+    return pending.filter(id__range=(bounds['first'], bounds['last'])).update(sequence=F('id') + offset)
+
+
+def get_changes(since, limit):
+    """
+    Fetch the numbered changes following the one with sequence number `since`.
+
+    Returns:
+        list of at most `limit` CatalogChanges, ordered by sequence number.
+    """
+    return list(models.CatalogChange.objects.filter(sequence__gt=since).order_by('sequence')[:limit])
+
+
+def get_latest_sequence():
+    """
+    Return the sequence number of the latest numbered change, or 0 if there is none.
+    """
+    return models.CatalogChange.objects.aggregate(latest=Max('sequence'))['latest'] or 0
+
+
+def compact():
+    """
+    Remove superseded entries, and deletions older than CHANGE_LOG_RETENTION_DAYS, from the log.
+
+    Returns:
+        int: the number of entries removed.
+    """
+    assign_sequences()
+
+    removed = 0
+    with transaction.atomic():
+        compaction = _lock_log()
+        superseded = models.CatalogChange.objects.values('entity_type', 'entity_id').annotate(
+            latest=Max('id'), count=Count('id')
+        ).filter(count__gt=1).values_list('entity_type', 'entity_id', 'latest')
+
+        superseded = list(superseded)
+        for start in xrange(0, len(superseded), COMPACTION_CHUNK_SIZE):
+            condition = Q()
+            for entity_type, entity_id, latest in superseded[start:start + COMPACTION_CHUNK_SIZE]:
+                condition |= Q(entity_type=entity_type, entity_id=entity_id, id__lt=latest)
+            removed += _delete(models.CatalogChange.objects.filter(condition))
+
+        expired = models.CatalogChange.objects.filter(
+            operation=ChangeOperation.DELETE,
+            created__lt=timezone.now() - datetime.timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS),
+            sequence__isnull=False,
+        )
+        horizon = expired.aggregate(horizon=Max('sequence'))['horizon']
+        if horizon is not None:
+            removed += _delete(expired.filter(sequence__lte=horizon))
+            compaction.horizon = max(compaction.horizon, horizon)
+        compaction.compacted = timezone.now()
+        compaction.save()
+
+    logger.info('Removed %d entries from the change log, whose horizon is now %d.', removed, compaction.horizon)
+    return removed
+
+
+def _lock_log():
+    """
+    Fetch the state of the log's compaction, locking it until the end of the
+    transaction, so that changes are numbered, and compacted, by one process at a time.
+    """
+    models.ChangeLogCompaction.get_solo()
+    return models.ChangeLogCompaction.objects.select_for_update().get()
+
+
+def _delete(queryset):
+    """Delete the rows of a queryset, returning their number."""
+    count = queryset.count()
+    queryset.delete()
+    return count
@@ -0,0 +1,122 @@
+"""
+Evaluation of program completion.
+
+A learner completes a program by completing one run of each of the program's
+course codes, in one of the modes the program offers for that run.  Completion
+is evaluated against an in-process index of the requirements of all programs
+which can be completed, built with a single query and rebuilt whenever the
+catalog version changes (see `programs.apps.programs.documents.get_catalog_version`),
+so that evaluating many learners at once makes no queries at all.
+
+Course runs are identified by the parts of their keys (see
+`programs.apps.programs.course_index.parse_course_key`), so that either key
+format matches.
+"""
+from collections import OrderedDict
+import logging
+import threading
+
+from opaque_keys import InvalidKeyError
+
+from programs.apps.core import db_routers
+from programs.apps.programs import course_index, documents, models
+from programs.apps.programs.constants import ProgramStatus
+
+
+logger = logging.getLogger(__name__)
+
+# Only programs with these statuses can be completed.
+COMPLETABLE_STATUSES = (ProgramStatus.ACTIVE, ProgramStatus.RETIRED)
+
+# Stands for any mode of a completed run, when the mode isn't known.
+ANY_MODE = None
+
+_lock = threading.Lock()
+_index = None
+
+
+class CompletionIndex(object):
+    """
+    The requirements for completing each program, and the programs requiring each course run.
+    """
+
+    def __init__(self, version, rows):
+        """
+        Arguments:
+            version (str): the catalog version the index reflects.
+            rows (iterable): tuples of (program id, program uuid, program course code id, course run key,
+                mode slug) for each run mode of each course code, with None run key and mode slug for
+                course codes which have no run modes.
+        """
+        self.version = version
+        # program id -> (program uuid, {program course code id -> {CourseRef -> set of mode slugs}})
+        self.requirements = OrderedDict()
+        # CourseRef -> set of ids of the programs accepting that run
+        self.programs_by_run = {}
+
+        for program_id, program_uuid, course_code_id, course_key, mode_slug in rows:
+            __, course_codes = self.requirements.setdefault(program_id, (unicode(program_uuid), {}))
+            accepted_runs = course_codes.setdefault(course_code_id, {})
+            if course_key is None:
+                continue
+            try:
+                ref = course_index.parse_course_key(course_key)
+            except InvalidKeyError:
+                logger.warning('Ignoring the invalid course key [%s] of program [%s].', course_key, program_id)
+                continue
+            accepted_runs.setdefault(ref, set()).add(mode_slug)
+            self.programs_by_run.setdefault(ref, set()).add(program_id)
+
+    def get_completed_programs(self, completed_runs):
+        """
+        Find the programs completed by a learner.
+
+        Arguments:
+            completed_runs (dict): maps the CourseRef of each run the learner completed to the set of
+                modes in which they completed it, which may include ANY_MODE.
+
+        Returns:
+            list of (program id, program uuid) tuples, ordered by id.
+        """
+        candidates = set()
+        for ref in completed_runs:
+            candidates.update(self.programs_by_run.get(ref, ()))
+
+        completed = []
+        for program_id in sorted(candidates):
+            program_uuid, course_codes = self.requirements[program_id]
+            if all(self._is_satisfied(accepted_runs, completed_runs) for accepted_runs in course_codes.values()):
+                completed.append((program_id, program_uuid))
+        return completed
+
+    @staticmethod
+    def _is_satisfied(accepted_runs, completed_runs):
+        """Whether one of the runs accepted for a course code was completed, in one of the accepted modes."""
+        for ref, modes in accepted_runs.items():
+            completed_modes = completed_runs.get(ref)
+            if completed_modes and (ANY_MODE in completed_modes or completed_modes & modes):
+                return True
+        return False
+
+
+def get_index():
+    """
+    Return the completion index for the current catalog version, building it if necessary.
+    The index is built from the primary database, so that stale replica data is never kept.
+    """
+    global _index  # pylint: disable=global-statement
+    version = documents.get_catalog_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+
+    with _lock:
+        if _index is None or _index.version != version:
+            with db_routers.use_primary():
+                rows = models.ProgramCourseCode.objects.filter(
+                    program__status__in=COMPLETABLE_STATUSES
+                ).order_by('program_id').values_list(
+                    'program_id', 'program__uuid', 'id', 'run_modes__course_key', 'run_modes__mode_slug'
+                )
+                _index = CompletionIndex(version, rows)
+        return _index
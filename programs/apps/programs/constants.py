@@ -18,3 +18,11 @@ class ProgramStatus(object):
     ACTIVE = 'active'
     RETIRED = 'retired'
     DELETED = 'deleted'
+
+
+class ChangeOperation(object):
+    """Allowed values for CatalogChange.operation"""
+
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
@@ -0,0 +1,116 @@
+"""
+Lookup of the programs which include given courses.
+
+A course run key (e.g. `course-v1:edX+DemoX+Demo_2016`, or `edX/DemoX/Demo_2016`)
+matches the programs offering that run in one of their run modes, and a course
+key (e.g. `edX+DemoX`, or `edX/DemoX`) matches the programs including that
+course code.  Runs are matched on their organization, course and run parts,
+using the indexed `ProgramCourseRunMode.run_key` and the unique (organization,
+key) of course codes, so that a run matches whichever format its key is stored in.
+
+Results are cached in process, for each course key and role, until the catalog
+version changes (see `programs.apps.programs.documents.get_catalog_version`).
+"""
+from collections import defaultdict
+import re
+import threading
+
+from django.conf import settings
+from opaque_keys import InvalidKeyError
+
+from programs.apps.core import db_routers
+from programs.apps.programs import documents, models
+from programs.apps.programs.course_keys import CourseRef, parse_course_run_key
+
+COURSE_KEY_RE = re.compile(r'^(?:course-v1:)?(?P<org>[^+/:]+)[+/](?P<course>[^+/:]+)$')
+
+_lock = threading.Lock()
+_cache = {'version': None, 'results': {}}
+
+
+def parse_course_key(key):
+    """
+    Split a course run key or course key into its parts.
+
+    Returns:
+        CourseRef
+
+    Raises:
+        InvalidKeyError: if the key is neither a course run key nor a course key.
+    """
+    try:
+        return parse_course_run_key(key)
+    except InvalidKeyError:
+        match = COURSE_KEY_RE.match(key)
+        if match is None:
+            raise
+        return CourseRef(match.group('org'), match.group('course'), None)
+
+
+def find_programs(course_keys, role):
+    """
+    Find the programs visible to users with `role` which include each of the given courses.
+
+    Arguments:
+        course_keys (list): valid course run keys or course keys (see `parse_course_key`).
+        role (str): the role determining which programs are visible.
+
+    Returns:
+        dict mapping each course key to a tuple of (program id, program uuid) tuples, ordered by id.
+    """
+    version = documents.get_catalog_version()
+    with _lock:
+        if _cache['version'] != version:
+            _cache['version'], _cache['results'] = version, {}
+        results = {key: _cache['results'][role, key] for key in course_keys if (role, key) in _cache['results']}
+
+    missing = [key for key in course_keys if key not in results]
+    if missing:
+        found = _query_programs(missing, role)
+        results.update(found)
+        with _lock:
+            cached = _cache['results']
+            if _cache['version'] == version and len(cached) + len(found) <= settings.PROGRAM_COURSE_LOOKUP_CACHE_SIZE:
+                cached.update(((role, key), programs) for key, programs in found.items())
+
+    return results
+
+
+def _query_programs(course_keys, role):
+    """
+    Query the programs including the given courses, with at most one query for runs and one for courses.
+    Results are read from the primary database, so that stale replica data is never cached.
+    """
+    refs = {key: parse_course_key(key) for key in course_keys}
+    run_refs = [ref for ref in refs.values() if ref.run is not None]
+    course_refs = [ref for ref in refs.values() if ref.run is None]
+    statuses = documents.VISIBLE_STATUSES[role]
+    matches = defaultdict(set)
+
+    with db_routers.use_primary():
+        if run_refs:
+            rows = models.ProgramCourseRunMode.objects.filter(
+                run_key__in={ref.run for ref in run_refs},
+                program_course_code__course_code__key__in={ref.course for ref in run_refs},
+                program_course_code__course_code__organization__key__in={ref.org for ref in run_refs},
+                program_course_code__program__status__in=statuses,
+            ).values_list(
+                'program_course_code__course_code__organization__key',
+                'program_course_code__course_code__key',
+                'run_key',
+                'program_course_code__program_id',
+                'program_course_code__program__uuid',
+            )
+            for org, course, run, program_id, program_uuid in rows:
+                matches[CourseRef(org, course, run)].add((program_id, unicode(program_uuid)))
+
+        if course_refs:
+            rows = models.ProgramCourseCode.objects.filter(
+                course_code__key__in={ref.course for ref in course_refs},
+                course_code__organization__key__in={ref.org for ref in course_refs},
+                program__status__in=statuses,
+            ).values_list('course_code__organization__key', 'course_code__key', 'program_id', 'program__uuid')
+            for org, course, program_id, program_uuid in rows:
+                matches[CourseRef(org, course, None)].add((program_id, unicode(program_uuid)))
+
+    return {key: tuple(sorted(matches[ref])) for key, ref in refs.items()}
@@ -0,0 +1,96 @@
+"""
+Parsing of course run keys (e.g. `course-v1:edX+DemoX+Demo_2016`, or `edX/DemoX/Demo_2016`).
+
+Run modes, the forms and serializers validating them, and bulk imports parse
+the same few course keys over and over, and `CourseKey.from_string` is costly
+(it looks up the key's class among the installed opaque key plugins, then
+matches it against a long regular expression).  `parse_course_run_key`
+therefore remembers the parts of the COURSE_KEY_CACHE_SIZE keys it parsed most
+recently, in each process, along with the keys found to be invalid.
+
+Lookups are counted by the `programs_course_key_cache_lookups_total` metric,
+labeled with their result (`hit` or `miss`), from which the hit rate follows.
+"""
+from collections import namedtuple, OrderedDict
+import threading
+
+from django.conf import settings
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from programs.apps.core.metrics import COURSE_KEY_CACHE_LOOKUPS
+
+
+# The parts of a course run key, or of a course key, in which case `run` is None.
+CourseRef = namedtuple('CourseRef', ['org', 'course', 'run'])
+
+# Statistics of the cache, named as those of `functools.lru_cache`.
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+# Cached in place of the parts of invalid keys.
+_INVALID = object()
+
+_lock = threading.Lock()
+# course key -> CourseRef or _INVALID, least recently used first.
+_cache = OrderedDict()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def parse_course_run_key(key):
+    """
+    Split a course run key into its parts.
+
+    Returns:
+        CourseRef
+
+    Raises:
+        InvalidKeyError: if the key isn't a course run key.
+    """
+    with _lock:
+        ref = _cache.pop(key, None)
+        if ref is not None:
+            # move the key to the most recently used end.
+            _cache[key] = ref
+            _stats['hits'] += 1
+    COURSE_KEY_CACHE_LOOKUPS.labels('hit' if ref is not None else 'miss').inc()
+
+    if ref is None:
+        ref = _parse(key)
+        with _lock:
+            _stats['misses'] += 1
+            _cache[key] = ref
+            while len(_cache) > settings.COURSE_KEY_CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    if ref is _INVALID:
+        raise InvalidKeyError(CourseKey, key)
+    return ref
+
+
+def _parse(key):
+    """Split a course run key into its parts, returning _INVALID if it's invalid."""
+    try:
+        course_key = CourseKey.from_string(key)
+    except InvalidKeyError:
+        return _INVALID
+    return CourseRef(course_key.org, course_key.course, course_key.run)
+
+
+def get_cache_info():
+    """
+    Return the statistics of the lookups of parsed course keys in this process.
+
+    Returns:
+        CacheInfo
+    """
+    with _lock:
+        return CacheInfo(_stats['hits'], _stats['misses'], settings.COURSE_KEY_CACHE_SIZE, len(_cache))
+
+
+def clear_cache():
+    """
+    Forget the parsed course keys, and the statistics of their lookups.
+    """
+    with _lock:
+        _cache.clear()
+        _stats.update(hits=0, misses=0)
@@ -0,0 +1,375 @@
+"""
+Maintenance of materialized program documents.
+
+The nested JSON representation of a program is read far more often than it is
+written, so it is rendered ahead of time and stored in `ProgramDocument` rows,
+one for each role allowed to see the program.  The functions in this module
+(re)build and fetch those rows.  Rebuilds are triggered by the receivers in
+`programs.apps.programs.signals` and by the `rebuild_program_documents`
+management command.
+
+Rebuilding the documents of programs because their data changed also
+increments the programs' versions, which the API serves as their ETags, so
+that those change along with the documents whatever the change was made by:
+the API, the admin, or a change to a course code or organization shared by
+several programs.  Writers which already incremented the versions of the
+programs they change, such as conditional updates through the API, and the
+creation of programs, skip that (see `skip_version_bumps`).
+
+Every rebuild also changes the catalog version, which in-process caches of
+other data derived from the catalog use to detect that it has changed.  When
+a rebuild happens within a transaction, such as that of an admin change, other
+processes may cache data read before the transaction is committed under the
+new version, so the version changes again once the transaction is over: at the
+end of the request (see `programs.apps.programs.signals`), or of the
+`deferred_rebuild` block, whichever comes first.  Django 1.8 has no hook
+running when a transaction is committed.
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import logging
+import re
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import F, Prefetch
+
+from programs.apps.core import db_routers
+from programs.apps.core.constants import Role
+from programs.apps.programs import models
+from programs.apps.programs.constants import ProgramStatus
+
+
+logger = logging.getLogger(__name__)
+
+# Program statuses visible to users with each role.
+VISIBLE_STATUSES = OrderedDict([
+    (Role.ADMINS, (ProgramStatus.UNPUBLISHED, ProgramStatus.ACTIVE, ProgramStatus.RETIRED)),
+    (Role.LEARNERS, (ProgramStatus.ACTIVE, ProgramStatus.RETIRED)),
+])
+
+# Stored documents use this in place of the scheme and host of the requesting
+# URL, wherever an absolute URL would otherwise be built from a relative one.
+# It always appears at the beginning of a JSON string value.
+ABSOLUTE_URI_PLACEHOLDER = u'{{absolute_uri}}'
+
+# Maximum number of programs loaded and rendered at once.
+REBUILD_CHUNK_SIZE = 100
+
+# Number of programs whose documents are fetched at once while exporting.
+EXPORT_CHUNK_SIZE = 500
+
+ABSOLUTE_URL_RE = re.compile(r'^https?://', re.I)
+
+CATALOG_VERSION_CACHE_KEY = 'programs.catalog_version'
+
+_state = threading.local()
+
+
+class _RenderingRequest(object):
+    """
+    Stand-in for the request normally found in serializer context, used while
+    rendering documents outside of any request.
+    """
+
+    def build_absolute_uri(self, location):  # pylint: disable=missing-docstring
+        if ABSOLUTE_URL_RE.match(location):
+            return location
+        return ABSOLUTE_URI_PLACEHOLDER + location
+
+
+def prefetch_program_relations(queryset, fields=None):
+    """
+    Perform eager loading of the data needed to serialize programs, to prevent
+    a cascade of performance-degrading queries.  If the names of the serialized
+    fields are given, only the relations those fields need are loaded.
+    """
+    lookups = []
+    if fields is None or 'organizations' in fields:
+        lookups.append(Prefetch(
+            'programorganization_set',
+            queryset=models.ProgramOrganization.objects.select_related('organization')
+        ))
+    if fields is None or 'course_codes' in fields:
+        lookups.extend([
+            Prefetch(
+                'programcoursecode_set',
+                queryset=models.ProgramCourseCode.objects.select_related()
+            ),
+            'programcoursecode_set__run_modes',
+        ])
+    return queryset.prefetch_related(*lookups)
+
+
+def render_programs(programs):
+    """
+    Render the API representation of each of the given programs.
+
+    Yields:
+        tuples of (Program, unicode JSON document)
+    """
+    # imported here to avoid a circular import; the serializers depend on this app's models.
+    from programs.apps.api.renderers import JSONRenderer
+    from programs.apps.api.serializers import ProgramSerializer
+
+    # a single serializer is shared, so that its (nested) fields are only built once, and so is its
+    # context, so that lookups which are common to all programs are only made once.
+    serializer = ProgramSerializer(context={'request': _RenderingRequest()})
+    renderer = JSONRenderer()
+    for program in programs:
+        yield program, renderer.render(serializer.to_representation(program)).decode('utf-8')
+
+
+def rebuild_documents(program_ids, bumped_ids=()):
+    """
+    Replace the stored documents of the given programs with freshly rendered
+    ones, in a single transaction.  Ids of programs which no longer exist, or
+    whose deletion is in progress, only have their documents removed.
+
+    Programs are always read from the primary database, so that documents
+    are never rendered from stale replica data.
+
+    Arguments:
+        program_ids: the ids of the programs to rebuild.
+        bumped_ids: the ids of those of the programs whose versions to increment, in the same transaction.
+    """
+    program_ids = set(program_ids)
+    if not program_ids:
+        return
+
+    try:
+        rebuilt_ids = sorted(program_ids - _get_state('suppressed', set))
+        if rebuilt_ids:
+            _replace_documents(rebuilt_ids, set(bumped_ids))
+    finally:
+        # the catalog changes even when a program being deleted isn't rebuilt.
+        _change_catalog_version()
+
+
+def _change_catalog_version():
+    """
+    Change the catalog version now, so that this thread sees its own changes, and once more after the
+    transaction in progress (if any) is over, so that nothing read before the commit stays cached.
+    """
+    cache.set(CATALOG_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+    _state.version_pending = _in_transaction()
+
+
+def _in_transaction():
+    """Whether a transaction is in progress on the database storing the documents."""
+    return transaction.get_connection(router.db_for_write(models.ProgramDocument)).in_atomic_block
+
+
+def change_catalog_version_after_commit(**kwargs):  # pylint: disable=unused-argument
+    """
+    Change the catalog version if documents were rebuilt within a transaction
+    which is now over.  Connected to the `request_finished` signal.
+    """
+    if _get_state('version_pending', bool) and not _in_transaction():
+        _state.version_pending = False
+        cache.set(CATALOG_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+def _replace_documents(program_ids, bumped_ids):
+    """
+    Render and store the documents of the given programs, in chunks, incrementing the versions of `bumped_ids`.
+    """
+    with db_routers.use_primary(), transaction.atomic():
+        for start in xrange(0, len(program_ids), REBUILD_CHUNK_SIZE):
+            chunk = program_ids[start:start + REBUILD_CHUNK_SIZE]
+            models.ProgramDocument.objects.filter(program_id__in=chunk).delete()
+            bumped_chunk = [program_id for program_id in chunk if program_id in bumped_ids]
+            if bumped_chunk:
+                models.Program.objects.filter(id__in=bumped_chunk).update(version=F('version') + 1)
+
+            programs = prefetch_program_relations(models.Program.objects.filter(id__in=chunk))
+            documents = [
+                models.ProgramDocument(program=program, role=role, document=document)
+                for program, document in render_programs(programs)
+                for role, statuses in VISIBLE_STATUSES.items()
+                if program.status in statuses
+            ]
+            models.ProgramDocument.objects.bulk_create(documents)
+
+
+def get_catalog_version():
+    """
+    Return the current catalog version, an opaque string which changes whenever
+    the documents of any program are rebuilt, and is shared by all processes
+    using the same cache.
+    """
+    version = cache.get(CATALOG_VERSION_CACHE_KEY)
+    if version is None:
+        # there is no version yet, or the cache has lost it; either way, start a new one.
+        cache.add(CATALOG_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CATALOG_VERSION_CACHE_KEY)
+    # a cache which doesn't store anything can't tell when the catalog changes, so nothing may be reused.
+    return version or uuid.uuid4().hex
+
+
+def schedule_rebuild(program_ids):
+    """
+    Rebuild the documents of the given programs, whose data changed, and
+    increment their versions (unless skipped), either immediately or, within a
+    `deferred_rebuild` block, when that block exits.
+    """
+    if _get_state('depth', int):
+        _state.pending.update(program_ids)
+    else:
+        _rebuild_changed(program_ids)
+
+
+def skip_version_bumps(program_ids):
+    """
+    Leave the versions of the given programs alone when their documents are next
+    rebuilt by `schedule_rebuild`, or by the `deferred_rebuild` block in progress,
+    because the programs were just created, or their versions were already
+    incremented along with the changes being made.
+    """
+    _get_state('skipped', set).update(program_ids)
+
+
+def _rebuild_changed(program_ids):
+    """
+    Rebuild the documents of the given programs, incrementing the versions of those not skipped.
+    """
+    skipped, _state.skipped = _get_state('skipped', set), set()
+    rebuild_documents(program_ids, bumped_ids=set(program_ids) - skipped)
+
+
+@contextmanager
+def deferred_rebuild():
+    """
+    Collect the rebuilds scheduled within the block, so that each affected
+    program is rebuilt once upon exit rather than once per modified row.
+    Blocks may be nested; rebuilds happen when the outermost one exits.
+    """
+    depth = _get_state('depth', int)
+    if not depth:
+        _state.pending = set()
+    _state.depth = depth + 1
+    try:
+        yield
+    finally:
+        _state.depth = depth
+        if not depth:
+            pending, _state.pending = _state.pending, set()
+            _rebuild_changed(pending)
+            change_catalog_version_after_commit()
+            release_all_rebuilds()
+
+
+def suppress_rebuilds(program_id):
+    """
+    Ignore rebuilds of a program while it is being deleted.  Otherwise, the
+    deletion of its related rows would create new documents referencing it.
+    """
+    _get_state('suppressed', set).add(program_id)
+
+
+def release_rebuilds(program_id):
+    """
+    Undo `suppress_rebuilds`, once the program's deletion is complete.
+    """
+    _get_state('suppressed', set).discard(program_id)
+
+
+def release_all_rebuilds(**kwargs):  # pylint: disable=unused-argument
+    """
+    Undo `suppress_rebuilds` for all programs, including those whose deletion
+    failed, and so never completed.  Called when the outermost `deferred_rebuild`
+    block exits, and connected to the `request_finished` signal, since no
+    deletion is in progress at either point.
+    """
+    _get_state('suppressed', set).clear()
+
+
+def get_documents(program_ids, role):
+    """
+    Fetch the stored documents of the given programs, as seen by `role`.  The
+    programs are expected to be visible to that role; documents found to be
+    missing (e.g. before the initial rebuild) are built on the fly.
+
+    Returns:
+        dict mapping program ids to unicode JSON documents
+    """
+    def _query(ids):
+        """Query the documents of the given programs, lazily."""
+        queryset = models.ProgramDocument.objects.filter(program_id__in=ids, role=role)
+        return queryset.values_list('program_id', 'document')
+
+    def _refetch(ids):
+        """Fetch the documents just built on the fly, repeating the initial query, as the N+1 check in tests allows."""
+        return dict(_query(ids))
+
+    program_ids = list(program_ids)
+    documents = dict(_query(program_ids)) if program_ids else {}
+
+    missing = set(program_ids) - set(documents)
+    if missing:
+        logger.warning('Building %d missing program documents for role [%s].', len(missing), role)
+        rebuild_documents(missing)
+        # the new documents may not have reached any read replica yet.
+        with db_routers.use_primary():
+            documents.update(_refetch(missing))
+
+    return documents
+
+
+def export_documents(queryset, role, using=None):
+    """
+    Fetch the stored documents of all programs in `queryset`, as seen by `role`,
+    in order of id, EXPORT_CHUNK_SIZE programs at a time, so that memory use
+    doesn't grow with the catalog.  Missing documents are rendered on the fly,
+    with the relations of the programs of each chunk loaded at once.
+
+    All programs are read in a single transaction on the `using` database (by
+    default, the one routed to for reading programs when this is called), so
+    that they reflect one consistent snapshot of the catalog on databases
+    providing repeatable reads, as MySQL does by default.
+
+    Returns:
+        iterator of unicode JSON documents, which queries the database as it is consumed.
+    """
+    using = using or router.db_for_read(models.Program)
+    return _iter_export(queryset.using(using), role, using)
+
+
+def _iter_export(queryset, role, using):
+    """
+    Yield the documents exported by `export_documents`.
+    """
+    with transaction.atomic(using=using):
+        last_id = 0
+        while True:
+            program_ids = list(
+                queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:EXPORT_CHUNK_SIZE]
+            )
+            if not program_ids:
+                return
+
+            documents = dict(
+                models.ProgramDocument.objects.using(using).filter(
+                    program_id__in=program_ids, role=role
+                ).values_list('program_id', 'document')
+            )
+            missing = [program_id for program_id in program_ids if program_id not in documents]
+            if missing:
+                logger.warning('Rendering %d missing program documents for role [%s].', len(missing), role)
+                programs = prefetch_program_relations(models.Program.objects.using(using).filter(id__in=missing))
+                documents.update((program.id, document) for program, document in render_programs(programs))
+
+            for program_id in program_ids:
+                yield documents[program_id]
+            last_id = program_ids[-1]
+
+
+def _get_state(name, factory):
+    """
+    Return the thread-local value named `name`, initializing it with `factory()` if necessary.
+    """
+    if not hasattr(_state, name):
+        setattr(_state, name, factory())
+    return getattr(_state, name)
@@ -0,0 +1,61 @@
+# pylint: disable=missing-docstring
+from collections import OrderedDict
+import time
+
+from django.core.cache import cache
+from django.core.management import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from programs.apps.core import compression
+from programs.apps.programs.benchmarks import build_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the CPU time spent compressing program list responses, and the bytes saved, '
+        'for each supported encoding, on a synthetic catalog.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--programs', type=int, default=500, help='Number of programs in the catalog.')
+        parser.add_argument(
+            '--page-sizes', type=int, nargs='+', default=[20, 100, 500], help='Sizes of the list pages compressed.'
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Number of times each page is compressed.')
+
+    def handle(self, *args, **options):
+        catalog = build_catalog(options['programs'])
+        renderer = JSONRenderer()
+        repeat = options['repeat']
+
+        self.stdout.write('{:>6} {:>6} {:>10} {:>10} {:>7} {:>10} {:>10}'.format(
+            'page', 'coding', 'bytes', 'sent', 'saved', 'cpu (ms)', 'cached (ms)'
+        ))
+        for page_size in options['page_sizes']:
+            content = renderer.render(OrderedDict([
+                ('next', None), ('previous', None), ('count', len(catalog)), ('num_pages', 1),
+                ('results', catalog[:page_size]),
+            ]))
+            for encoding in compression.get_encodings():
+                compressed = compression.compress(content, encoding)
+                cpu = self._time(lambda: compression.compress(content, encoding), repeat)  # pylint: disable=cell-var-from-loop
+
+                # the first call caches the compressed body, which the following ones reuse.
+                with override_settings(COMPRESSION_CACHE_MIN_SIZE=0):
+                    cache.clear()
+                    compression.get_compressed(content, encoding)
+                    cached = self._time(lambda: compression.get_compressed(content, encoding), repeat)  # pylint: disable=cell-var-from-loop
+
+                self.stdout.write('{:>6} {:>6} {:>10} {:>10} {:>6.1f}% {:>10.3f} {:>10.3f}'.format(
+                    page_size, encoding, len(content), len(compressed),
+                    100.0 * (len(content) - len(compressed)) / len(content), 1000 * cpu, 1000 * cached,
+                ))
+
+    @staticmethod
+    def _time(func, repeat):
+        """Return the average CPU time taken by calls to `func`, in seconds."""
+        start = time.clock()
+        for __ in range(repeat):
+            func()
+        return (time.clock() - start) / repeat
@@ -0,0 +1,55 @@
+# pylint: disable=missing-docstring
+from collections import OrderedDict
+import time
+
+from django.core.management import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from programs.apps.api import renderers
+from programs.apps.programs.benchmarks import build_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the CPU time spent rendering program list responses as JSON by DRF's renderer, "
+        'and by each available encoder of the API renderer, on a synthetic catalog.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--programs', type=int, default=500, help='Number of programs in the catalog.')
+        parser.add_argument(
+            '--page-sizes', type=int, nargs='+', default=[20, 100, 500], help='Sizes of the list pages rendered.'
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Number of times each page is rendered.')
+
+    def handle(self, *args, **options):
+        catalog = build_catalog(options['programs'])
+        encoders = OrderedDict([('drf', JSONRenderer().render)])
+        encoders.update((name, encoder) for name, encoder in renderers.ENCODERS.items() if encoder is not None)
+
+        self.stdout.write('{:>6} {:>10} {:>10} {:>10} {:>8}'.format('page', 'encoder', 'bytes', 'cpu (ms)', 'speedup'))
+        for page_size in options['page_sizes']:
+            data = OrderedDict([
+                ('next', None), ('previous', None), ('count', len(catalog)), ('num_pages', 1),
+                ('results', catalog[:page_size]),
+            ])
+            expected = JSONRenderer().render(data)
+            baseline = None
+            for name, encoder in encoders.items():
+                content = encoder(data)
+                if content != expected:
+                    raise CommandError('The [{}] encoder rendered different bytes than DRF.'.format(name))
+
+                cpu = self._time(lambda: encoder(data), options['repeat'])  # pylint: disable=cell-var-from-loop
+                baseline = baseline or cpu
+                self.stdout.write('{:>6} {:>10} {:>10} {:>10.3f} {:>7.1f}x'.format(
+                    page_size, name, len(content), 1000 * cpu, baseline / cpu
+                ))
+
+    @staticmethod
+    def _time(func, repeat):
+        """Return the average CPU time taken by calls to `func`, in seconds."""
+        start = time.clock()
+        for __ in range(repeat):
+            func()
+        return (time.clock() - start) / repeat
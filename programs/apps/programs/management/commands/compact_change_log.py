@@ -0,0 +1,11 @@
+# pylint: disable=missing-docstring
+from django.core.management import BaseCommand
+
+from programs.apps.programs import changes
+
+
+class Command(BaseCommand):
+    help = 'Remove superseded entries, and old deletions, from the catalog change log.'
+
+    def handle(self, *args, **options):
+        changes.compact()
@@ -0,0 +1,54 @@
+# pylint: disable=missing-docstring
+import logging
+
+from django.core.management import BaseCommand
+from django.core.management.base import OutputWrapper
+
+from programs.apps.core.constants import Role
+from programs.apps.programs import documents
+from programs.apps.programs.models import Program
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Export the documents of all programs visible to a role, one per line (NDJSON), '
+        'from one consistent snapshot of the catalog.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--role',
+            choices=list(documents.VISIBLE_STATUSES),
+            default=Role.LEARNERS,
+            help='Role whose view of the catalog is exported.',
+        )
+        parser.add_argument(
+            '--base-url',
+            default='',
+            help='Scheme and host (e.g. https://programs.example.com) prepended to URLs which would otherwise be '
+                 'relative, such as those of banner images stored locally.',
+        )
+        parser.add_argument('--output', default=None, help='File to write to. Defaults to standard output.')
+
+    def handle(self, *args, **options):
+        role = options['role']
+        queryset = Program.objects.filter(status__in=documents.VISIBLE_STATUSES[role])
+        placeholder = '"' + documents.ABSOLUTE_URI_PLACEHOLDER
+        base_url = '"' + options['base_url'].rstrip('/')
+
+        stream = open(options['output'], 'wb') if options['output'] else None
+        output = OutputWrapper(stream) if stream else self.stdout
+        count = 0
+        try:
+            for document in documents.export_documents(queryset, role):
+                # the output appends a line ending to each line.
+                output.write(document.replace(placeholder, base_url).encode('utf-8'))
+                count += 1
+        finally:
+            if stream:
+                stream.close()
+
+        logger.info('Exported %d programs.', count)
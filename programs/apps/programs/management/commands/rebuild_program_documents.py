@@ -0,0 +1,21 @@
+# pylint: disable=missing-docstring
+import logging
+
+from django.core.management import BaseCommand
+
+from programs.apps.programs import documents
+from programs.apps.programs.models import Program
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the pre-rendered documents of all programs.'
+
+    def handle(self, *args, **options):
+        program_ids = list(Program.objects.values_list('id', flat=True))
+
+        logger.info('Rebuilding documents for %d programs.', len(program_ids))
+        documents.rebuild_documents(program_ids)
+        logger.info('Finished rebuilding program documents.')
@@ -0,0 +1,18 @@
+# pylint: disable=missing-docstring
+import logging
+
+from django.core.management import BaseCommand
+
+from programs.apps.programs import search
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index of programs, course codes and organizations.'
+
+    def handle(self, *args, **options):
+        logger.info('Rebuilding the search index.')
+        count = search.rebuild_index()
+        logger.info('Finished rebuilding the search index of %d rows.', count)
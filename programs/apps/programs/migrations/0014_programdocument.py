@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0013_auto_20160725_2147'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgramDocument',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('created', django_extensions.db.fields.CreationDateTimeField(default=django.utils.timezone.now, verbose_name='created', editable=False, blank=True)),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(default=django.utils.timezone.now, verbose_name='modified', editable=False, blank=True)),
+                ('role', models.CharField(help_text='The role of the users to whom this document is visible.', max_length=32, choices=[('Admins', 'Admins'), ('Learners', 'Learners')])),
+                ('document', models.TextField(help_text='The rendered JSON representation of the program.')),
+                ('program', models.ForeignKey(related_name='documents', to='programs.Program')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='programdocument',
+            unique_together=set([('role', 'program')]),
+        ),
+    ]
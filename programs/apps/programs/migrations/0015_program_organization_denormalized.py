@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def denormalize_organizations(apps, schema_editor):
+    Program = apps.get_model('programs', 'Program')
+    ProgramOrganization = apps.get_model('programs', 'ProgramOrganization')
+
+    for program_id, organization_id, organization_key in ProgramOrganization.objects.values_list(
+            'program_id', 'organization_id', 'organization__key'):
+        Program.objects.filter(pk=program_id).update(
+            organization_id=organization_id,
+            organization_key=organization_key,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0014_programdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='program',
+            name='organization_id',
+            field=models.IntegerField(help_text='The id of the organization offering this Program.', null=True, editable=False, db_index=True, blank=True),
+        ),
+        migrations.AddField(
+            model_name='program',
+            name='organization_key',
+            field=models.CharField(help_text='The key of the organization offering this Program.', max_length=64, editable=False, db_index=True, blank=True),
+        ),
+        migrations.RunPython(denormalize_organizations, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def initialize_position_counters(apps, schema_editor):
+    Program = apps.get_model('programs', 'Program')
+    ProgramCourseCode = apps.get_model('programs', 'ProgramCourseCode')
+
+    max_positions = ProgramCourseCode.objects.values('program_id').annotate(max_position=models.Max('position'))
+    for row in max_positions:
+        Program.objects.filter(pk=row['program_id']).update(last_course_code_position=row['max_position'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0015_program_organization_denormalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='program',
+            name='last_course_code_position',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(initialize_position_counters, reverse_code=migrations.RunPython.noop),
+    ]
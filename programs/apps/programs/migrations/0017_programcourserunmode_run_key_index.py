@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0016_program_last_course_code_position'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='programcourserunmode',
+            name='run_key',
+            field=models.CharField(help_text='A string referencing the last part of course key identifying this course run in the target LMS.', max_length=255, db_index=True),
+        ),
+    ]
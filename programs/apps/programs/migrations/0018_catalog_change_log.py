@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0017_programcourserunmode_run_key_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogChange',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('entity_type', models.CharField(help_text='The name of the model of the changed row, e.g. "programcoursecode".', max_length=32)),
+                ('entity_id', models.IntegerField(help_text='The id of the changed row.')),
+                ('operation', models.CharField(help_text='Whether the row was created, updated or deleted.', max_length=8, choices=[('create', 'create'), ('update', 'update'), ('delete', 'delete')])),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChangeLogCompaction',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('horizon', models.IntegerField(default=0, help_text='The highest sequence number of the changes removed from the log.')),
+                ('compacted', models.DateTimeField(help_text='When the log was last compacted.', null=True, blank=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='catalogchange',
+            index_together=set([('entity_type', 'entity_id')]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0018_catalog_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='program',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from programs.apps.programs import search
+
+
+def build_search_index(apps, schema_editor):
+    SearchTerm = apps.get_model('programs', 'SearchTerm')
+    for entity_type in search.INDEXED_FIELDS:
+        model = apps.get_model('programs', entity_type)
+        SearchTerm.objects.bulk_create(search.make_terms(model.objects.all(), term_model=SearchTerm))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0019_program_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('entity_type', models.CharField(help_text='The name of the model of the indexed row, e.g. "coursecode".', max_length=32)),
+                ('entity_id', models.IntegerField(help_text='The id of the indexed row.')),
+                ('term', models.CharField(help_text='The normalized word, or prefix of a word, found in the row.', max_length=32)),
+                ('weight', models.PositiveSmallIntegerField(help_text='The relevance of the row to searches for the term.')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='searchterm',
+            index_together=set([('entity_type', 'entity_id'), ('entity_type', 'term')]),
+        ),
+        migrations.RunPython(build_search_index, reverse_code=migrations.RunPython.noop),
+    ]
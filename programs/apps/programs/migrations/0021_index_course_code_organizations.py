@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from programs.apps.programs import search
+
+
+def index_course_code_organizations(apps, schema_editor):
+    SearchTerm = apps.get_model('programs', 'SearchTerm')
+    CourseCode = apps.get_model('programs', 'CourseCode')
+    SearchTerm.objects.filter(entity_type='coursecode').delete()
+    SearchTerm.objects.bulk_create(
+        search.make_terms(CourseCode.objects.select_related('organization'), term_model=SearchTerm)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0020_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_course_code_organizations, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def number_existing_changes(apps, schema_editor):
+    # clients have seen the ids of existing changes as their sequence numbers.
+    CatalogChange = apps.get_model('programs', 'CatalogChange')
+    CatalogChange.objects.update(sequence=models.F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0021_index_course_code_organizations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogchange',
+            name='sequence',
+            field=models.IntegerField(help_text='The position of the change in the log, assigned once it is committed.', null=True, editable=False, db_index=True),
+        ),
+        migrations.RunPython(number_existing_changes, reverse_code=migrations.RunPython.noop),
+    ]
@@ -2,15 +2,17 @@
 # pylint: disable=model-missing-unicode,no-member
 from uuid import uuid4
 
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django_extensions.db.models import TimeStampedModel
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
 from solo.models import SingletonModel
 
+from programs.apps.core.constants import Role
 from programs.apps.programs import constants
+from programs.apps.programs.course_keys import parse_course_run_key
 from programs.apps.programs.fields import ResizingImageField
 
 
@@ -24,6 +26,68 @@ def _choices(*values):
     return [(value, ) * 2 for value in values]
 
 
+class DirtyFieldsMixin(object):
+    """
+    Track the values of a model's columns as last loaded or saved, so that
+    saving an instance only writes the columns which have changed since, and
+    saving an unchanged instance writes nothing at all (nor sends any signal).
+
+    For use with TimeStampedModel, whose `modified` column is written along
+    with any change.
+    """
+
+    # attname -> value of each column, as last loaded from or written to the database.
+    _saved_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):  # pylint: disable=missing-docstring
+        instance = super(DirtyFieldsMixin, cls).from_db(db, field_names, values)
+        instance._snapshot()  # pylint: disable=protected-access
+        return instance
+
+    def _snapshot(self):
+        """Remember the current values of the columns which were loaded."""
+        self._saved_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def get_dirty_fields(self):
+        """
+        Return the names of the columns whose values differ from those last loaded or saved.
+        """
+        return [
+            field.name for field in self._meta.concrete_fields
+            if field.attname in self._saved_values and getattr(self, field.attname) != self._saved_values[field.attname]
+        ]
+
+    def has_changed(self, *field_names):
+        """
+        Return whether saving the instance would write any of the named columns,
+        or any column at all when no name is given.  New and untracked instances
+        are always written in full.
+        """
+        if self._state.adding or self._saved_values is None:
+            return True
+        dirty_fields = self.get_dirty_fields()
+        return bool(set(dirty_fields).intersection(field_names) if field_names else dirty_fields)
+
+    def save(self, *a, **kw):
+        """
+        Write only the columns which have changed, unless told otherwise.
+        """
+        if not self._state.adding and self._saved_values is not None and kw.get('update_fields') is None \
+                and not kw.get('force_insert'):
+            dirty_fields = self.get_dirty_fields()
+            if not dirty_fields:
+                return
+            kw['update_fields'] = dirty_fields + ['modified']
+
+        super(DirtyFieldsMixin, self).save(*a, **kw)
+        self._snapshot()
+
+
 class Program(TimeStampedModel):
     """
     Representation of a Program.
@@ -88,6 +152,44 @@ class Program(TimeStampedModel):
         max_length=1000,
     )
 
+    # Denormalized copies of the id and key of the program's (single) organization, which allow
+    # filtering programs by organization without joining through ProgramOrganization.  These are
+    # maintained by the signal receivers in `programs.apps.programs.signals`.
+    organization_id = models.IntegerField(
+        help_text=_('The id of the organization offering this Program.'),
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+
+    organization_key = models.CharField(
+        help_text=_('The key of the organization offering this Program.'),
+        max_length=64,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+
+    # The highest position allocated to any of this program's course codes.
+    # See `ProgramCourseCode.allocate_positions`.
+    last_course_code_position = models.IntegerField(
+        default=0,
+        editable=False,
+    )
+
+    # Incremented by each change to the program's documents, however it is made.  Clients send
+    # it back, as the program's ETag, so that concurrent changes are detected.  See `bump_version`,
+    # and `programs.apps.programs.documents`.
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+    )
+
+    # Columns which are maintained using queryset updates, and which saving a
+    # (possibly stale) instance must therefore never overwrite.
+    MAINTAINED_FIELDS = ('organization_id', 'organization_key', 'last_course_code_position', 'version')
+
     def save(self, *a, **kw):
         """
         Verify that the marketing slug is not empty if the user has attempted
@@ -99,8 +201,33 @@ class Program(TimeStampedModel):
                     "Active XSeries Programs must have a valid marketing slug."
                 ))
 
+        if not self._state.adding and kw.get('update_fields') is None and not kw.get('force_insert'):
+            kw['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+            ]
+
         return super(Program, self).save(*a, **kw)
 
+    @staticmethod
+    def bump_version(program, expected_versions=None):
+        """
+        Increment the program's version, provided that it is one of `expected_versions`,
+        when given, with a single conditional UPDATE.  Of several writers expecting the
+        same version, only one can therefore succeed, without holding a lock beforehand.
+
+        Returns:
+            bool: whether the version was incremented.
+        """
+        queryset = Program.objects.filter(pk=program.pk)
+        if expected_versions is not None:
+            queryset = queryset.filter(version__in=expected_versions)
+        if not queryset.update(version=models.F('version') + 1):
+            return False
+
+        program.version = Program.objects.values_list('version', flat=True).get(pk=program.pk)
+        return True
+
     class Meta(object):  # pylint: disable=missing-docstring
         index_together = ('status', 'category')
 
@@ -156,7 +283,7 @@ class ProgramOrganization(TimeStampedModel):
         return super(ProgramOrganization, self).save(*a, **kw)
 
 
-class CourseCode(TimeStampedModel):
+class CourseCode(DirtyFieldsMixin, TimeStampedModel):
     """
     Represents a course independent of run / mode.  This is used to link
     multiple runs / modes of the same course offering within a program,
@@ -185,7 +312,7 @@ class CourseCode(TimeStampedModel):
         return unicode(self.display_name)
 
 
-class ProgramCourseCode(TimeStampedModel):
+class ProgramCourseCode(DirtyFieldsMixin, TimeStampedModel):
     """
     Represents the many-to-many association of a course code with a program.
     """
@@ -204,18 +331,51 @@ class ProgramCourseCode(TimeStampedModel):
         """
         Override save() to validate m2m cardinality and automatically set the position for a new row.
         """
-        if self.position is None:
+        if not self.has_changed():
+            return
+
+        if self._state.adding:
             # before creating, ensure that the program has an association with the same org as this course code
             if not ProgramOrganization.objects.filter(
                     program=self.program, organization=self.course_code.organization).exists():
                 raise ValidationError(_('Course code must be offered by the same organization offering the program.'))
+
+        if self.position is None:
             # automatically set position attribute for a new row
-            res = ProgramCourseCode.objects.filter(program=self.program).aggregate(max_position=models.Max('position'))
-            self.position = (res['max_position'] or 0) + 1
+            self.position = self.allocate_positions(self.program)[0]
+        elif self.has_changed('position') and self.position > self.program.last_course_code_position:
+            # keep explicitly chosen positions (e.g. from the admin) from being allocated again later.
+            Program.objects.filter(
+                pk=self.program_id, last_course_code_position__lt=self.position
+            ).update(last_course_code_position=self.position)
+            self.program.last_course_code_position = self.position
+
         return super(ProgramCourseCode, self).save(*a, **kw)
 
+    @staticmethod
+    def allocate_positions(program, count=1):
+        """
+        Reserve `count` consecutive, previously unused positions for new course
+        codes in `program`, using the program's position counter.
+
+        The counter is incremented in place, so that concurrent allocations are
+        serialized by the database's row lock rather than racing on the greatest
+        existing position.  This costs two queries regardless of `count`.
+
+        Returns:
+            list of int
+        """
+        with transaction.atomic():
+            Program.objects.filter(pk=program.pk).update(
+                last_course_code_position=models.F('last_course_code_position') + count
+            )
+            last_position = Program.objects.values_list('last_course_code_position', flat=True).get(pk=program.pk)
+
+        program.last_course_code_position = last_position
+        return range(last_position - count + 1, last_position + 1)
 
-class ProgramCourseRunMode(TimeStampedModel):
+
+class ProgramCourseRunMode(DirtyFieldsMixin, TimeStampedModel):
     """
     Represents a specific run and mode of a course in a specific LMS, within the context of a program.
     """
@@ -245,40 +405,171 @@ class ProgramCourseRunMode(TimeStampedModel):
 
     run_key = models.CharField(
         help_text=_("A string referencing the last part of course key identifying this course run in the target LMS."),
-        max_length=255
+        max_length=255,
+        # used to find the programs offering a course run (see `programs.apps.programs.course_index`).
+        db_index=True,
     )
 
+    DUPLICATE_ERROR = _('Duplicate course run modes are not allowed for course codes in a program.')
+
     class Meta(object):  # pylint: disable=missing-docstring
         unique_together = (('program_course_code', 'course_key', 'mode_slug', 'sku'))
 
-    def save(self, *_a, **__kw):
+    def save(self, *a, **kw):
         """
         The unique_together constraint only gives us free validation when using
         Django's ModelForm. Attempts to directly save a model object violating
         this constraint will raise an IntegrityError. That being the case, the
         constraint is manually enforced here. Attempts to violate it will be met
         with a ValidationError.
+
+        Neither the constraint nor the course key is checked again unless the
+        columns involved have changed, and unchanged run modes aren't saved.
+        Callers which checked the uniqueness of many run modes at once pass
+        `check_unique=False` to skip the check, leaving any violation to the
+        constraint.
         """
+        check_unique = kw.pop('check_unique', True)
 
         # TODO (jsa): I'm now convinced that multiple table inheritance is better
         # - one table without SKUs and one table with NOT NULL / UNIQUE SKUs.
         # This compromise should suffice initially.
 
-        if ProgramCourseRunMode.objects.filter(
-                program_course_code=self.program_course_code,
+        if not self.has_changed():
+            return
+
+        unique_fields = ('program_course_code', 'course_key', 'mode_slug', 'sku')
+        if check_unique and self.has_changed(*unique_fields) and ProgramCourseRunMode.objects.filter(
+                program_course_code_id=self.program_course_code_id,
                 course_key=self.course_key,
                 mode_slug=self.mode_slug,
                 sku=self.sku,
         ).exclude(id=self.id).exists():  # pylint: disable=no-member
-            raise ValidationError(_('Duplicate course run modes are not allowed for course codes in a program.'))
+            raise ValidationError(self.DUPLICATE_ERROR)
+
+        if self.has_changed('course_key'):
+            try:
+                self.run_key = parse_course_run_key(self.course_key).run
+            except InvalidKeyError:
+                raise ValidationError(_("Invalid course key."))
+
+        return super(ProgramCourseRunMode, self).save(*a, **kw)
+
+
+class ProgramDocument(TimeStampedModel):
+    """
+    The pre-rendered API representation of a Program, as seen by users having
+    a particular role.  One row exists for each role which is allowed to see
+    the program (according to its status), so that read traffic can be served
+    without re-serializing the nested program tree.
+
+    These rows are derived data, maintained by `programs.apps.programs.documents`
+    whenever the underlying models change.  Request-specific absolute URL
+    prefixes are not stored; see `documents.ABSOLUTE_URI_PLACEHOLDER`.
+    """
+    program = models.ForeignKey(Program, related_name='documents')
+    role = models.CharField(
+        help_text=_('The role of the users to whom this document is visible.'),
+        max_length=32,
+        choices=_choices(Role.ADMINS, Role.LEARNERS),
+    )
+    document = models.TextField(
+        help_text=_('The rendered JSON representation of the program.'),
+    )
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = ('role', 'program')
+
+    def __unicode__(self):
+        return u'{} ({})'.format(self.program_id, self.role)
+
+
+class CatalogChange(models.Model):
+    """
+    An entry of the append-only log of changes to catalog rows, from which
+    clients replicate the catalog incrementally.  Entries are ordered by their
+    sequence number, which is assigned once they are committed.
+
+    These rows are maintained by `programs.apps.programs.changes`.
+    """
+    entity_type = models.CharField(
+        help_text=_('The name of the model of the changed row, e.g. "programcoursecode".'),
+        max_length=32,
+    )
+    entity_id = models.IntegerField(
+        help_text=_('The id of the changed row.'),
+    )
+    operation = models.CharField(
+        help_text=_('Whether the row was created, updated or deleted.'),
+        max_length=8,
+        choices=_choices(
+            constants.ChangeOperation.CREATE,
+            constants.ChangeOperation.UPDATE,
+            constants.ChangeOperation.DELETE,
+        ),
+    )
+    created = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+    )
+    sequence = models.IntegerField(
+        help_text=_('The position of the change in the log, assigned once it is committed.'),
+        null=True,
+        db_index=True,
+        editable=False,
+    )
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        index_together = ('entity_type', 'entity_id')
+
+    def __unicode__(self):
+        return u'{}: {} {} {}'.format(self.sequence, self.operation, self.entity_type, self.entity_id)
 
-        try:
-            course_key = CourseKey.from_string(self.course_key)
-            self.run_key = course_key.run
-        except InvalidKeyError:
-            raise ValidationError(_("Invalid course key."))
 
-        return super(ProgramCourseRunMode, self).save()
+class SearchTerm(models.Model):
+    """
+    An entry of the inverted index used to search catalog rows: a normalized
+    word, or prefix of a word, found in the indexed fields of a row, and the
+    weight of matching it.
+
+    These rows are derived data, maintained by `programs.apps.programs.search`.
+    """
+    entity_type = models.CharField(
+        help_text=_('The name of the model of the indexed row, e.g. "coursecode".'),
+        max_length=32,
+    )
+    entity_id = models.IntegerField(
+        help_text=_('The id of the indexed row.'),
+    )
+    term = models.CharField(
+        help_text=_('The normalized word, or prefix of a word, found in the row.'),
+        max_length=32,
+    )
+    weight = models.PositiveSmallIntegerField(
+        help_text=_('The relevance of the row to searches for the term.'),
+    )
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        index_together = (('entity_type', 'term'), ('entity_type', 'entity_id'))
+
+    def __unicode__(self):
+        return u'{} {}: {}'.format(self.entity_type, self.entity_id, self.term)
+
+
+class ChangeLogCompaction(SingletonModel):
+    """
+    The state of the compaction of the change log.  Changes with sequence
+    numbers up to `horizon` may have been removed.
+    """
+    horizon = models.IntegerField(
+        help_text=_('The highest sequence number of the changes removed from the log.'),
+        default=0,
+    )
+    compacted = models.DateTimeField(
+        help_text=_('When the log was last compacted.'),
+        null=True,
+        blank=True,
+    )
 
 
 class ProgramDefault(SingletonModel):
@@ -0,0 +1,234 @@
+"""
+Indexed search of programs, course codes and organizations.
+
+Rather than scanning the text of every row with `LIKE '%term%'`, searches look
+up an inverted index: for every word of the indexed fields of a row, the
+`SearchTerm` table holds the normalized (lowercase, unaccented) word, and each
+of its prefixes of at least MIN_PREFIX_LENGTH characters, along with a weight
+depending on the field, and on whether the term is the whole word.  A search
+for "intro comp" therefore finds "Introduction to Computing" by looking up the
+terms "intro" and "comp", using the index on (entity_type, term), and ranks the
+rows having all of the terms by the sum of their weights.
+
+Course codes are also indexed under the name and key of their organization,
+with a lower weight, so that the index entries of an organization's course
+codes are rebuilt along with its own.
+
+The index is maintained by the receivers in `programs.apps.programs.signals`,
+and by `programs.apps.programs.bulk` for rows written in bulk.  It can be
+rebuilt from scratch with the `rebuild_search_index` management command.
+"""
+from collections import OrderedDict
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Sum, Value, When
+
+from programs.apps.programs import models
+
+
+# Models whose rows are indexed.
+INDEXED_MODELS = (models.Program, models.CourseCode, models.Organization)
+
+# Name of the model of the indexed rows -> the indexed fields and their weights.  Fields
+# of related rows are named by their path, e.g. `organization.key`.
+INDEXED_FIELDS = OrderedDict([
+    ('program', (('name', 3), ('subtitle', 1))),
+    ('coursecode', (('display_name', 3), ('key', 3), ('organization.display_name', 1), ('organization.key', 1))),
+    ('organization', (('display_name', 3), ('key', 3))),
+])
+
+# Shortest prefix of a word which is indexed, in characters.  Shorter words are indexed whole.
+MIN_PREFIX_LENGTH = 2
+
+# Weights of the terms which are whole words are multiplied by this, ranking exact matches first.
+WORD_WEIGHT_FACTOR = 2
+
+# Longest term which is indexed, in characters; longer words are truncated.
+MAX_TERM_LENGTH = models.SearchTerm._meta.get_field('term').max_length  # pylint: disable=protected-access
+
+# Number of rows indexed with a single query when rebuilding the index.
+REBUILD_CHUNK_SIZE = 500
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def get_entity_type(model):
+    """Return the name under which rows of the given model are indexed, or None if they aren't."""
+    entity_type = model._meta.model_name  # pylint: disable=protected-access
+    return entity_type if entity_type in INDEXED_FIELDS else None
+
+
+def get_source_fields(entity_type):
+    """Return the names of the fields of a model on which the index entries of its rows depend."""
+    return {name.split('.')[0] for name, __ in INDEXED_FIELDS[entity_type]}
+
+
+def get_indexed_relations(entity_type):
+    """Return the names of the related rows whose fields are indexed along with the rows of a model."""
+    return {name.rsplit('.', 1)[0] for name, __ in INDEXED_FIELDS[entity_type] if '.' in name}
+
+
+def tokenize(text):
+    """
+    Split text into its normalized words: lowercase, without accents, and truncated to MAX_TERM_LENGTH.
+
+    Returns:
+        list of unicode
+    """
+    text = unicodedata.normalize('NFKD', unicode(text or '').lower())
+    text = u''.join(char for char in text if not unicodedata.combining(char))
+    return [word[:MAX_TERM_LENGTH] for word in WORD_RE.findall(text)]
+
+
+def get_terms(instance):
+    """
+    Find the terms under which a row is indexed.  Also works with the historical
+    models of migrations.
+
+    Returns:
+        dict mapping each term to its weight.
+    """
+    terms = {}
+    for name, field_weight in INDEXED_FIELDS[instance._meta.model_name]:  # pylint: disable=protected-access
+        value = instance
+        for attname in name.split('.'):
+            value = getattr(value, attname)
+        for word in tokenize(value):
+            for length in range(min(MIN_PREFIX_LENGTH, len(word)), len(word) + 1):
+                weight = field_weight * (WORD_WEIGHT_FACTOR if length == len(word) else 1)
+                term = word[:length]
+                terms[term] = max(terms.get(term, 0), weight)
+    return terms
+
+
+def make_terms(instances, term_model=models.SearchTerm):
+    """
+    Build the (unsaved) index entries of rows of a single indexed model.
+    """
+    return [
+        term_model(entity_type=entity_type, entity_id=instance.pk, term=term, weight=weight)
+        for instance in instances
+        for entity_type in [instance._meta.model_name]  # pylint: disable=protected-access
+        for term, weight in sorted(get_terms(instance).items())
+    ]
+
+
+def index(model, instances, created=False):
+    """
+    (Re)index rows of a single model, with two queries, or one if they were just created.
+    """
+    instances = list(instances)
+    if not instances:
+        return
+
+    if created:
+        models.SearchTerm.objects.bulk_create(make_terms(instances))
+        return
+
+    with transaction.atomic():
+        unindex(model, [instance.pk for instance in instances])
+        models.SearchTerm.objects.bulk_create(make_terms(instances))
+
+
+def unindex(model, entity_ids):
+    """
+    Remove rows of the given model from the index.
+    """
+    models.SearchTerm.objects.filter(entity_type=get_entity_type(model), entity_id__in=entity_ids).delete()
+
+
+def index_dependents(instance):
+    """
+    Reindex the rows whose index entries include fields of the given row, i.e. the course codes of an organization.
+    """
+    if isinstance(instance, models.Organization):
+        course_codes = list(models.CourseCode.objects.filter(organization=instance))
+        for course_code in course_codes:
+            course_code.organization = instance
+        index(models.CourseCode, course_codes)
+
+
+def _match(queryset, query):
+    """
+    Build the query grouping the index entries of the rows of a queryset by row,
+    keeping the rows having every word of the query, or return None if the query has no words.
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return None
+
+    return models.SearchTerm.objects.filter(
+        entity_type=get_entity_type(queryset.model),
+        term__in=terms,
+        entity_id__in=queryset.values('pk'),
+    ).values('entity_id').annotate(
+        matched=Count('term', distinct=True),
+    ).filter(matched=len(terms))
+
+
+def search(queryset, query, limit=None):
+    """
+    Find the rows of a queryset of an indexed model having every word of the query,
+    whole or as a prefix of one of theirs.
+
+    Arguments:
+        queryset: the rows which may be found.
+        query (unicode): the words to search for.
+        limit (int): the maximum number of rows found, SEARCH_MAX_RESULTS by default.
+
+    Returns:
+        list of the ids of the rows found, the most relevant first.
+    """
+    matches = _match(queryset, query)
+    if matches is None:
+        return []
+
+    matches = matches.annotate(score=Sum('weight')).order_by('-score', 'entity_id')
+    return list(matches.values_list('entity_id', flat=True)[:limit or settings.SEARCH_MAX_RESULTS])
+
+
+def filter_queryset(queryset, query):
+    """
+    Restrict a queryset of an indexed model to the rows having every word of the
+    query, however many there are, with a single query using a subquery.
+    """
+    matches = _match(queryset, query)
+    if matches is None:
+        return queryset.none()
+    return queryset.filter(pk__in=matches.values('entity_id'))
+
+
+def order_by_ids(queryset, ids):
+    """
+    Restrict a queryset to the rows with the given ids, in the same order.
+    """
+    if not ids:
+        return queryset.none()
+
+    position = Case(*[When(pk=pk, then=Value(i)) for i, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(position)
+
+
+def rebuild_index():
+    """
+    Rebuild the whole index from the indexed models.
+
+    Returns:
+        int: the number of rows indexed.
+    """
+    count = 0
+    with transaction.atomic():
+        models.SearchTerm.objects.all().delete()
+        for model in INDEXED_MODELS:
+            entity_ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            relations = get_indexed_relations(get_entity_type(model))
+            for start in xrange(0, len(entity_ids), REBUILD_CHUNK_SIZE):
+                instances = model.objects.filter(pk__in=entity_ids[start:start + REBUILD_CHUNK_SIZE])
+                if relations:
+                    instances = instances.select_related(*relations)
+                models.SearchTerm.objects.bulk_create(make_terms(instances))
+            count += len(entity_ids)
+    return count
@@ -0,0 +1,156 @@
+"""
+Signal receivers keeping derived catalog data in sync with the models it is derived from.
+"""
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+from programs.apps.programs import changes, documents, models, search
+from programs.apps.programs.constants import ChangeOperation
+
+
+def _get_program_ids(instance):
+    """
+    Return the ids of the programs whose representation includes the given model instance.
+    """
+    if isinstance(instance, models.Program):
+        return [instance.pk]
+    elif isinstance(instance, (models.ProgramOrganization, models.ProgramCourseCode)):
+        return [instance.program_id]
+    elif isinstance(instance, models.ProgramCourseRunMode):
+        try:
+            return [instance.program_course_code.program_id]
+        except models.ProgramCourseCode.DoesNotExist:
+            return []
+    elif isinstance(instance, models.CourseCode):
+        return models.ProgramCourseCode.objects.filter(course_code=instance).values_list('program_id', flat=True)
+    elif isinstance(instance, models.Organization):
+        return set(
+            models.ProgramOrganization.objects.filter(organization=instance).values_list('program_id', flat=True)
+        ) | set(
+            models.ProgramCourseCode.objects.filter(
+                course_code__organization=instance
+            ).values_list('program_id', flat=True)
+        )
+    elif isinstance(instance, models.ProgramDefault):
+        # the default banner image appears in the documents of all programs without their own.
+        return models.Program.objects.values_list('id', flat=True)
+    return []
+
+
+def rebuild_program_documents(sender, instance, raw=False, created=False, **kwargs):  # pylint: disable=unused-argument
+    """
+    Rebuild the documents of the programs affected by a saved or deleted model
+    instance, incrementing their versions, except that of a new program.
+    """
+    # skip fixture loading, where related rows may not be present yet.
+    if not raw:
+        if created and isinstance(instance, models.Program):
+            documents.skip_version_bumps([instance.pk])
+        documents.schedule_rebuild(_get_program_ids(instance))
+
+
+def suppress_program_documents(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Prevent the deletion of a program's related rows from rebuilding its documents.
+    """
+    documents.suppress_rebuilds(instance.pk)
+
+
+def release_program_documents(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Resume rebuilding documents for a program id once its deletion is complete.
+    """
+    documents.release_rebuilds(instance.pk)
+
+
+def log_catalog_change(sender, instance, created=False, **kwargs):  # pylint: disable=unused-argument
+    """
+    Record a saved or deleted model instance in the change log.
+    """
+    if kwargs['signal'] is post_delete:
+        operation = ChangeOperation.DELETE
+    else:
+        operation = ChangeOperation.CREATE if created else ChangeOperation.UPDATE
+    changes.record_change(instance, operation)
+
+
+def index_search_terms(sender, instance, created=False, update_fields=None, **kwargs):  # pylint: disable=unused-argument
+    """
+    Update the search index entries of a saved or deleted model instance.
+    """
+    if kwargs['signal'] is post_delete:
+        search.unindex(sender, [instance.pk])
+    elif update_fields is None or set(update_fields) & search.get_source_fields(search.get_entity_type(sender)):
+        search.index(sender, [instance], created=created)
+        if not created:
+            search.index_dependents(instance)
+
+
+def denormalize_program_organization(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Copy the organization of a saved ProgramOrganization onto its program, or
+    clear it from the program if the ProgramOrganization was deleted.
+    """
+    if kwargs['signal'] is post_delete:
+        organization_id, organization_key = None, ''
+    else:
+        organization_id, organization_key = instance.organization_id, instance.organization.key
+
+    models.Program.objects.filter(pk=instance.program_id).update(
+        organization_id=organization_id,
+        organization_key=organization_key,
+    )
+    # keep the in-memory program consistent with the database, when it has been loaded.
+    if models.ProgramOrganization.program.is_cached(instance):
+        instance.program.organization_id, instance.program.organization_key = organization_id, organization_key
+
+
+def denormalize_organization_key(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Propagate an organization's (possibly changed) key to its programs.
+    """
+    models.Program.objects.filter(
+        organization_id=instance.pk
+    ).exclude(
+        organization_key=instance.key
+    ).update(
+        organization_key=instance.key
+    )
+
+
+post_save.connect(
+    denormalize_program_organization, sender=models.ProgramOrganization, dispatch_uid='denormalize_organization'
+)
+post_delete.connect(
+    denormalize_program_organization, sender=models.ProgramOrganization, dispatch_uid='denormalize_organization'
+)
+post_save.connect(denormalize_organization_key, sender=models.Organization, dispatch_uid='denormalize_organization')
+
+
+DOCUMENT_SOURCES = (
+    models.Program,
+    models.Organization,
+    models.ProgramOrganization,
+    models.CourseCode,
+    models.ProgramCourseCode,
+    models.ProgramCourseRunMode,
+    models.ProgramDefault,
+)
+
+for source in DOCUMENT_SOURCES:
+    post_save.connect(rebuild_program_documents, sender=source, dispatch_uid='documents_post_save')
+    post_delete.connect(rebuild_program_documents, sender=source, dispatch_uid='documents_post_delete')
+
+request_finished.connect(documents.change_catalog_version_after_commit, dispatch_uid='documents_request_finished')
+request_finished.connect(documents.release_all_rebuilds, dispatch_uid='documents_release_all')
+
+pre_delete.connect(suppress_program_documents, sender=models.Program, dispatch_uid='documents_pre_delete')
+post_delete.connect(release_program_documents, sender=models.Program, dispatch_uid='documents_release')
+
+for source in changes.LOGGED_MODELS:
+    post_save.connect(log_catalog_change, sender=source, dispatch_uid='changes_post_save')
+    post_delete.connect(log_catalog_change, sender=source, dispatch_uid='changes_post_delete')
+
+for source in search.INDEXED_MODELS:
+    post_save.connect(index_search_terms, sender=source, dispatch_uid='search_post_save')
+    post_delete.connect(index_search_terms, sender=source, dispatch_uid='search_post_delete')
@@ -0,0 +1,178 @@
+"""Tests for the creation and update of many programs at once."""
+import datetime
+
+from django.test import TestCase
+import pytz
+
+from programs.apps.programs import bulk
+from programs.apps.programs.constants import ChangeOperation, ProgramCategory, ProgramStatus
+from programs.apps.programs.models import (
+    CatalogChange, CourseCode, Program, ProgramCourseCode, ProgramCourseRunMode, ProgramDocument,
+)
+from programs.apps.programs.tests import factories
+
+
+START_DATE = datetime.datetime(2016, 1, 1, tzinfo=pytz.UTC)
+
+
+class WriteProgramsTests(TestCase):
+    """
+    Tests for `bulk.write_programs`.
+    """
+
+    def setUp(self):
+        super(WriteProgramsTests, self).setUp()
+        # a short name keeps the search index entries of 20 course codes within a single SQLite insert.
+        self.org = factories.OrganizationFactory.create(key='BulkX', display_name='Bulk')
+
+    def _course_code(self, key, display_name=None, run_keys=()):
+        """Build the data of a course code of the test organization, with run modes of the given runs."""
+        data = {
+            'key': key,
+            'organization': {'key': self.org.key},
+            'run_modes': [
+                {'course_key': 'course-v1:{}+{}+{}'.format(self.org.key, key, run), 'mode_slug': 'verified',
+                 'start_date': START_DATE}
+                for run in run_keys
+            ],
+        }
+        if display_name is not None:
+            data['display_name'] = display_name
+        return data
+
+    def _new_program(self, name, course_codes=()):
+        """Build the data of a new program of the test organization."""
+        return {
+            'name': name,
+            'category': ProgramCategory.XSERIES,
+            'organizations': [{'key': self.org.key}],
+            'course_codes': list(course_codes),
+        }
+
+    def _make_program(self):
+        """Create a program of the test organization, with one course code having one run mode."""
+        program = factories.ProgramFactory.create()
+        factories.ProgramOrganizationFactory.create(program=program, organization=self.org)
+        course_code = factories.CourseCodeFactory.create(organization=self.org, key='OLD')
+        program_course_code = factories.ProgramCourseCodeFactory.create(program=program, course_code=course_code)
+        factories.ProgramCourseRunModeFactory.create(
+            program_course_code=program_course_code, course_key='course-v1:BulkX+OLD+1T2016', start_date=START_DATE
+        )
+        return Program.objects.get(id=program.id)
+
+    def test_create(self):
+        """
+        Verify that programs are created with their course codes and run modes, and are fully recorded.
+        """
+        items = [
+            self._new_program('First', [
+                self._course_code('A', 'Course A', ['1T2016', '2T2016']),
+                self._course_code('B', 'Course B'),
+            ]),
+            self._new_program('Second', [self._course_code('A', 'Course A', ['1T2016'])]),
+        ]
+        results = bulk.write_programs(items)
+
+        self.assertEqual([(result.created, result.errors) for result in results], [(True, None), (True, None)])
+        first, second = [Program.objects.get(id=result.program.id) for result in results]
+        self.assertEqual((first.name, first.status, first.organization_key), ('First', ProgramStatus.UNPUBLISHED,
+                                                                              self.org.key))
+        self.assertEqual(first.last_course_code_position, 2)
+        self.assertEqual(
+            list(first.programcoursecode_set.values_list('course_code__key', 'position')), [('A', 1), ('B', 2)]
+        )
+        self.assertEqual(second.programorganization_set.get().organization, self.org)
+        self.assertEqual(CourseCode.objects.filter(organization=self.org).count(), 2)
+
+        run_mode = ProgramCourseRunMode.objects.get(program_course_code__program=second)
+        self.assertEqual((run_mode.run_key, run_mode.start_date), ('1T2016', START_DATE))
+
+        # the rows inserted in bulk are logged, and the programs' documents are built.
+        logged = set(CatalogChange.objects.values_list('entity_type', 'operation'))
+        for entity_type in ('program', 'programorganization', 'coursecode', 'programcoursecode',
+                            'programcourserunmode'):
+            self.assertIn((entity_type, ChangeOperation.CREATE), logged)
+        self.assertEqual(CatalogChange.objects.filter(entity_type='programcourserunmode').count(), 3)
+        self.assertEqual(ProgramDocument.objects.filter(program__in=[first, second]).count(), 2)
+
+    def test_constant_queries(self):
+        """
+        Verify that the number of queries doesn't grow with the number of programs created.
+        """
+        def _items(prefix, count):
+            """Build the data of `count` new programs, with their own course codes."""
+            return [
+                self._new_program('{}-{}'.format(prefix, i), [self._course_code('{}{}'.format(prefix, i), 'C', ['R'])])
+                for i in range(count)
+            ]
+
+        # programs are rebuilt REBUILD_CHUNK_SIZE at a time, so both counts fit in one chunk.
+        with self.assertNumQueries(31):
+            bulk.write_programs(_items('few', 2))
+        with self.assertNumQueries(31):
+            bulk.write_programs(_items('many', 20))
+
+    def test_update(self):
+        """
+        Verify that programs are updated, and their course codes and run modes replaced by those requested.
+        """
+        program = self._make_program()
+        results = bulk.write_programs([{
+            'uuid': program.uuid,
+            'status': ProgramStatus.ACTIVE,
+            'course_codes': [
+                self._course_code('NEW', 'New Course', ['1T2017']),
+                self._course_code('OLD', 'Renamed', ['1T2016', '2T2016']),
+            ],
+        }])
+
+        self.assertEqual((results[0].program.id, results[0].created, results[0].errors), (program.id, False, None))
+        program = Program.objects.get(id=program.id)
+        self.assertEqual(program.status, ProgramStatus.ACTIVE)
+        self.assertEqual(
+            list(program.programcoursecode_set.values_list('course_code__key', 'course_code__display_name')),
+            [('OLD', 'Renamed'), ('NEW', 'New Course')],
+        )
+        self.assertEqual(program.last_course_code_position, 2)
+        self.assertEqual(
+            sorted(ProgramCourseRunMode.objects.filter(
+                program_course_code__program=program).values_list('course_key', flat=True)),
+            ['course-v1:BulkX+NEW+1T2017', 'course-v1:BulkX+OLD+1T2016', 'course-v1:BulkX+OLD+2T2016'],
+        )
+
+        # course codes which aren't requested are removed from the program, and run modes are kept when omitted.
+        course_code = self._course_code('NEW')
+        del course_code['run_modes']
+        bulk.write_programs([{'id': program.id, 'course_codes': [course_code]}])
+        self.assertEqual(
+            list(ProgramCourseCode.objects.filter(program=program).values_list('course_code__key', flat=True)),
+            ['NEW'],
+        )
+        self.assertEqual(ProgramCourseRunMode.objects.filter(program_course_code__program=program).count(), 1)
+
+    def test_invalid(self):
+        """
+        Verify that invalid items are reported, and don't prevent valid ones from being written.
+        """
+        existing = self._make_program()
+        results = bulk.write_programs([
+            self._new_program(existing.name),
+            {'name': 'No Organization', 'category': ProgramCategory.XSERIES},
+            dict(self._new_program('Active'), status=ProgramStatus.ACTIVE, marketing_slug='active'),
+            dict(self._new_program('Unknown Organization'), organizations=[{'key': 'unknown'}]),
+            self._new_program('Valid'),
+            self._new_program('Valid'),
+            {'id': 0},
+            self._new_program('No Start Date', [dict(self._course_code('NEW'), run_modes=[{
+                'course_key': 'course-v1:BulkX+NEW+1T2016', 'mode_slug': 'verified',
+            }])]),
+            self._new_program('Duplicates', [self._course_code('OLD'), self._course_code('OLD')]),
+            {'id': existing.id, 'organizations': [{'key': 'other'}]},
+            {'id': existing.id, 'status': ProgramStatus.ACTIVE, 'marketing_slug': ''},
+        ])
+
+        self.assertEqual([sorted(result.errors or {}) for result in results], [
+            ['name'], ['organizations'], ['status'], ['organizations'], [], ['name'], ['id'], ['course_codes'],
+            ['course_codes'], ['organizations'], ['marketing_slug'],
+        ])
+        self.assertEqual(list(Program.objects.order_by('id').values_list('name', flat=True)), [existing.name, 'Valid'])
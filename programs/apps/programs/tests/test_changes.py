@@ -0,0 +1,130 @@
+"""Tests for the catalog change log."""
+import datetime
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from programs.apps.programs import changes
+from programs.apps.programs.constants import ChangeOperation
+from programs.apps.programs.models import CatalogChange, ChangeLogCompaction
+from programs.apps.programs.tests import factories
+
+
+class CatalogChangeTests(TestCase):
+    """
+    Tests for the recording and compaction of catalog changes.
+    """
+
+    def _get_log(self):
+        """Return the logged changes, as tuples of (entity type, entity id, operation), in order."""
+        return list(CatalogChange.objects.order_by('id').values_list('entity_type', 'entity_id', 'operation'))
+
+    def _age(self, days):
+        """Make all logged changes older by the given number of days."""
+        CatalogChange.objects.update(created=timezone.now() - datetime.timedelta(days=days))
+
+    def test_recorded(self):
+        """
+        Verify that creations, updates and deletions of catalog rows are logged in order.
+        """
+        org = factories.OrganizationFactory.create()
+        program = factories.ProgramFactory.create()
+        program_org = factories.ProgramOrganizationFactory.create(program=program, organization=org)
+        program.subtitle = 'changed'
+        program.save()
+        program_org_id = program_org.id
+        program_org.delete()
+
+        self.assertEqual(self._get_log(), [
+            ('organization', org.id, ChangeOperation.CREATE),
+            ('program', program.id, ChangeOperation.CREATE),
+            ('programorganization', program_org_id, ChangeOperation.CREATE),
+            ('program', program.id, ChangeOperation.UPDATE),
+            ('programorganization', program_org_id, ChangeOperation.DELETE),
+        ])
+
+    def test_get_changes(self):
+        """
+        Verify that the changes following a sequence number are returned in order, once numbered.
+        """
+        programs = factories.ProgramFactory.create_batch(3)
+        self.assertEqual(changes.get_changes(0, 10), [])
+        self.assertEqual(changes.get_latest_sequence(), 0)
+
+        self.assertEqual(changes.assign_sequences(), 3)
+        first = CatalogChange.objects.order_by('sequence').first()
+        self.assertEqual(
+            [change.entity_id for change in changes.get_changes(first.sequence, 10)],
+            [program.id for program in programs[1:]],
+        )
+        self.assertEqual(len(changes.get_changes(0, 2)), 2)
+        self.assertEqual(changes.get_latest_sequence(), CatalogChange.objects.order_by('id').last().sequence)
+        self.assertEqual(changes.assign_sequences(), 0)
+
+    def test_assign_sequences(self):
+        """
+        Verify that changes are numbered after all those numbered before, whatever their ids.
+        """
+        factories.ProgramFactory.create_batch(2)
+        changes.assign_sequences()
+        latest = changes.get_latest_sequence()
+
+        # a change with a lower id, committed by a transaction which took longer.
+        late = CatalogChange.objects.order_by('id').first()
+        late.sequence = None
+        late.save()
+        program = factories.ProgramFactory.create()
+
+        self.assertEqual(changes.assign_sequences(), 2)
+        self.assertEqual(
+            [change.entity_id for change in changes.get_changes(latest, 10)],
+            [late.entity_id, program.id],
+        )
+
+    def test_compact_superseded(self):
+        """
+        Verify that only the latest change to each row is kept by compaction, and that the horizon is unchanged.
+        """
+        program = factories.ProgramFactory.create()
+        other = factories.ProgramFactory.create()
+        for subtitle in ('first', 'second'):
+            program.subtitle = subtitle
+            program.save()
+
+        self.assertEqual(changes.compact(), 2)
+        self.assertEqual(self._get_log(), [
+            ('program', other.id, ChangeOperation.CREATE),
+            ('program', program.id, ChangeOperation.UPDATE),
+        ])
+        self.assertEqual(changes.get_horizon(), 0)
+
+    def test_compact_expired(self):
+        """
+        Verify that old deletions are removed by compaction, moving the horizon past them.
+        """
+        program = factories.ProgramFactory.create()
+        deleted_id = program.id
+        program.delete()
+        kept = factories.ProgramFactory.create()
+        self._age(days=31)
+        changes.assign_sequences()
+        deletion = CatalogChange.objects.get(operation=ChangeOperation.DELETE)
+
+        call_command('compact_change_log')
+        self.assertEqual(self._get_log(), [('program', kept.id, ChangeOperation.CREATE)])
+        self.assertEqual(changes.get_horizon(), deletion.sequence)
+        self.assertIsNotNone(ChangeLogCompaction.get_solo().compacted)
+        self.assertNotIn(deleted_id, CatalogChange.objects.values_list('entity_id', flat=True))
+
+    def test_compact_recent_deletions(self):
+        """
+        Verify that recent deletions are kept by compaction.
+        """
+        program = factories.ProgramFactory.create()
+        program_id = program.id
+        program.delete()
+
+        changes.compact()
+        self.assertEqual(self._get_log(), [('program', program_id, ChangeOperation.DELETE)])
+        self.assertEqual(changes.get_horizon(), 0)
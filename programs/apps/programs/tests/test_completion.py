@@ -0,0 +1,99 @@
+"""
+Tests for the evaluation of program completion.
+"""
+from django.test import TestCase
+
+from programs.apps.programs import completion
+from programs.apps.programs.constants import ProgramStatus
+from programs.apps.programs.course_index import parse_course_key
+from programs.apps.programs.models import CourseCode
+from programs.apps.programs.tests import factories
+
+
+class CompletionTests(TestCase):
+    """
+    Tests for finding the programs completed by learners.
+    """
+
+    def setUp(self):
+        super(CompletionTests, self).setUp()
+        self.org = factories.OrganizationFactory.create(key='edX')
+        self.program = self._create_program(
+            [('DemoX', [('course-v1:edX+DemoX+1T2016', 'verified'), ('edX/DemoX/2T2016', 'verified')]),
+             ('OtherX', [('course-v1:edX+OtherX+1T2016', 'professional')])]
+        )
+
+    def _create_program(self, course_codes, status=ProgramStatus.ACTIVE):
+        """
+        Create a program with the given course codes, each given as its key and a list of (course key, mode).
+        """
+        program = factories.ProgramFactory.create(status=status)
+        factories.ProgramOrganizationFactory.create(program=program, organization=self.org)
+        for key, run_modes in course_codes:
+            course_code, __ = CourseCode.objects.get_or_create(
+                organization=self.org, key=key, defaults={'display_name': key}
+            )
+            program_course_code = factories.ProgramCourseCodeFactory.create(program=program, course_code=course_code)
+            for course_key, mode_slug in run_modes:
+                factories.ProgramCourseRunModeFactory.create(
+                    program_course_code=program_course_code, course_key=course_key, mode_slug=mode_slug
+                )
+        return program
+
+    def _get_completed(self, *completed_courses):
+        """
+        Evaluate the programs completed by a learner having completed the given (course key, mode) pairs.
+        """
+        completed_runs = {}
+        for course_key, mode in completed_courses:
+            completed_runs.setdefault(parse_course_key(course_key), set()).add(mode)
+        return [program_id for program_id, __ in completion.get_index().get_completed_programs(completed_runs)]
+
+    def test_completion(self):
+        """
+        Verify that a program is completed by one completed run of each course code, in an accepted mode.
+        """
+        self.assertEqual(self._get_completed(('course-v1:edX+DemoX+1T2016', 'verified')), [])
+        self.assertEqual(
+            self._get_completed(('course-v1:edX+DemoX+1T2016', 'verified'), ('course-v1:edX+OtherX+1T2016', 'audit')),
+            []
+        )
+        self.assertEqual(
+            self._get_completed(
+                # either key format matches.
+                ('course-v1:edX+DemoX+2T2016', 'verified'),
+                ('edX/OtherX/1T2016', 'professional'),
+            ),
+            [self.program.id]
+        )
+        self.assertEqual(
+            self._get_completed(('course-v1:edX+DemoX+1T2016', None), ('course-v1:edX+OtherX+1T2016', None)),
+            [self.program.id]
+        )
+
+    def test_incompletable_programs(self):
+        """
+        Verify that programs which aren't active or retired, have a course code without runs, or
+        have no course codes at all can't be completed.
+        """
+        completed = (('course-v1:edX+DemoX+1T2016', None), ('course-v1:edX+OtherX+1T2016', None))
+        self._create_program([('DemoX', [('course-v1:edX+DemoX+1T2016', 'verified')])], ProgramStatus.UNPUBLISHED)
+        self._create_program([('DemoX', [('course-v1:edX+DemoX+1T2016', 'verified')]), ('EmptyX', [])])
+        self._create_program([])
+        retired = self._create_program(
+            [('OtherX', [('course-v1:edX+OtherX+1T2016', 'verified')])], ProgramStatus.RETIRED
+        )
+
+        self.assertEqual(self._get_completed(*completed), [self.program.id, retired.id])
+
+    def test_index_refresh(self):
+        """
+        Verify that the index is built once, and rebuilt when the catalog changes.
+        """
+        index = completion.get_index()
+        with self.assertNumQueries(0):
+            self.assertIs(completion.get_index(), index)
+
+        other = self._create_program([('DemoX', [('course-v1:edX+DemoX+1T2016', 'verified')])])
+        self.assertIsNot(completion.get_index(), index)
+        self.assertEqual(self._get_completed(('course-v1:edX+DemoX+1T2016', 'verified')), [other.id])
@@ -0,0 +1,94 @@
+"""
+Tests for the lookup of programs by course.
+"""
+import ddt
+from django.test import TestCase, override_settings
+from opaque_keys import InvalidKeyError
+
+from programs.apps.core.constants import Role
+from programs.apps.programs import course_index
+from programs.apps.programs.constants import ProgramStatus
+from programs.apps.programs.tests import factories
+
+
+@ddt.ddt
+class CourseIndexTests(TestCase):
+    """
+    Tests for finding the programs which include given course runs and courses.
+    """
+
+    def setUp(self):
+        super(CourseIndexTests, self).setUp()
+        org = factories.OrganizationFactory.create(key='edX')
+        course_code = factories.CourseCodeFactory.create(key='DemoX', organization=org)
+        self.programs = []
+        for status in (ProgramStatus.ACTIVE, ProgramStatus.UNPUBLISHED):
+            program = factories.ProgramFactory.create(status=status)
+            factories.ProgramOrganizationFactory.create(program=program, organization=org)
+            program_course_code = factories.ProgramCourseCodeFactory.create(program=program, course_code=course_code)
+            factories.ProgramCourseRunModeFactory.create(
+                program_course_code=program_course_code, course_key='course-v1:edX+DemoX+Demo_2016'
+            )
+            self.programs.append(program)
+
+    def _expected(self, *programs):
+        """Describe the given programs as returned by `find_programs`."""
+        return tuple((program.id, unicode(program.uuid)) for program in programs)
+
+    @ddt.data(
+        ('course-v1:edX+DemoX+Demo_2016', ('edX', 'DemoX', 'Demo_2016')),
+        ('edX/DemoX/Demo_2016', ('edX', 'DemoX', 'Demo_2016')),
+        ('edX+DemoX', ('edX', 'DemoX', None)),
+        ('course-v1:edX+DemoX', ('edX', 'DemoX', None)),
+        ('edX/DemoX', ('edX', 'DemoX', None)),
+    )
+    @ddt.unpack
+    def test_parse_course_key(self, key, expected):
+        """Verify that course run keys and course keys are split into their parts."""
+        self.assertEqual(course_index.parse_course_key(key), expected)
+
+    @ddt.data('DemoX', 'edX+DemoX+Demo_2016+extra', '')
+    def test_parse_invalid_course_key(self, key):
+        """Verify that other keys are rejected."""
+        with self.assertRaises(InvalidKeyError):
+            course_index.parse_course_key(key)
+
+    def test_find_programs(self):
+        """
+        Verify that runs match in either key format, that courses match, and that only programs visible
+        to the role are found, in one query for runs and one for courses.
+        """
+        keys = [
+            'course-v1:edX+DemoX+Demo_2016', 'edX/DemoX/Demo_2016', 'edX+DemoX', 'edX+Other',
+            'course-v1:edX+DemoX+Other',
+        ]
+        with self.assertNumQueries(2):
+            results = course_index.find_programs(keys, Role.ADMINS)
+
+        both = self._expected(*self.programs)
+        self.assertEqual(results, dict(zip(keys, [both, both, both, (), ()])))
+
+        results = course_index.find_programs(keys[:1], Role.LEARNERS)
+        self.assertEqual(results, {keys[0]: self._expected(self.programs[0])})
+
+    def test_cache(self):
+        """
+        Verify that results are cached until the catalog changes.
+        """
+        key = 'edX+DemoX'
+        course_index.find_programs([key], Role.LEARNERS)
+        with self.assertNumQueries(0):
+            self.assertEqual(course_index.find_programs([key], Role.LEARNERS), {key: self._expected(self.programs[0])})
+
+        self.programs[1].status = ProgramStatus.ACTIVE
+        self.programs[1].save()
+        self.assertEqual(course_index.find_programs([key], Role.LEARNERS), {key: self._expected(*self.programs)})
+
+    @override_settings(PROGRAM_COURSE_LOOKUP_CACHE_SIZE=0)
+    def test_cache_size(self):
+        """
+        Verify that results aren't cached beyond the maximum size.
+        """
+        course_index.find_programs(['edX+DemoX'], Role.LEARNERS)
+        with self.assertNumQueries(1):
+            course_index.find_programs(['edX+DemoX'], Role.LEARNERS)
@@ -0,0 +1,67 @@
+"""
+Tests for the cached parsing of course run keys.
+"""
+import ddt
+from django.test import TestCase, override_settings
+import mock
+from opaque_keys import InvalidKeyError
+from prometheus_client import REGISTRY
+
+from programs.apps.programs import course_keys
+
+
+@ddt.ddt
+class ParseCourseRunKeyTests(TestCase):
+    """
+    Tests for `course_keys.parse_course_run_key`.
+    """
+
+    def setUp(self):
+        super(ParseCourseRunKeyTests, self).setUp()
+        course_keys.clear_cache()
+        self.addCleanup(course_keys.clear_cache)
+
+    @staticmethod
+    def _get_lookups(result):
+        """Read the number of lookups with the given result counted so far."""
+        return REGISTRY.get_sample_value('programs_course_key_cache_lookups_total', {'result': result}) or 0
+
+    @ddt.data(
+        ('course-v1:edX+DemoX+Demo_2016', ('edX', 'DemoX', 'Demo_2016')),
+        ('edX/DemoX/Demo_2016', ('edX', 'DemoX', 'Demo_2016')),
+    )
+    @ddt.unpack
+    def test_parse(self, key, parts):
+        """Verify that course run keys in either format are split into their parts, which are cached."""
+        for _ in range(2):
+            self.assertEqual(course_keys.parse_course_run_key(key), parts)
+        self.assertEqual(course_keys.get_cache_info(), (1, 1, 10000, 1))
+
+    @ddt.data('course-v1:edX+DemoX', 'edX/DemoX', '', 'invalid')
+    def test_invalid(self, key):
+        """Verify that invalid keys are rejected, without being parsed again."""
+        from_string = course_keys.CourseKey.from_string
+        with mock.patch.object(course_keys.CourseKey, 'from_string', wraps=from_string) as mock_parse:
+            for _ in range(2):
+                with self.assertRaises(InvalidKeyError):
+                    course_keys.parse_course_run_key(key)
+        self.assertEqual(mock_parse.call_count, 1)
+
+    @override_settings(COURSE_KEY_CACHE_SIZE=2)
+    def test_least_recently_used(self):
+        """Verify that the least recently used keys are forgotten first."""
+        keys = ['course-v1:edX+DemoX+{}'.format(run) for run in ('a', 'b', 'c')]
+        for key in (keys[0], keys[1], keys[0], keys[2]):
+            course_keys.parse_course_run_key(key)
+        self.assertEqual(course_keys.get_cache_info(), (1, 3, 2, 2))
+
+        course_keys.parse_course_run_key(keys[0])
+        course_keys.parse_course_run_key(keys[1])
+        self.assertEqual(course_keys.get_cache_info().hits, 2)
+
+    def test_metrics(self):
+        """Verify that hits and misses are counted by the metrics exposed by the process."""
+        before = self._get_lookups('hit'), self._get_lookups('miss')
+        for _ in range(3):
+            course_keys.parse_course_run_key('course-v1:edX+DemoX+Demo_2016')
+        self.assertEqual((self._get_lookups('hit'), self._get_lookups('miss')), (before[0] + 2, before[1] + 1))
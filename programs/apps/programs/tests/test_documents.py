@@ -0,0 +1,281 @@
+"""
+Tests for the maintenance of materialized program documents.
+"""
+import json
+from StringIO import StringIO
+
+import ddt
+import mock
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.db.models.signals import pre_delete
+from django.test import TestCase, override_settings
+
+from programs.apps.core.constants import Role
+from programs.apps.programs import documents
+from programs.apps.programs.constants import ProgramStatus
+from programs.apps.programs.models import Program, ProgramDocument
+from programs.apps.programs.tests import factories
+from programs.apps.programs.tests.helpers import make_banner_image_file
+
+
+@ddt.ddt
+class ProgramDocumentTests(TestCase):
+    """
+    Tests for the rebuilding of program documents when catalog data changes.
+    """
+
+    def setUp(self):
+        super(ProgramDocumentTests, self).setUp()
+        self.org = factories.OrganizationFactory.create(key='test-org-key', display_name='test-org-name')
+        self.program = factories.ProgramFactory.create(status=ProgramStatus.ACTIVE)
+        factories.ProgramOrganizationFactory.create(program=self.program, organization=self.org)
+        self.course_code = factories.CourseCodeFactory.create(organization=self.org)
+        self.program_course_code = factories.ProgramCourseCodeFactory.create(
+            program=self.program, course_code=self.course_code
+        )
+
+    def _get_document(self, role=Role.LEARNERS):
+        """
+        Load and parse the stored document of the test program.
+        """
+        return json.loads(ProgramDocument.objects.get(program=self.program, role=role).document)
+
+    @ddt.data(
+        (ProgramStatus.UNPUBLISHED, [Role.ADMINS]),
+        (ProgramStatus.ACTIVE, [Role.ADMINS, Role.LEARNERS]),
+        (ProgramStatus.RETIRED, [Role.ADMINS, Role.LEARNERS]),
+        (ProgramStatus.DELETED, []),
+    )
+    @ddt.unpack
+    def test_roles(self, status, expected_roles):
+        """
+        Verify that one document is stored for each role allowed to see the program.
+        """
+        self.program.status = status
+        self.program.save()
+
+        roles = ProgramDocument.objects.filter(program=self.program).values_list('role', flat=True)
+        self.assertEqual(sorted(roles), sorted(expected_roles))
+
+    def test_program_changes(self):
+        """
+        Verify that documents reflect changes to the program itself.
+        """
+        self.program.subtitle = 'changed-subtitle'
+        self.program.save()
+
+        document = self._get_document()
+        self.assertEqual(document['subtitle'], 'changed-subtitle')
+        self.assertEqual(document['id'], self.program.id)
+        self.assertEqual(document['organizations'], [{'key': 'test-org-key', 'display_name': 'test-org-name'}])
+
+    def test_related_changes(self):
+        """
+        Verify that documents reflect changes to organizations, course codes and run modes.
+        """
+        factories.ProgramCourseRunModeFactory.create(
+            program_course_code=self.program_course_code,
+            course_key='course-v1:org+course+run',
+        )
+        self.assertEqual(
+            [rm['course_key'] for rm in self._get_document()['course_codes'][0]['run_modes']],
+            ['course-v1:org+course+run']
+        )
+
+        self.course_code.display_name = 'changed-course-name'
+        self.course_code.save()
+        self.assertEqual(self._get_document()['course_codes'][0]['display_name'], 'changed-course-name')
+
+        self.org.display_name = 'changed-org-name'
+        self.org.save()
+        self.assertEqual(self._get_document()['organizations'][0]['display_name'], 'changed-org-name')
+
+        self.program_course_code.delete()
+        self.assertEqual(self._get_document()['course_codes'], [])
+
+    def test_program_deletion(self):
+        """
+        Verify that deleting a program (and thus its related rows) removes its documents.
+        """
+        factories.ProgramCourseRunModeFactory.create(
+            program_course_code=self.program_course_code,
+            course_key='course-v1:org+course+run',
+        )
+        self.program.delete()
+        self.assertFalse(ProgramDocument.objects.exists())
+
+    @ddt.data(True, False)
+    def test_failed_program_deletion(self, deferred):
+        """
+        Verify that a program whose deletion failed is rebuilt again, once the
+        `deferred_rebuild` block in which it failed exits, or the request ends.
+        """
+        def _fail(**kwargs):  # pylint: disable=unused-argument
+            """Fail the deletion, after the program's rebuilds were suppressed."""
+            raise DatabaseError('simulated failure')
+
+        pre_delete.connect(_fail, sender=Program, dispatch_uid='test_failed_program_deletion')
+        self.addCleanup(pre_delete.disconnect, sender=Program, dispatch_uid='test_failed_program_deletion')
+
+        if deferred:
+            with documents.deferred_rebuild(), self.assertRaises(DatabaseError), transaction.atomic():
+                self.program.delete()
+        else:
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                self.program.delete()
+            # as the request ends.
+            documents.release_all_rebuilds()
+
+        self.program.subtitle = 'changed'
+        self.program.save()
+        self.assertEqual(self._get_document()['subtitle'], 'changed')
+
+    @override_settings(MEDIA_URL='/test/media/url/')
+    def test_relative_urls(self):
+        """
+        Verify that relative banner image URLs are stored with a placeholder for the request's scheme and host.
+        """
+        self.program.banner_image = make_banner_image_file('test_filename.jpg')
+        self.program.save()
+
+        for url in self._get_document()['banner_image_urls'].values():
+            self.assertTrue(url.startswith(documents.ABSOLUTE_URI_PLACEHOLDER + '/test/media/url/'))
+
+    def test_deferred_rebuild(self):
+        """
+        Verify that rebuilds scheduled in a deferred block are performed once, upon exit.
+        """
+        with documents.deferred_rebuild():
+            self.program.subtitle = 'first'
+            self.program.save()
+            with documents.deferred_rebuild():
+                self.program.subtitle = 'second'
+                self.program.save()
+            self.assertEqual(self._get_document()['subtitle'], 'test-subtitle')
+
+        self.assertEqual(self._get_document()['subtitle'], 'second')
+
+    def test_get_documents_missing(self):
+        """
+        Verify that missing documents are built on demand.
+        """
+        ProgramDocument.objects.all().delete()
+
+        result = documents.get_documents([self.program.id], Role.LEARNERS)
+        self.assertEqual(json.loads(result[self.program.id])['id'], self.program.id)
+        self.assertEqual(ProgramDocument.objects.filter(program=self.program).count(), 2)
+
+    def test_catalog_version(self):
+        """
+        Verify that the catalog version changes whenever documents are rebuilt, including
+        when a program is deleted, and only then.
+        """
+        version = documents.get_catalog_version()
+        self.assertEqual(documents.get_catalog_version(), version)
+
+        self.program.subtitle = 'changed'
+        self.program.save()
+        self.assertNotEqual(documents.get_catalog_version(), version)
+
+        version = documents.get_catalog_version()
+        self.program.delete()
+        self.assertNotEqual(documents.get_catalog_version(), version)
+
+    def test_program_versions(self):
+        """
+        Verify that the versions of programs are incremented whenever their documents change, however they
+        are changed, but not when they are created, nor when their version was already incremented.
+        """
+        def _get_version(program):
+            """Read the version of the program from the database."""
+            return Program.objects.values_list('version', flat=True).get(id=program.id)
+
+        other = factories.ProgramFactory.create()
+        self.assertEqual(_get_version(other), 1)
+        factories.ProgramOrganizationFactory.create(program=other, organization=self.org)
+        self.assertEqual(_get_version(other), 2)
+
+        version = _get_version(self.program)
+        self.org.display_name = 'changed'
+        self.org.save()
+        self.assertEqual((_get_version(self.program), _get_version(other)), (version + 1, 3))
+
+        with documents.deferred_rebuild():
+            Program.bump_version(self.program)
+            documents.skip_version_bumps([self.program.id])
+            self.program.subtitle = 'changed'
+            self.program.save()
+        self.assertEqual(_get_version(self.program), version + 2)
+
+        # rebuilding documents without changes leaves versions alone.
+        call_command('rebuild_program_documents')
+        self.assertEqual(_get_version(self.program), version + 2)
+
+    def test_catalog_version_after_commit(self):
+        """
+        Verify that the catalog version changes again once the transaction in which documents were rebuilt is over.
+        """
+        self.program.subtitle = 'changed'
+        self.program.save()
+        version = documents.get_catalog_version()
+
+        # the test's own transaction is still in progress.
+        documents.change_catalog_version_after_commit()
+        self.assertEqual(documents.get_catalog_version(), version)
+
+        with mock.patch.object(documents, '_in_transaction', return_value=False):
+            documents.change_catalog_version_after_commit()
+            self.assertNotEqual(documents.get_catalog_version(), version)
+
+            version = documents.get_catalog_version()
+            documents.change_catalog_version_after_commit()
+            self.assertEqual(documents.get_catalog_version(), version)
+
+    def test_rebuild_command(self):
+        """
+        Verify that the management command rebuilds the documents of all programs.
+        """
+        ProgramDocument.objects.all().delete()
+        call_command('rebuild_program_documents')
+        self.assertEqual(ProgramDocument.objects.filter(program=self.program).count(), 2)
+
+    def test_export_documents(self):
+        """
+        Verify that documents are exported in order of id, in chunks, rendering missing ones on the fly.
+        """
+        programs = [self.program] + factories.ProgramFactory.create_batch(4, status=ProgramStatus.ACTIVE)
+        factories.ProgramFactory.create(status=ProgramStatus.UNPUBLISHED)
+        ProgramDocument.objects.filter(program=programs[2]).delete()
+
+        queryset = Program.objects.filter(status__in=documents.VISIBLE_STATUSES[Role.LEARNERS])
+        with mock.patch.object(documents, 'EXPORT_CHUNK_SIZE', 2):
+            exported = documents.export_documents(queryset, Role.LEARNERS)
+            # a savepoint and its release, ids and documents for each of 3 chunks, an empty chunk,
+            # and the missing program, with its relations and the default banner image.
+            with self.assertNumQueries(2 + 2 * 3 + 1 + 4):
+                exported = [json.loads(document) for document in exported]
+
+        self.assertEqual([document['id'] for document in exported], [program.id for program in programs])
+        self.assertEqual(exported[0]['course_codes'][0]['key'], self.course_code.key)
+        self.assertFalse(ProgramDocument.objects.filter(program=programs[2]).exists())
+
+    def test_export_command(self):
+        """
+        Verify that the management command exports the documents visible to the given role, as NDJSON.
+        """
+        unpublished = factories.ProgramFactory.create(status=ProgramStatus.UNPUBLISHED)
+        self.program.banner_image = make_banner_image_file('test_filename.jpg')
+        self.program.save()
+
+        output = StringIO()
+        call_command('export_programs', stdout=output)
+        exported = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([document['id'] for document in exported], [self.program.id])
+
+        output = StringIO()
+        call_command('export_programs', role=Role.ADMINS, base_url='https://example.com/', stdout=output)
+        exported = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([document['id'] for document in exported], [self.program.id, unpublished.id])
+        for url in exported[0]['banner_image_urls'].values():
+            self.assertTrue(url.startswith('https://example.com/'))
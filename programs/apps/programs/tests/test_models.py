@@ -6,8 +6,9 @@ import datetime
 import ddt
 import pytz
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import connection, IntegrityError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from programs.apps.programs import models
 from programs.apps.programs.constants import ProgramStatus, ProgramCategory
@@ -63,6 +64,20 @@ class TestProgram(TestCase):
                 marketing_slug='',
             )
 
+    def test_bump_version(self):
+        """Verify that versions are only incremented when they are among those expected."""
+        program = factories.ProgramFactory.create()
+        stale = Program.objects.get(id=program.id)
+
+        self.assertTrue(Program.bump_version(program))
+        self.assertTrue(Program.bump_version(program, [2]))
+        self.assertEqual(program.version, 3)
+        self.assertFalse(Program.bump_version(stale, [1]))
+
+        # saving a stale instance doesn't overwrite the version, which is incremented as the program changed.
+        stale.save()
+        self.assertEqual(Program.objects.get(id=program.id).version, 4)
+
 
 class TestProgramOrganization(TestCase):
     """
@@ -90,6 +105,51 @@ class TestProgramOrganization(TestCase):
         orig_pgm_org.organization = org2
         orig_pgm_org.save()
 
+    def assert_program_organization(self, program, organization):
+        """
+        DRY helper.  Ensure that the program's denormalized organization columns match `organization`,
+        both in memory and in the database.
+        """
+        expected = (organization.id, organization.key) if organization else (None, '')
+        self.assertEqual((program.organization_id, program.organization_key), expected)
+        program = Program.objects.get(id=program.id)
+        self.assertEqual((program.organization_id, program.organization_key), expected)
+
+    def test_denormalized_organization(self):
+        """
+        Ensure that the program's organization id and key are maintained as
+        the association is created, changed and deleted.
+        """
+        program = factories.ProgramFactory.create()
+        org = factories.OrganizationFactory.create()
+        self.assert_program_organization(program, None)
+
+        pgm_org = factories.ProgramOrganizationFactory.create(program=program, organization=org)
+        self.assert_program_organization(program, org)
+
+        org2 = factories.OrganizationFactory.create()
+        pgm_org.organization = org2
+        pgm_org.save()
+        self.assert_program_organization(program, org2)
+
+        org2.key = 'changed-key'
+        org2.save()
+        self.assert_program_organization(Program.objects.get(id=program.id), org2)
+
+        pgm_org.delete()
+        self.assert_program_organization(program, None)
+
+    def test_denormalized_organization_cascade(self):
+        """
+        Ensure that the program's organization columns are cleared when its organization is deleted.
+        """
+        program = factories.ProgramFactory.create()
+        org = factories.OrganizationFactory.create()
+        factories.ProgramOrganizationFactory.create(program=program, organization=org)
+
+        org.delete()
+        self.assert_program_organization(Program.objects.get(id=program.id), None)
+
 
 class TestProgramCourseCode(TestCase):
     """
@@ -153,6 +213,29 @@ class TestProgramCourseCode(TestCase):
         res = models.ProgramCourseCode.objects.filter(program=self.program)
         self.assertEqual([2, 3, 10], [pgm_course.position for pgm_course in res])
 
+        # new rows are positioned after explicitly chosen positions.
+        course_code = factories.CourseCodeFactory.create(organization=self.org)
+        factories.ProgramCourseCodeFactory.create(program=self.program, course_code=course_code)
+        res = models.ProgramCourseCode.objects.filter(program=self.program)
+        self.assertEqual([2, 3, 10, 11], [pgm_course.position for pgm_course in res])
+
+    def test_allocate_positions(self):
+        """
+        Ensure that positions are allocated in batches using a constant number of queries,
+        and are never allocated twice.
+        """
+        # an update and a select, wrapped in a savepoint since tests run inside a transaction.
+        with self.assertNumQueries(4):
+            self.assertEqual([1, 2, 3], models.ProgramCourseCode.allocate_positions(self.program, 3))
+        self.assertEqual([4], models.ProgramCourseCode.allocate_positions(self.program))
+
+        # saving a stale copy of the program must not reset its position counter.
+        stale_program = Program.objects.get(id=self.program.id)
+        models.ProgramCourseCode.allocate_positions(self.program, 2)
+        stale_program.subtitle = 'changed-subtitle'
+        stale_program.save()
+        self.assertEqual(Program.objects.get(id=self.program.id).last_course_code_position, 6)
+
     def test_organization(self):
         """
         Ensure that it is not allowed to associate a course code with a program
@@ -243,6 +326,36 @@ class TestProgramCourseRunMode(TestCase):
         )
         self.assertEqual(prog_course_run_mode.run_key, run_key)
 
+    def test_dirty_fields(self):
+        """
+        Verify that saving an unchanged run mode writes nothing, and that saving
+        a changed one only writes the changed columns.
+        """
+        run_mode = factories.ProgramCourseRunModeFactory.create(
+            program_course_code=self.program_course, course_key=self.course_key, start_date=self.start_date
+        )
+        run_mode = models.ProgramCourseRunMode.objects.get(id=run_mode.id)
+        modified = run_mode.modified
+
+        run_mode.start_date = self.start_date
+        with self.assertNumQueries(0):
+            run_mode.save()
+        self.assertEqual(run_mode.get_dirty_fields(), [])
+
+        run_mode.sku = 'changed'
+        self.assertEqual(run_mode.get_dirty_fields(), ['sku'])
+        with CaptureQueriesContext(connection) as context:
+            run_mode.save()
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if 'UPDATE "programs_programcourserunmode"' in query['sql']
+        ]
+        # the sku is updated along with the modification date alone.
+        self.assertEqual(len(updates), 1)
+        self.assertRegexpMatches(updates[0], r'SET "\w+" = %s, "\w+" = %s WHERE')
+        self.assertEqual(run_mode.get_dirty_fields(), [])
+        self.assertGreater(models.ProgramCourseRunMode.objects.get(id=run_mode.id).modified, modified)
+
     @ddt.data('edx/demo', 'course-v1:edX+DemoX', '', 'invalid')
     def test_invalid_course_key(self, course_key):
         """Verify that invalid course key raises error."""
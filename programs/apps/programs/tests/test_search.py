@@ -0,0 +1,136 @@
+"""
+Tests for the indexed search of programs, course codes and organizations.
+"""
+from django.contrib import admin
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from programs.apps.programs import search
+from programs.apps.programs.models import CourseCode, Organization, Program, ProgramCourseCode, SearchTerm
+from programs.apps.programs.tests import factories
+
+
+class TokenizeTests(TestCase):
+    """
+    Tests for the normalization of indexed and searched text.
+    """
+
+    def test_tokenize(self):
+        """Verify that text is split into lowercase words, without accents or punctuation."""
+        self.assertEqual(search.tokenize(u'Soci\xe9t\xe9 d\u2019\xc9conomie: CS-101x'),
+                         [u'societe', u'd', u'economie', u'cs', u'101x'])
+        self.assertEqual(search.tokenize(None), [])
+        self.assertEqual(search.tokenize('a' * 40), ['a' * search.MAX_TERM_LENGTH])
+
+    def test_get_terms(self):
+        """Verify that rows are indexed under their words and prefixes, whole words weighing more."""
+        program = Program(name='Data X', subtitle='Databases')
+        self.assertEqual(search.get_terms(program), {
+            'da': 3, 'dat': 3, 'data': 6, 'x': 6,
+            'datab': 1, 'databa': 1, 'databas': 1, 'database': 1, 'databases': 2,
+        })
+
+        course_code = CourseCode(key='DB', display_name='Data', organization=Organization(key='MITx', display_name=''))
+        self.assertEqual(search.get_terms(course_code), {
+            'db': 6, 'da': 3, 'dat': 3, 'data': 6, 'mi': 1, 'mit': 1, 'mitx': 2,
+        })
+
+
+class SearchTests(TestCase):
+    """
+    Tests for finding rows using the index.
+    """
+
+    def setUp(self):
+        super(SearchTests, self).setUp()
+        self.computing = factories.ProgramFactory.create(name='Introduction to Computing', subtitle='')
+        self.science = factories.ProgramFactory.create(name='Computer Science', subtitle='An introduction')
+        self.history = factories.ProgramFactory.create(name='History', subtitle='Intro')
+
+    def _search(self, query, queryset=None):
+        """Search programs, returning those found in order."""
+        ids = search.search(Program.objects.all() if queryset is None else queryset, query)
+        return [Program.objects.get(id=program_id) for program_id in ids]
+
+    def test_search(self):
+        """Verify that rows having every word of the query, whole or as a prefix, are found by relevance."""
+        self.assertEqual(self._search('intro'), [self.computing, self.history, self.science])
+        self.assertEqual(self._search('COMPUT intro'), [self.computing, self.science])
+        self.assertEqual(self._search('computer'), [self.science])
+        self.assertEqual(self._search('puting'), [])
+        self.assertEqual(self._search('  ,'), [])
+
+    def test_restricted(self):
+        """Verify that only rows of the given queryset are found, up to the limit."""
+        self.assertEqual(self._search('intro', Program.objects.exclude(id=self.computing.id)),
+                         [self.history, self.science])
+        with override_settings(SEARCH_MAX_RESULTS=1):
+            self.assertEqual(self._search('intro'), [self.computing])
+
+    def test_order_by_ids(self):
+        """Verify that querysets are restricted to the given ids, in order."""
+        ids = [self.history.id, self.computing.id]
+        self.assertEqual(list(search.order_by_ids(Program.objects.all(), ids)), [self.history, self.computing])
+        self.assertEqual(list(search.order_by_ids(Program.objects.all(), [])), [])
+
+    def test_maintenance(self):
+        """Verify that the index follows changes to indexed rows."""
+        self.history.name = 'Geography'
+        self.history.save()
+        self.assertEqual(self._search('hist'), [])
+        self.assertEqual(self._search('geo'), [self.history])
+
+        self.history.delete()
+        self.assertEqual(self._search('geo'), [])
+
+        org = factories.OrganizationFactory.create(key='MITx', display_name='Massachusetts')
+        course_code = factories.CourseCodeFactory.create(organization=org, key='6.00x', display_name='Python')
+        self.assertEqual(search.search(Organization.objects.all(), 'mit'), [org.id])
+        self.assertEqual(search.search(CourseCode.objects.all(), 'pyth'), [course_code.id])
+
+        # course codes are found by the name of their organization, even once it changed.
+        org.display_name = 'Institute of Technology'
+        org.save()
+        self.assertEqual(search.search(CourseCode.objects.all(), 'institute pyth'), [course_code.id])
+        self.assertEqual(search.search(CourseCode.objects.all(), 'massachusetts'), [])
+
+        # saving other fields leaves the index alone.
+        program = Program.objects.get(id=self.science.id)
+        with CaptureQueriesContext(connection) as context:
+            program.save(update_fields=['status'])
+        self.assertFalse([query for query in context.captured_queries if 'programs_searchterm' in query['sql']])
+
+    def test_admin(self):
+        """Verify that the admin searches using the index."""
+        queryset, use_distinct = admin.site._registry[Program].get_search_results(  # pylint: disable=protected-access
+            None, Program.objects.all(), 'intro comp'
+        )
+        self.assertEqual((set(queryset), use_distinct), ({self.computing, self.science}, False))
+
+        # every match is listed, not only the most relevant.
+        with override_settings(SEARCH_MAX_RESULTS=1):
+            queryset, __ = admin.site._registry[Program].get_search_results(  # pylint: disable=protected-access
+                None, Program.objects.all(), 'intro'
+            )
+            self.assertEqual(set(queryset), {self.computing, self.science, self.history})
+
+        org = factories.OrganizationFactory.create()
+        factories.ProgramOrganizationFactory.create(program=self.history, organization=org)
+        program_course_code = factories.ProgramCourseCodeFactory.create(
+            program=self.history,
+            course_code=factories.CourseCodeFactory.create(organization=org, display_name='Ancient Rome'),
+        )
+        for search_term in ('hist', 'rome'):
+            queryset, __ = admin.site._registry[ProgramCourseCode].get_search_results(  # pylint: disable=protected-access
+                None, ProgramCourseCode.objects.all(), search_term
+            )
+            self.assertEqual(list(queryset), [program_course_code])
+
+    def test_rebuild(self):
+        """Verify that the index can be rebuilt from scratch."""
+        expected = sorted(SearchTerm.objects.values_list('entity_type', 'entity_id', 'term', 'weight'))
+        SearchTerm.objects.all().delete()
+        call_command('rebuild_search_index')
+        self.assertEqual(sorted(SearchTerm.objects.values_list('entity_type', 'entity_id', 'term', 'weight')), expected)
@@ -1,5 +1,6 @@
 import os
 from os.path import join, abspath, dirname
+import tempfile
 
 # PATH vars
 here = lambda *x: join(abspath(dirname(__file__)), *x)
@@ -45,6 +46,9 @@ INSTALLED_APPS += THIRD_PARTY_APPS
 INSTALLED_APPS += PROJECT_APPS
 
 MIDDLEWARE_CLASSES = (
+    'programs.apps.core.metrics.MetricsMiddleware',
+    'programs.apps.core.profiling.ProfilingMiddleware',
+    'programs.apps.core.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -76,6 +80,68 @@ DATABASES = {
     }
 }
 
+# DATABASE CONNECTION CONFIGURATION
+# Seconds for which database connections are kept open and reused across requests. Applied as the
+# CONN_MAX_AGE of DATABASES entries which don't set their own. See: programs/apps/core/db_connections.py
+DATABASE_CONN_MAX_AGE = 60
+# Persistent connections which have been idle for at least this long are checked before being reused.
+DATABASE_CONN_HEALTH_CHECK_AFTER = 10
+# Persistent connections which have been idle for this long are closed, every DATABASE_CONN_REAP_INTERVAL
+# seconds. Set the interval to None to disable reaping.
+DATABASE_CONN_MAX_IDLE = 300
+DATABASE_CONN_REAP_INTERVAL = 60
+# END DATABASE CONNECTION CONFIGURATION
+
+# HEALTH CHECK CONFIGURATION
+# Seconds between background probes of the services reported by the health endpoint. When None, the
+# services are probed on each request instead. See: programs/apps/core/health.py
+HEALTH_CHECK_INTERVAL = 10
+# END HEALTH CHECK CONFIGURATION
+
+# METRICS CONFIGURATION
+# Shared secret which Prometheus must send, as a bearer token, to read /metrics/. When None, only staff
+# users may read them. See: programs/apps/core/views.py
+METRICS_TOKEN = None
+# END METRICS CONFIGURATION
+
+# REQUEST PROFILING CONFIGURATION
+# Fraction of requests profiled with cProfile. See: programs/apps/core/profiling.py
+PROFILING_SAMPLE_RATE = 0
+# When set, the stack of every other request is sampled every PROFILING_STACK_INTERVAL seconds,
+# and kept if the request takes at least this many seconds.  Stacks cannot be sampled under gevent.
+PROFILING_SLOW_REQUEST_SECONDS = None
+PROFILING_STACK_INTERVAL = 0.005
+# Directory storing the latest PROFILING_MAX_PROFILES profiles, outside of the source tree. Deployments
+# should point it at a persistent data directory, e.g. with PROFILING_DIRECTORY in the PROGRAMS_CFG YAML file.
+PROFILING_DIRECTORY = os.environ.get('PROGRAMS_PROFILING_DIRECTORY', join(tempfile.gettempdir(), 'programs-profiles'))
+PROFILING_MAX_PROFILES = 100
+# END REQUEST PROFILING CONFIGURATION
+
+# COMPRESSION CONFIGURATION
+# API response bodies of at least this many bytes are compressed. See: programs/apps/core/compression.py
+COMPRESSION_MIN_SIZE = 1024
+# The compressed bodies of responses of at least this many bytes are cached, for this many seconds,
+# so that identical responses aren't compressed again. Set the size to None to disable caching.
+COMPRESSION_CACHE_MIN_SIZE = 16384
+COMPRESSION_CACHE_TIMEOUT = 300
+# END COMPRESSION CONFIGURATION
+
+# Reads which may be served from a read replica are routed by this router.
+# See: programs/apps/core/db_routers.py
+DATABASE_ROUTERS = ['programs.apps.core.db_routers.ReadReplicaRouter']
+
+# READ REPLICA CONFIGURATION
+# Aliases of the DATABASES entries which replicate 'default', used to serve API GET requests.
+READ_REPLICA_ALIASES = ()
+# Replicas lagging further behind the primary than this are not used.
+READ_REPLICA_MAX_LAG_SECONDS = 10
+# How long the result of measuring a replica's lag is reused.
+READ_REPLICA_LAG_CHECK_INTERVAL = 5
+# After a write, the client keeps reading from the primary for this long.
+READ_REPLICA_PIN_SECONDS = 5
+READ_REPLICA_PIN_COOKIE_NAME = 'programs_read_primary'
+# END READ REPLICA CONFIGURATION
+
 # Internationalization
 # https://docs.djangoproject.com/en/dev/topics/i18n/
 
@@ -102,6 +168,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'programs.apps.api.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'programs.apps.api.pagination.DefaultPagination',
     'PAGE_SIZE': 20,
     'EXCEPTION_HANDLER': 'programs.apps.api.exception_handler.auth_exception_handler',
@@ -247,6 +317,37 @@ CORS_ALLOW_CREDENTIALS = True
 # END CORS
 
 
+# PROGRAMS API CONFIGURATION
+# How long clients may reuse responses of the program summary endpoint, in seconds.
+PROGRAM_SUMMARY_MAX_AGE = 300
+# Maximum number of programs which may be retrieved at once by uuid.
+PROGRAM_BULK_MAX_UUIDS = 100
+# Maximum number of programs which may be created or updated at once.
+PROGRAM_BULK_MAX_WRITES = 500
+# Maximum number of courses whose programs may be looked up at once.
+PROGRAM_BULK_MAX_COURSE_KEYS = 100
+# Maximum number of course lookup results cached by each process.
+PROGRAM_COURSE_LOOKUP_CACHE_SIZE = 10000
+# Maximum number of parsed course keys cached by each process.
+# See: programs/apps/programs/course_keys.py
+COURSE_KEY_CACHE_SIZE = 10000
+# Maximum number of learners whose program completion may be evaluated at once.
+PROGRAM_COMPLETION_MAX_LEARNERS = 1000
+# Name of the encoder rendering API responses as JSON, or None to use the fastest available one.
+# See: programs/apps/api/renderers.py
+API_JSON_ENCODER = None
+# Maximum number of results of searches of programs, course codes and organizations.
+# See: programs/apps/programs/search.py
+SEARCH_MAX_RESULTS = 100
+# END PROGRAMS API CONFIGURATION
+
+# CHANGE FEED CONFIGURATION
+# Maximum number of changes returned at once by the change feed. See: programs/apps/programs/changes.py
+CHANGE_FEED_PAGE_SIZE = 1000
+# Deletions are kept in the change log for this many days.
+CHANGE_LOG_RETENTION_DAYS = 30
+# END CHANGE FEED CONFIGURATION
+
 # ORGANIZATIONS API CONFIGURATION
 ORGANIZATIONS_API_URL_ROOT = None
 ORGANIZATIONS_API_PAGE_SIZE = 50
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from programs.settings.base import *
 from programs.settings.utils import get_logger_config
@@ -17,6 +18,19 @@ NOSE_ARGS = [
 ]
 
 LOGGING = get_logger_config(debug=False, dev_env=True, local_loglevel='DEBUG')
+
+# Keep the files uploaded by tests, such as program banners, out of the source tree.
+MEDIA_ROOT = tempfile.mkdtemp(prefix='programs-test-media-')
+
+# Fail requests to API views which load related rows one object at a time.
+# See: programs/apps/core/tests/nplusone.py
+MIDDLEWARE_CLASSES += (
+    'programs.apps.core.tests.nplusone.NPlusOneMiddleware',
+)
+NPLUSONE_THRESHOLD = 2
+
+# Probe services on each request, so that tests see the effect of simulated outages.
+HEALTH_CHECK_INTERVAL = None
 # END TEST SETTINGS
 
 
@@ -30,7 +44,19 @@ DATABASES = {
         'HOST': '',
         'PORT': '',
     },
+    # Stand-in for a read replica.  It is a separate database, and is not used
+    # unless a test adds it to READ_REPLICA_ALIASES.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'USER': '',
+        'PASSWORD': '',
+        'HOST': '',
+        'PORT': '',
+    },
 }
+# Closing an in-memory database from another thread would destroy it.
+DATABASE_CONN_REAP_INTERVAL = None
 # END IN-MEMORY TEST DATABASE
 
 # AUTHENTICATION
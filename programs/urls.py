@@ -48,8 +48,12 @@ urlpatterns = [
     url(r'^auto_auth/$', core_views.AutoAuth.as_view(), name='auto_auth'),
     url(r'^docs/', include('rest_framework_swagger.urls')),
     url(r'^health/$', core_views.health, name='health'),
+    url(r'^health/live/$', core_views.liveness, name='liveness'),
     url(r'^i18n/', include('django.conf.urls.i18n')),
     url(r'^jsi18n/$', 'django.views.i18n.javascript_catalog', js_info_dict),
+    url(r'^metrics/$', core_views.metrics, name='metrics'),
+    url(r'^profiles/$', core_views.profiles, name='profiles'),
+    url(r'^profiles/(?P<profile_id>[\w-]+)/$', core_views.profile_detail, name='profile_detail'),
     url('', include('social.apps.django_app.urls', namespace='social')),
 ]
 